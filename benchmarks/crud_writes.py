@@ -0,0 +1,122 @@
+"""
+Latency and database round trips of the job create, update and delete
+endpoints, with the ORM write path the CRUD classes used before (add or
+setattr, commit, refresh; get then delete) versus the RETURNING based one.
+
+Needs the usual pinta-api environment and a migrated database, but no
+cluster: jobs are created unscheduled and the call deleting the Volcano job
+is replaced by a no-op.
+
+    python -m benchmarks.crud_writes -n 500
+"""
+import argparse
+import time
+from contextlib import ExitStack
+from statistics import mean
+from unittest import mock
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from pinta.api import crud
+from pinta.api.__main__ import app
+from pinta.api.api.endpoints import jobs
+from pinta.api.core.config import settings
+from pinta.api.core.security import create_access_token
+from pinta.api.crud.aio.base import AsyncCRUDBase
+from pinta.api.crud.aio.crud_job import AsyncCRUDJob
+from pinta.api.db.session import SessionLocal, async_engine
+from pinta.api.models import Job
+
+
+async def legacy_create_with_owner(self, db, *, obj_in, owner_id):
+    db_obj = Job(name=obj_in.name, description=obj_in.description, type=obj_in.type, image=obj_in.image,
+                 volumes=obj_in.volumes, working_dir=obj_in.working_dir,
+                 master_command=obj_in.master_command, num_masters=obj_in.num_masters,
+                 replica_command=obj_in.replica_command, num_replicas=obj_in.num_replicas,
+                 ports=obj_in.ports, scheduled=obj_in.scheduled, owner_id=owner_id)
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def legacy_update(self, db, *, db_obj, obj_in):
+    obj_data = jsonable_encoder(db_obj)
+    update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+    for field in obj_data:
+        if field in update_data:
+            setattr(db_obj, field, update_data[field])
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def legacy_remove(self, db, *, id):
+    obj = await db.get(self.model, id)
+    await db.delete(obj)
+    await db.commit()
+    return obj
+
+
+async def no_delete_pintajob(id):
+    pass
+
+
+def run(client: TestClient, headers: dict, n: int, statements: list) -> dict:
+    body = dict(name="bench", description="", image="busybox", from_private=False, volumes="", working_dir="/",
+                command="true", num_replicas=1, ports="", schedule=False)
+    results = {"create": [], "update": [], "delete": []}
+    for i in range(n):
+        for op in ("create", "update", "delete"):
+            statements.clear()
+            start = time.perf_counter()
+            if op == "create":
+                resp = client.post(f"{settings.API_STR}/jobs/symmetric", json=body, headers=headers)
+                job = resp.json()
+            elif op == "update":
+                resp = client.put(f"{settings.API_STR}/jobs/{job['id']}",
+                                  json=dict(job, description=f"run {i}"), headers=headers)
+            else:
+                resp = client.delete(f"{settings.API_STR}/jobs/{job['id']}", headers=headers)
+            elapsed = time.perf_counter() - start
+            resp.raise_for_status()
+            results[op].append((elapsed, len(statements)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=500, help="create/update/delete rounds per variant")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user = crud.user.get_by_username(db, username=settings.FIRST_SUPERUSER)
+    headers = {"Authorization": f"Bearer {create_access_token(user.id)}"}
+    db.close()
+
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *_: statements.append(None))
+    legacy = [
+        mock.patch.object(AsyncCRUDJob, "create_with_owner", legacy_create_with_owner),
+        mock.patch.object(AsyncCRUDBase, "update", legacy_update),
+        mock.patch.object(AsyncCRUDBase, "remove", legacy_remove),
+    ]
+    with mock.patch.object(jobs, "delete_pintajob", no_delete_pintajob), TestClient(app) as client:
+        run(client, headers, 10, statements)
+        for name, patches in (("orm", legacy), ("returning", [])):
+            with ExitStack() as stack:
+                for patch in patches:
+                    stack.enter_context(patch)
+                results = run(client, headers, args.n, statements)
+            for op, samples in results.items():
+                latencies = sorted(elapsed for elapsed, _ in samples)
+                print(f"{name:>10} {op:>6}: mean {mean(latencies) * 1000:6.2f} ms  "
+                      f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.2f} ms  "
+                      f"{mean(count for _, count in samples):4.1f} statements/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Per-call latency of a Volcano job lookup, reloading the Kubernetes config for
+every call versus reusing the pooled API client.
+
+Needs the usual pinta-api environment and a reachable cluster (set
+K8S_DEBUG=1 to use ~/.kube/config):
+
+    python -m benchmarks.k8s_client -n 200
+"""
+import argparse
+import statistics
+import time
+
+from kubernetes import client, config
+
+from pinta.api.core.config import settings
+from pinta.api.kubernetes.api_client import custom_objects_api, init_api_client
+
+LIST_ARGS = dict(group="batch.volcano.sh", version="v1alpha1", namespace="default", plural="jobs", limit=1)
+
+
+def reload_per_call():
+    if settings.K8S_DEBUG:
+        config.load_kube_config()
+    else:
+        config.load_incluster_config()
+    client.CustomObjectsApi().list_namespaced_custom_object(**LIST_ARGS)
+
+
+def pooled():
+    custom_objects_api().list_namespaced_custom_object(**LIST_ARGS)
+
+
+def measure(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=100, help="calls per variant")
+    args = parser.parse_args()
+
+    init_api_client()
+    for name, fn in (("reload per call", reload_per_call), ("pooled client", pooled)):
+        fn()  # warm up
+        mean, p50, p99 = measure(fn, args.n)
+        print(f"{name:>16}: mean {mean:7.2f} ms  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
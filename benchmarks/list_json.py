@@ -0,0 +1,71 @@
+"""
+Requests per second of `GET /jobs?limit=1000`, with the rows validated again
+through the response_model and encoded by the stdlib json versus serialized
+straight to bytes (FAST_JSON_RESPONSES).
+
+Needs the usual pinta-api environment and a migrated database, but no
+cluster: the benchmark inserts unscheduled jobs and deletes them afterwards.
+
+    python -m benchmarks.list_json -n 50 --jobs 1000
+"""
+import argparse
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from pinta.api import crud, schemas
+from pinta.api.__main__ import app
+from pinta.api.api.pagination import encode_cursor
+from pinta.api.core.config import settings
+from pinta.api.core.security import create_access_token
+from pinta.api.db.session import SessionLocal
+
+VARIANTS = (
+    ("model", dict(FAST_JSON_RESPONSES=False)),
+    ("fast", dict(FAST_JSON_RESPONSES=True)),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=50, help="requests per variant")
+    parser.add_argument("--jobs", type=int, default=1000, help="jobs to list per request")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user = crud.user.get_by_username(db, username=settings.FIRST_SUPERUSER)
+    headers = {"Authorization": f"Bearer {create_access_token(user.id)}"}
+    spec = schemas.SymmetricJob(name="bench", description="listed by benchmarks.list_json", image="busybox",
+                                volumes="", working_dir="/", command="true", num_replicas=1, ports="",
+                                schedule=False)
+    jobs = crud.job.create_multi_with_owner(db, objs_in=[spec] * args.jobs, owner_id=user.id)
+    db.commit()
+    # Only list the inserted jobs, other jobs may be scheduled and need a cluster
+    cursor = encode_cursor(id=jobs[0].id - 1, order_by="id", desc=False, key=jobs[0].id - 1)
+    url = f"{settings.API_STR}/jobs/?limit={args.jobs}&cursor={cursor}"
+    client = TestClient(app)
+    defaults = {name: getattr(settings, name) for _, values in VARIANTS for name in values}
+    try:
+        bodies = {}
+        for name, values in VARIANTS:
+            for key, value in values.items():
+                setattr(settings, key, value)
+            bodies[name] = client.get(url, headers=headers).content
+            start = time.perf_counter()
+            for _ in range(args.n):
+                client.get(url, headers=headers).raise_for_status()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10}: {args.n / elapsed:8.1f} req/s  {elapsed / args.n * 1000:7.2f} ms/request  "
+                  f"{len(bodies[name]) / 1024:7.1f} KiB")
+        assert all(json.loads(body) == json.loads(bodies["model"]) for body in bodies.values())
+    finally:
+        for key, value in defaults.items():
+            setattr(settings, key, value)
+        crud.job.remove_multi(db, ids=[job.id for job in jobs])
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Login throughput under a burst of concurrent logins, with bcrypt running
+on the threads serving requests (PASSWORD_HASH_WORKERS=0) versus on the
+dedicated process pool. Also reports the latency of GET /users/me during
+the burst, and how many logins were turned away with 503.
+
+Needs the usual pinta-api environment and a migrated database, but no
+cluster. Each variant runs the API with uvicorn on a local port.
+
+    python -m benchmarks.login -n 200 -c 50
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from statistics import quantiles
+
+import aiohttp
+
+from pinta.api import crud, schemas
+from pinta.api.core.config import settings
+from pinta.api.core.security import create_access_token, password_hasher
+from pinta.api.db.session import SessionLocal
+
+USERNAME = "login-benchmark"
+PASSWORD = "login-benchmark"
+
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        return "       -"
+    cuts = quantiles(latencies, n=100)
+    return f"p50 {cuts[49] * 1000:7.1f} ms  p99 {cuts[98] * 1000:7.1f} ms"
+
+
+async def burst(url: str, token: str, n: int, concurrency: int):
+    logins, probes, busy = [], [], 0
+    done = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        async def login():
+            nonlocal busy
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.post(f"{url}/login/access-token",
+                                        data=dict(username=USERNAME, password=PASSWORD)) as resp:
+                    await resp.read()
+                    if resp.status == 503:
+                        busy += 1
+                    else:
+                        resp.raise_for_status()
+                        logins.append(time.perf_counter() - start)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                async with session.get(f"{url}/users/me", headers={"Authorization": f"Bearer {token}"}) as resp:
+                    await resp.read()
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.02)
+
+        prober = asyncio.ensure_future(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(n)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return elapsed, logins, probes, busy
+
+
+def run_variant(name: str, env: dict, port: int, token: str, args) -> None:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "pinta.api.__main__:app", "--port", str(port), "--log-level", "error"],
+        env=dict(os.environ, K8S_JOB_INFORMER="false", **env),
+    )
+    url = f"http://127.0.0.1:{port}{settings.API_STR}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{url}/openapi.json")
+                break
+            except OSError:
+                time.sleep(0.1)
+        elapsed, logins, probes, busy = asyncio.get_event_loop().run_until_complete(
+            burst(url, token, args.n, args.c))
+        print(f"{name:>10}: {len(logins) / elapsed:6.1f} logins/s  login {percentiles(logins)}  "
+              f"/users/me {percentiles(probes)}  {busy:4d} x 503")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=200, help="logins per variant")
+    parser.add_argument("-c", type=int, default=50, help="concurrent logins")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes of the pool")
+    parser.add_argument("--max-pending", type=int, default=settings.PASSWORD_HASH_MAX_PENDING)
+    parser.add_argument("--port", type=int, default=18765)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user = crud.user.get_by_username(db, username=USERNAME)
+    if user:
+        crud.user.remove(db, id=user.id)
+    user = crud.user.create(db, obj_in=schemas.UserCreate(username=USERNAME, email=f"{USERNAME}@example.com",
+                                                          password=PASSWORD))
+    password_hasher.shutdown()
+    token = create_access_token(user.id)
+    try:
+        run_variant("inline", dict(PASSWORD_HASH_WORKERS="0", PASSWORD_HASH_MAX_PENDING=str(10 ** 6)),
+                    args.port, token, args)
+        run_variant("pool", dict(PASSWORD_HASH_WORKERS=str(args.workers),
+                                 PASSWORD_HASH_MAX_PENDING=str(args.max_pending)),
+                    args.port, token, args)
+    finally:
+        crud.user.remove(db, id=user.id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
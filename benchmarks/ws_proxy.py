@@ -0,0 +1,102 @@
+"""
+Throughput of the exec websocket proxy against a local fake exec server that
+writes many short stdout lines, forwarding every upstream frame as is versus
+the coalescing proxy in pinta.api.kubernetes.websocket.
+
+Needs the usual pinta-api environment, but no cluster:
+
+    python -m benchmarks.ws_proxy -n 100000
+"""
+import argparse
+import asyncio
+import time
+
+import uvicorn
+from aiohttp import ClientSession, WSMsgType, web
+from starlette.applications import Starlette
+from starlette.websockets import WebSocket
+
+from pinta.api.kubernetes.websocket import proxy, upstream_frames
+
+LINE = b"step 1234 loss 0.123456 accuracy 0.987654 lr 0.000100 throughput 512.3 img/s\n"
+
+
+async def fake_exec(request: web.Request) -> web.WebSocketResponse:
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    for _ in range(int(request.query["lines"])):
+        await ws.send_bytes(bytes([1]) + LINE)
+    await ws.send_bytes(bytes([3]) + b'{"status":"Success"}')
+    await ws.close()
+    return ws
+
+
+async def per_frame(ws: WebSocket, resp) -> None:
+    async for message in resp:
+        await ws.send_bytes(message.data)
+
+
+async def coalesced(ws: WebSocket, resp) -> None:
+    await proxy(ws, upstream_frames(resp), resp.send_bytes)
+
+
+def proxy_app(upstream: str, handler) -> Starlette:
+    app = Starlette()
+
+    @app.websocket_route("/exec")
+    async def exec_route(ws: WebSocket):
+        await ws.accept()
+        async with ClientSession() as session:
+            async with session.ws_connect(upstream + ws.url.query) as resp:
+                await handler(ws, resp)
+        await ws.close()
+
+    return app
+
+
+async def consume(url: str):
+    frames = size = 0
+    async with ClientSession() as session:
+        async with session.ws_connect(url, max_msg_size=0) as ws:
+            async for message in ws:
+                if message.type == WSMsgType.BINARY:
+                    frames += 1
+                    size += len(message.data)
+    return frames, size
+
+
+async def run(lines: int, ws: str) -> None:
+    exec_app = web.Application()
+    exec_app.router.add_get("/exec", fake_exec)
+    runner = web.AppRunner(exec_app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 18090).start()
+
+    for port, (name, handler) in enumerate((("per frame", per_frame), ("coalesced", coalesced)), 18091):
+        config = uvicorn.Config(proxy_app("http://127.0.0.1:18090/exec?", handler),
+                                host="127.0.0.1", port=port, ws=ws, log_level="warning")
+        server = uvicorn.Server(config)
+        serving = asyncio.ensure_future(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        frames, size = await consume(f"ws://127.0.0.1:{port}/exec?lines={lines}")
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {elapsed:6.2f} s  {size / elapsed / 2 ** 20:7.2f} MiB/s  "
+              f"{frames:7d} frames  {size / frames:8.0f} B/frame")
+        server.should_exit = True
+        await serving
+
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=100000, help="lines written by the fake exec server")
+    parser.add_argument("--ws", default="auto", help="uvicorn websocket implementation")
+    args = parser.parse_args()
+    asyncio.run(run(args.n, args.ws))
+
+
+if __name__ == "__main__":
+    main()
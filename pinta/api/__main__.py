@@ -1,16 +1,76 @@
+import asyncio
+import logging
+import math
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from kubernetes.config import ConfigException
+from kubernetes_asyncio.config import ConfigException as AsyncConfigException
 
 from pinta.api.api.api import api_router
+from pinta.api.api.ratelimit import RateLimitMiddleware
+from pinta.api.core.breaker import CircuitOpenError
 from pinta.api.core.config import settings
+from pinta.api.core.events import job_event_bus
+from pinta.api.core.security import PasswordHashingBusy, password_hasher
+from pinta.api.core.websocket import DeflateWebSocketProtocol
+from pinta.api.kubernetes.aio import api_client as aio_api_client
+from pinta.api.kubernetes.api_client import close_api_client, init_api_client
+from pinta.api.kubernetes.archive import archive_on_finish
+from pinta.api.kubernetes.informer import vcjob_informer
+from pinta.api.kubernetes.reconciler import job_status_reconciler
 
 app = FastAPI(title=settings.PROJECT_NAME,
               openapi_url=f"{settings.API_STR}/openapi.json")
 app.include_router(api_router, prefix=settings.API_STR)
+if settings.RATE_LIMITS:
+    app.add_middleware(RateLimitMiddleware)
+
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(status_code=503, content={"detail": "Too many logins, try again later"},
+                        headers={"Retry-After": "1"})
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open(request: Request, exc: CircuitOpenError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(math.ceil(exc.retry_after))})
+
+
+@app.on_event("startup")
+async def startup():
+    password_hasher.start()
+    try:
+        init_api_client()
+        await aio_api_client.init_api_client()
+    except (ConfigException, AsyncConfigException) as e:
+        # Retried lazily on the first Kubernetes call
+        logging.warning(f"Kubernetes client not initialized: {e}")
+    if settings.K8S_JOB_INFORMER:
+        if settings.K8S_STATUS_RECONCILER:
+            job_event_bus.bind(asyncio.get_running_loop())
+            vcjob_informer.add_listener(job_status_reconciler.on_phase_change)
+            job_status_reconciler.start()
+        if settings.LOG_ARCHIVE:
+            vcjob_informer.add_listener(archive_on_finish(asyncio.get_running_loop()))
+        vcjob_informer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    vcjob_informer.stop()
+    job_status_reconciler.stop()
+    password_hasher.shutdown()
+    close_api_client()
+    await aio_api_client.close_api_client()
 
 
 def main():
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    uvicorn.run(app, host="0.0.0.0", port=8080,
+                ws=DeflateWebSocketProtocol if settings.WS_PERMESSAGE_DEFLATE else "auto")
 
 
 if __name__ == '__main__':
@@ -1,15 +1,18 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from pinta.api import crud, models, schemas
 from pinta.api.core import security
+from pinta.api.core.cache import user_cache
 from pinta.api.core.config import settings
-from pinta.api.db.session import SessionLocal
+from pinta.api.crud.base import attach
+from pinta.api.db.session import AsyncSessionLocal, SessionLocal
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_STR}/login/access-token"
@@ -24,22 +27,60 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def decode_token(token: str) -> schemas.TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = schemas.TokenPayload(**payload)
+        return schemas.TokenPayload(**payload)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+
+
+def cached_user(db: Union[Session, AsyncSession], token: str) -> Optional[models.User]:
+    """
+    User of an already verified token, attached to the session from the
+    cached snapshot without a query. Its password hash loads on access.
+    """
+    snapshot = user_cache.get(token)
+    return None if snapshot is None else attach(db, models.User, snapshot)
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> models.User:
+    user = cached_user(db, token)
+    if user is not None:
+        return user
+    token_data = decode_token(token)
+    generation = user_cache.generation
     user = crud.user.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    user_cache.set(token, user, expires_at=token_data.exp, generation=generation)
+    return user
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> models.User:
+    user = cached_user(db, token)
+    if user is not None:
+        return user
+    token_data = decode_token(token)
+    generation = user_cache.generation
+    user = await crud.aio.user.get(db, id=token_data.sub)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user_cache.set(token, user, expires_at=token_data.exp, generation=generation)
     return user
 
 
@@ -51,6 +92,14 @@ def get_current_active_user(
     return current_user
 
 
+async def get_current_active_user_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    if not crud.user.is_active(current_user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
 def get_current_active_superuser(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -1,11 +1,16 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from kubernetes.client.rest import ApiException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from pinta.api import crud, models, schemas
 from pinta.api.api import deps
+from pinta.api.api.etag import check_etag
+from pinta.api.api.pagination import check_skip, cursor_after_id, set_next_cursor
+from pinta.api.api.responses import list_response
+from pinta.api.core.config import settings
 from pinta.api.api.endpoints.jobs import create_image_builder_job
 
 router = APIRouter()
@@ -13,34 +18,47 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Image])
 def read_images(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = None,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve images.
+    Retrieve images, by id. Pages continue after `after_id`, or from the `cursor`
+    returned in the X-Next-Cursor header of the previous page. Answers 304 if
+    none of the listed images changed since the ETag in If-None-Match.
     """
-    if crud.user.is_superuser(current_user):
-        images = crud.image.get_multi(db, skip=skip, limit=limit)
+    check_skip(skip, cursor, after_id)
+    after_id = cursor_after_id(cursor, after_id)
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    not_modified = check_etag(request, response, owner_id, crud.image.get_version(db, owner_id=owner_id))
+    if not_modified:
+        return not_modified
+    if owner_id is None:
+        images = crud.image.get_multi(db, skip=skip, limit=limit, after_id=after_id)
     else:
         images = crud.image.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+            db=db, owner_id=current_user.id, skip=skip, limit=limit, after_id=after_id
         )
-    return images
+    set_next_cursor(response, images, limit)
+    return list_response(response, images, schemas.Image)
 
 
 @router.post("/", response_model=schemas.Job)
-def create_image(
+async def create_image(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     job_in: schemas.ImageBuilderJob,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Create a new job which builds a new image.
     """
-    return create_image_builder_job(db=db, job_in=job_in, current_user=current_user)
+    return await create_image_builder_job(db=db, job_in=job_in, current_user=current_user)
 
 
 # @router.put("/{id}", response_model=schemas.Image)
@@ -66,19 +84,21 @@ def create_image(
 @router.get("/{id}", response_model=schemas.Image)
 def read_image(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get image by ID.
+    Get image by ID, or 304 if it did not change since the ETag in If-None-Match.
     """
     image = crud.image.get(db=db, id=id)
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     if not crud.user.is_superuser(current_user) and (image.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return image
+    return check_etag(request, response, image.id, image.updated_at) or image
 
 
 @router.delete("/{id}", response_model=schemas.Image)
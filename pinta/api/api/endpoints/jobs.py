@@ -1,124 +1,277 @@
-from typing import Any, List
+import asyncio
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from pinta.api import crud, models, schemas
 from pinta.api.api import deps
-from pinta.api.api.endpoints.util import patch_job_volumes, patch_job_image, patch_job_status, websocket_auth
+from pinta.api.api.etag import check_etag
+from pinta.api.api.pagination import check_skip, decode_cursor, set_next_cursor
+from pinta.api.api.responses import list_response
+from pinta.api.api.endpoints.util import EventStreamResponse, accepts_gzip, archived_log_response, \
+    gzip_stream, iter_bytes, patch_job_volumes, patch_job_image, patch_job_status, patch_jobs_status, sse_events, \
+    status_reconciled, try_archive_job_logs, websocket_auth, websocket_events
 from pinta.api.core.config import settings
+from pinta.api.core.events import job_event_bus
+from pinta.api.kubernetes.reconciler import job_status_reconciler
 from pinta.api.schemas import JobType
 
-from pinta.api.kubernetes.job import create_pintajob, commit_image_builder, delete_pintajob, get_pintajob_log
-from pinta.api.kubernetes.websocket import exec_proxy, log_proxy
-from kubernetes.client.rest import ApiException
+from pinta.api.kubernetes.aio.job import create_pintajob, commit_image_builder, delete_pintajob, iter_pod_log, \
+    open_pod_log, read_pod_log
+from pinta.api.kubernetes.logs import follow_job_logs, job_pods, merge_log_lines, open_job_logs
+from pinta.api.kubernetes.websocket import exec_proxy, log_proxy, merged_log_proxy
+from kubernetes_asyncio.client.rest import ApiException
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.JobWithStatus])
-def read_jobs(
-    db: Session = Depends(deps.get_db),
+async def read_jobs(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
-    limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    limit: int = Query(100, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    status: Optional[schemas.JobStatus] = None,
+    order_by: schemas.JobOrder = schemas.JobOrder.id,
+    desc: bool = False,
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
-    Retrieve jobs.
+    Retrieve jobs, optionally filtered by status and sorted. Filtering and sorting
+    use the status persisted by the status reconciler.
+
+    Pages continue after the job `after_id`, or from the `cursor` returned in the
+    X-Next-Cursor header of the previous page, either of which excludes `skip`.
+
+    While the status reconciler runs, answers 304 if none of the jobs changed
+    since the ETag in If-None-Match. Otherwise statuses come from Kubernetes
+    and the list has no ETag.
     """
-    if crud.user.is_superuser(current_user):
-        jobs = crud.job.get_multi(db, skip=skip, limit=limit)
-    else:
-        jobs = crud.job.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    if job_status_reconciler.is_running():
+        not_modified = check_etag(request, response, owner_id, await crud.aio.job.get_version(db, owner_id=owner_id))
+        if not_modified:
+            return not_modified
+    check_skip(skip, cursor, after_id)
+    after = None
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if values.get("order_by") != order_by.value or values.get("desc") != desc:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested order")
+        after = (values.get("key"), values["id"])
+    elif after_id is not None:
+        after_job = await crud.aio.job.get(db=db, id=after_id)
+        # Do not reveal the order keys of other users' jobs
+        if not after_job or (owner_id is not None and after_job.owner_id != owner_id):
+            raise HTTPException(status_code=400, detail="Job after_id does not exist")
+        after = (crud.aio.job.order_key(after_job, order_by), after_id)
+    try:
+        jobs = await crud.aio.job.get_multi_filtered(
+            db=db,
+            owner_id=owner_id,
+            status=status,
+            order_by=order_by,
+            descending=desc,
+            skip=skip,
+            limit=limit,
+            after=after
         )
-    for job in jobs:
-        patch_job_status(job)
-    return jobs
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    set_next_cursor(response, jobs, limit,
+                    order_by=order_by.value, desc=desc, key=crud.aio.job.order_key(jobs[-1], order_by) if jobs else None)
+    await patch_jobs_status(jobs)
+    return list_response(response, jobs, schemas.JobWithStatus)
+
+
+@router.get("/events", response_class=EventStreamResponse)
+async def read_job_events(
+    db: AsyncSession = Depends(deps.get_async_db),
+    last_event_id: Optional[int] = Header(None),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    Stream status changes of the user's jobs, or of all jobs for a superuser,
+    as server-sent events. Resumes after Last-Event-ID while it is still in the
+    event log, otherwise starts with a reset event and the client should
+    reload its jobs.
+    """
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    # The stream may stay open for hours, do not hold a connection meanwhile
+    await db.close()
+    events = job_event_bus.subscribe(owner_id=owner_id,
+                                     last_event_id=last_event_id,
+                                     heartbeat=settings.JOB_EVENT_HEARTBEAT_SECONDS)
+    return EventStreamResponse(sse_events(events), headers={"Cache-Control": "no-cache"})
 
 
-def create_job(db: Session, job_in: schemas.BaseSpec, current_user: models.User) -> Any:
+@router.websocket("/events")
+async def watch_job_events(
+    *,
+    websocket: WebSocket,
+    db: AsyncSession = Depends(deps.get_async_db),
+    last_event_id: Optional[int] = None,
+    authorization: str
+):
+    await websocket.accept()
+    try:
+        current_user = await websocket_auth(db, authorization)
+        owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+        await db.close()
+        await websocket_events(websocket, job_event_bus.subscribe(owner_id=owner_id, last_event_id=last_event_id))
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": f"HTTP {e.status_code}: {e.detail}"})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+
+
+async def create_job(db: AsyncSession, job_in: schemas.BaseSpec, current_user: models.User) -> Any:
     """
     Create a new job with symmetric node configurations.
     """
     if job_in.from_private:
-        job_in.image = patch_job_image(db, job_in.image, current_user)
-    job = crud.job.create_with_owner(db=db, obj_in=job_in, owner_id=current_user.id)
+        job_in.image = await patch_job_image(db, job_in.image, current_user)
+    job = await crud.aio.job.create_with_owner(db=db, obj_in=job_in, owner_id=current_user.id)
     if job.scheduled:
         try:
-            volumes = patch_job_volumes(db, job.volumes, current_user.id)
-            create_pintajob(job, volumes)
+            volumes = await patch_job_volumes(db, job.volumes, current_user.id)
+            await create_pintajob(job, volumes)
         except ApiException as e:
             print("Exception when calling CustomObjectsApi->create_cluster_custom_object: %s\n" % e)
-            job = crud.job.remove(db=db, id=job.id)
+            job = await crud.aio.job.remove(db=db, id=job.id)
             raise
     return job
 
 
 @router.post("/symmetric", response_model=schemas.Job)
-def create_symmetric_job(
+async def create_symmetric_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     job_in: schemas.SymmetricJob,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Create a new job with symmetric node configurations.
     """
-    return create_job(db, job_in, current_user)
+    return await create_job(db, job_in, current_user)
 
 
 @router.post("/ps-worker", response_model=schemas.Job)
-def create_ps_worker_job(
+async def create_ps_worker_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     job_in: schemas.PSWorkerJob,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Create a new job with parameter server and workers.
     """
-    return create_job(db, job_in, current_user)
+    return await create_job(db, job_in, current_user)
 
 
 @router.post("/mpi", response_model=schemas.Job)
-def create_mpi_job(
+async def create_mpi_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     job_in: schemas.MPIJob,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Create a new job with master and replica node configurations, which are typically used by MPI.
     """
-    return create_job(db, job_in, current_user)
+    return await create_job(db, job_in, current_user)
 
 
 @router.post("/image-builder", response_model=schemas.Job)
-def create_image_builder_job(
+async def create_image_builder_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     job_in: schemas.ImageBuilderJob,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Create a new job which builds a new image.
     """
-    return create_job(db, job_in, current_user)
+    return await create_job(db, job_in, current_user)
+
+
+@router.post("/batch", response_model=List[schemas.JobBatchResult])
+async def create_jobs(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    batch_in: schemas.JobBatchCreate,
+    current_user: models.User = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    Create a batch of symmetric, ps-worker or MPI jobs, e.g. for a hyperparameter sweep.
+    All jobs are inserted at once and scheduled concurrently. Jobs that cannot be
+    scheduled are dropped, or with `atomic` the whole batch is rolled back.
+    """
+    images = {}
+    volumes = {}
+    for job_in in batch_in.jobs:
+        # Sweeps share images and volumes, resolve each of them once
+        if job_in.from_private:
+            if job_in.image not in images:
+                images[job_in.image] = await patch_job_image(db, job_in.image, current_user)
+            job_in.image = images[job_in.image]
+        if job_in.scheduled and job_in.volumes not in volumes:
+            volumes[job_in.volumes] = await patch_job_volumes(db, job_in.volumes, current_user.id)
+
+    jobs = await crud.aio.job.create_multi_with_owner(db=db, objs_in=batch_in.jobs, owner_id=current_user.id)
+    # Rolling back expires the jobs, keep what is needed afterwards
+    ids = [job.id for job in jobs]
+    scheduled = [job for job in jobs if job.scheduled]
+    semaphore = asyncio.Semaphore(settings.JOB_BATCH_CONCURRENCY)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    results = await asyncio.gather(*[bounded(create_pintajob(job, volumes[job.volumes])) for job in scheduled],
+                                   return_exceptions=True)
+    errors = {job.id: result for job, result in zip(scheduled, results) if isinstance(result, BaseException)}
+    unexpected = [error for error in errors.values() if not isinstance(error, ApiException)]
+    rollback = bool(unexpected) or (bool(errors) and batch_in.atomic)
+    if rollback:
+        created = [job.id for job in scheduled if job.id not in errors]
+        await asyncio.gather(*[bounded(delete_pintajob(id)) for id in created], return_exceptions=True)
+        await db.rollback()
+        if unexpected:
+            raise unexpected[0]
+
+    batch_out = []
+    for index, (id, job) in enumerate(zip(ids, jobs)):
+        if id in errors:
+            error = errors[id]
+            batch_out.append(schemas.JobBatchResult(index=index, error=f"{error.status} {error.reason}"))
+        elif rollback:
+            batch_out.append(schemas.JobBatchResult(index=index, error="Rolled back"))
+        else:
+            batch_out.append(schemas.JobBatchResult(index=index, job=schemas.Job.from_orm(job)))
+    if not rollback:
+        if errors:
+            await crud.aio.job.remove_multi(db=db, ids=list(errors))
+        await db.commit()
+    return batch_out
 
 
 @router.put("/{id}", response_model=schemas.Job)
-def update_job(
+async def update_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     job_in: schemas.Job,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Update a job.
     """
-    job = crud.job.get(db=db, id=id)
+    job = await crud.aio.job.get(db=db, id=id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
@@ -127,67 +280,73 @@ def update_job(
         raise HTTPException(status_code=400, detail="Job already scheduled")
     if job_in.scheduled:
         try:
-            volumes = patch_job_volumes(db, job_in.volumes, current_user.id)
-            create_pintajob(job_in, volumes)
+            volumes = await patch_job_volumes(db, job_in.volumes, current_user.id)
+            await create_pintajob(job_in, volumes)
         except ApiException as e:
             print("Exception when calling CustomObjectsApi->create_cluster_custom_object: %s\n" % e)
             job_in.scheduled = False
             raise
-    job = crud.job.update(db=db, db_obj=job, obj_in=job_in)
+    job = await crud.aio.job.update(db=db, db_obj=job, obj_in=job_in)
     return job
 
 
 @router.get("/{id}", response_model=schemas.JobWithStatus)
-def read_job(
+async def read_job(
     *,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
-    Get job by ID.
+    Get job by ID. Answers 304 if it did not change since the ETag in
+    If-None-Match, unless its status has to come from Kubernetes.
     """
-    job = crud.job.get(db=db, id=id)
+    job = await crud.aio.job.get(db=db, id=id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    if job.scheduled:
-        patch_job_status(job)
+    if not job.scheduled or status_reconciled(job):
+        return check_etag(request, response, job.id, job.updated_at) or job
+    await patch_job_status(job)
     return job
 
 
 @router.delete("/{id}", response_model=schemas.Job)
-def delete_job(
+async def delete_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Delete a job.
     """
-    job = crud.job.get(db=db, id=id)
+    job = await crud.aio.job.get(db=db, id=id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    delete_pintajob(id)
-    job = crud.job.remove(db=db, id=id)
+    if job.scheduled:
+        await try_archive_job_logs(job)
+    await delete_pintajob(id)
+    job = await crud.aio.job.remove(db=db, id=id)
     return job
 
 
 @router.patch("/{id}", response_model=schemas.Job)
-def schedule_job(
+async def schedule_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Schedule a job.
     """
-    job = crud.job.get(db=db, id=id)
+    job = await crud.aio.job.get(db=db, id=id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
@@ -195,12 +354,12 @@ def schedule_job(
     if job.scheduled:
         raise HTTPException(status_code=400, detail="Job already scheduled")
     try:
-        volumes = patch_job_volumes(db, job.volumes, current_user.id)
-        create_pintajob(job, volumes)
+        volumes = await patch_job_volumes(db, job.volumes, current_user.id)
+        await create_pintajob(job, volumes)
     except ApiException as e:
         print("Exception when calling CustomObjectsApi->create_cluster_custom_object: %s\n" % e)
         raise
-    job = crud.job.update(db=db, db_obj=job, obj_in=dict(scheduled=True))
+    job = await crud.aio.job.update(db=db, db_obj=job, obj_in=dict(scheduled=True))
     return job
 
 
@@ -208,7 +367,7 @@ def schedule_job(
 async def commit_image_builder_job(
     *,
     websocket: WebSocket,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     image_name: str,
     authorization: str
@@ -219,7 +378,7 @@ async def commit_image_builder_job(
     await websocket.accept()
     try:
         current_user = await websocket_auth(db, authorization)
-        job = crud.job.get(db=db, id=id)
+        job = await crud.aio.job.get(db=db, id=id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
@@ -243,14 +402,19 @@ async def commit_image_builder_job(
         await exec_proxy(websocket, **args)
         await websocket.close()
 
-        image = crud.image.create_with_owner(
-            db=db,
-            obj_in=schemas.ImageCreate(
-                name=image_name
-            ),
-            owner_id=current_user.id)
-        delete_pintajob(id)
-        job = crud.job.remove(db=db, id=id)
+        # Committing to an existing name pushes a new version of the image
+        image = await crud.aio.image.get_by_owner_and_name(db, current_user_id=current_user.id,
+                                                           owner_and_name=image_name)
+        if not image:
+            image = await crud.aio.image.create_with_owner(
+                db=db,
+                obj_in=schemas.ImageCreate(
+                    name=image_name
+                ),
+                owner_id=current_user.id)
+        await try_archive_job_logs(job)
+        await delete_pintajob(id)
+        job = await crud.aio.job.remove(db=db, id=id)
     except HTTPException as e:
         # Redirect HTTPException information to channel 3 (ERROR_CHANNEL)
         await websocket.send_bytes(bytes([3]) + f"HTTP {e.status_code}: {e.detail}".encode())
@@ -258,17 +422,17 @@ async def commit_image_builder_job(
 
 
 @router.post("/{id}/commit", response_model=schemas.Job)
-def commit_job(
+async def commit_job(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     image_name: str,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Commit an image.
     """
-    job = crud.job.get(db=db, id=id)
+    job = await crud.aio.job.get(db=db, id=id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
@@ -277,16 +441,21 @@ def commit_job(
         raise HTTPException(status_code=400, detail="Job is not an image builder")
     if not job.scheduled:
         raise HTTPException(status_code=400, detail="Image builder job not scheduled")
-    commit_image_builder(name=image_name, id=id, username=current_user.username)
-
-    image = crud.image.create_with_owner(
-        db=db,
-        obj_in=schemas.ImageCreate(
-            name=image_name
-        ),
-        owner_id=current_user.id)
-    delete_pintajob(id)
-    job = crud.job.remove(db=db, id=id)
+    await try_archive_job_logs(job)
+    await commit_image_builder(name=image_name, id=id, username=current_user.username)
+
+    # Committing to an existing name pushes a new version of the image
+    image = await crud.aio.image.get_by_owner_and_name(db, current_user_id=current_user.id,
+                                                       owner_and_name=image_name)
+    if not image:
+        image = await crud.aio.image.create_with_owner(
+            db=db,
+            obj_in=schemas.ImageCreate(
+                name=image_name
+            ),
+            owner_id=current_user.id)
+    await delete_pintajob(id)
+    job = await crud.aio.job.remove(db=db, id=id)
     return image
 
 
@@ -294,7 +463,7 @@ def commit_job(
 async def exec_job(
     *,
     websocket: WebSocket,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     role: str = "",
     num: int = 0,
@@ -305,7 +474,7 @@ async def exec_job(
     await websocket.accept()
     try:
         current_user = await websocket_auth(db, authorization)
-        job = crud.job.get(db=db, id=id)
+        job = await crud.aio.job.get(db=db, id=id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
@@ -336,46 +505,120 @@ async def exec_job(
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
 
 
-@router.get("/{id}/log")
-def read_job_log(
+@router.get("/{id}/log", response_class=StreamingResponse)
+async def read_job_log(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     role: str = "",
     num: int = 0,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    container: Optional[str] = None,
+    follow: bool = False,
+    tail_lines: Optional[int] = None,
+    since_seconds: Optional[int] = None,
+    limit_bytes: Optional[int] = None,
+    timestamps: bool = False,
+    merge: bool = False,
+    accept_encoding: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
-    Get the log of the job.
+    Stream the log of the job as plain text, gzip-encoded if the client accepts it.
+    With `merge`, the logs of all pods are interleaved by timestamp and each line
+    is prefixed with the pod's role and index.
+
+    Once the pods are gone, the log is served from the archive taken when the job
+    finished or was deleted. Archived logs of a single pod support `Range` requests.
     """
-    job = crud.job.get(db=db, id=id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
+    job = await crud.aio.job.get(db=db, id=id)
+    job_logs = None
+    if job:
+        owner_id, job_type = job.owner_id, job.type
+    else:
+        job_logs = await crud.aio.job_log.get_multi_by_job(db=db, job_id=id)
+        if not job_logs:
+            raise HTTPException(status_code=404, detail="Job not found")
+        owner_id, job_type = job_logs[0].owner_id, job_logs[0].job_type
+    if not crud.user.is_superuser(current_user) and (owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    if not job.scheduled:
+    if job and not job.scheduled:
         raise HTTPException(status_code=400, detail="Job not scheduled")
-
     if role == "":
-        role = JobType.replica_role(job.type)
-    log = get_pintajob_log(id, role, num)
-    return log
+        role = JobType.replica_role(job_type)
+    # A followed log may stream for hours, do not hold a connection meanwhile
+    await db.close()
+
+    if job_logs is None:
+        try:
+            if merge and follow:
+                sources = follow_job_logs(id, job_pods(job), container=container or "")
+                content = merge_log_lines(sources, timestamps=timestamps,
+                                          idle_timeout=settings.LOG_MERGE_IDLE_SECONDS)
+            elif merge:
+                sources = await open_job_logs(id, job_pods(job),
+                                              container=container,
+                                              tail_lines=tail_lines,
+                                              since_seconds=since_seconds,
+                                              limit_bytes=limit_bytes)
+                content = merge_log_lines(sources, timestamps=timestamps)
+            elif not follow and (tail_lines is not None or limit_bytes is not None):
+                # A bounded window is small enough to buffer, and pollers
+                # asking for the same one at once share the upstream read
+                data = await read_pod_log(f"pinta-job-{id}-{role}-{num}",
+                                          container=container,
+                                          tail_lines=tail_lines,
+                                          since_seconds=since_seconds,
+                                          limit_bytes=limit_bytes,
+                                          timestamps=timestamps)
+                content = iter_bytes(data)
+            else:
+                resp = await open_pod_log(f"pinta-job-{id}-{role}-{num}",
+                                          container=container,
+                                          follow=follow,
+                                          tail_lines=tail_lines,
+                                          since_seconds=since_seconds,
+                                          limit_bytes=limit_bytes,
+                                          timestamps=timestamps)
+                content = iter_pod_log(resp)
+        except ApiException as e:
+            job_logs = await crud.aio.job_log.get_multi_by_job(db=db, job_id=id) if e.status == 404 else None
+            if not job_logs:
+                raise
+    if job_logs is not None:
+        return archived_log_response(job_logs,
+                                     role=role,
+                                     num=num,
+                                     container=container,
+                                     merge=merge,
+                                     tail_lines=tail_lines,
+                                     since_seconds=since_seconds,
+                                     limit_bytes=limit_bytes,
+                                     timestamps=timestamps,
+                                     range_header=range_header,
+                                     accept_encoding=accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(accept_encoding):
+        content = gzip_stream(content, flush=follow)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(content, media_type="text/plain; charset=utf-8", headers=headers)
 
 
 @router.websocket("/{id}/watch")
 async def watch_job(
     *,
     websocket: WebSocket,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     role: str = "",
     num: int = 0,
+    merge: bool = False,
     authorization: str
 ):
     await websocket.accept()
     try:
         current_user = await websocket_auth(db, authorization)
-        job = crud.job.get(db=db, id=id)
+        job = await crud.aio.job.get(db=db, id=id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
@@ -383,9 +626,12 @@ async def watch_job(
         if not job.scheduled:
             raise HTTPException(status_code=400, detail="Job not scheduled")
 
-        if role == "":
-            role = JobType.replica_role(job.type)
-        await log_proxy(websocket, pod=f"pinta-job-{id}-{role}-{num}")
+        if merge:
+            await merged_log_proxy(websocket, follow_job_logs(id, job_pods(job)))
+        else:
+            if role == "":
+                role = JobType.replica_role(job.type)
+            await log_proxy(websocket, pod=f"pinta-job-{id}-{role}-{num}")
         await websocket.close()
     except HTTPException as e:
         # Redirect HTTPException information to channel 3 (ERROR_CHANNEL)
@@ -3,6 +3,7 @@ from typing import Any
 
 from fastapi import APIRouter, Body, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from pinta.api import crud, models, schemas
@@ -20,13 +21,14 @@ router = APIRouter()
 
 
 @router.post("/login/access-token", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_access_token(
+    db: AsyncSession = Depends(deps.get_async_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
-    OAuth2 compatible token login, get an access token for future requests
+    OAuth2 compatible token login, get an access token for future requests,
+    and a refresh token to get new access tokens from /login/refresh
     """
-    user = crud.user.authenticate(
+    user = await crud.aio.user.authenticate(
         db, username=form_data.username, password=form_data.password
     )
     if not user:
@@ -39,9 +41,44 @@ def login_access_token(
             user.id, expires_delta=access_token_expires
         ),
         "token_type": "bearer",
+        "refresh_token": await crud.aio.refresh_token.create_for_user(db, user_id=user.id),
     }
 
 
+@router.post("/login/refresh", response_model=schemas.Token)
+async def refresh_access_token(
+    db: AsyncSession = Depends(deps.get_async_db), refresh_token: str = Body(..., embed=True)
+) -> Any:
+    """
+    Get a new access token with a refresh token, without the password
+    """
+    user = await crud.aio.refresh_token.get_user(db, token=refresh_token)
+    if not user:
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+    elif not crud.user.is_active(user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            user.id, expires_delta=access_token_expires
+        ),
+        "token_type": "bearer",
+    }
+
+
+@router.post("/login/revoke", response_model=schemas.Msg)
+async def revoke_refresh_token(
+    db: AsyncSession = Depends(deps.get_async_db), refresh_token: str = Body(..., embed=True)
+) -> Any:
+    """
+    Revoke a refresh token, e.g. on logout. Access tokens issued with it stay
+    valid until they expire.
+    """
+    if not await crud.aio.refresh_token.revoke(db, token=refresh_token):
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+    return {"msg": "Refresh token revoked"}
+
+
 @router.post("/login/test-token", response_model=schemas.User)
 def test_token(current_user: models.User = Depends(deps.get_current_user)) -> Any:
     """
@@ -93,4 +130,5 @@ def reset_password(
     user.hashed_password = hashed_password
     db.add(user)
     db.commit()
+    crud.refresh_token.revoke_all(db, user_id=user.id)
     return {"msg": "Password updated successfully"}
@@ -1,12 +1,14 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
 from fastapi.encoders import jsonable_encoder
 from pydantic.networks import EmailStr
 from sqlalchemy.orm import Session
 
 from pinta.api import crud, models, schemas
 from pinta.api.api import deps
+from pinta.api.api.pagination import check_skip, cursor_after_id, set_next_cursor
+from pinta.api.api.responses import list_response
 from pinta.api.core.config import settings
 from pinta.api.utils import send_new_account_email
 
@@ -15,16 +17,22 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.User])
 def read_users(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = None,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Retrieve users.
+    Retrieve users, by id. Pages continue after `after_id`, or from the `cursor`
+    returned in the X-Next-Cursor header of the previous page.
     """
-    users = crud.user.get_multi(db, skip=skip, limit=limit)
-    return users
+    check_skip(skip, cursor, after_id)
+    users = crud.user.get_multi(db, skip=skip, limit=limit, after_id=cursor_after_id(cursor, after_id))
+    set_next_cursor(response, users, limit)
+    return list_response(response, users, schemas.User)
 
 
 @router.post("/", response_model=schemas.User)
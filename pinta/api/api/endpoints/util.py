@@ -1,22 +1,36 @@
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
 from fastapi import HTTPException, WebSocket
-from kubernetes.client.rest import ApiException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from kubernetes_asyncio.client.rest import ApiException
+from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
 
 from pinta.api import crud, models
 from pinta.api.api import deps
 from pinta.api.core.config import settings
-from pinta.api.kubernetes.job import get_vcjob
+from pinta.api.core.events import public_event
+from pinta.api.kubernetes.aio.job import get_vcjob, list_vcjobs
+from pinta.api.kubernetes.archive import LogArchive, archive_job_logs, open_archive
+from pinta.api.kubernetes.informer import vcjob_informer
+from pinta.api.kubernetes.job import phase_to_status, vcjob_id, vcjob_phase
+from pinta.api.kubernetes.logs import merge_log_lines
+from pinta.api.kubernetes.policy import UNAVAILABLE, is_transient
+from pinta.api.kubernetes.reconciler import job_status_reconciler
 
 
-def patch_job_volumes(db: Session, volumes_in: str, current_user_id: int):
+async def patch_job_volumes(db: AsyncSession, volumes_in: str, current_user_id: int):
+    volumes_str = [volume_str.strip() for volume_str in volumes_in.split(",") if volume_str.strip() != ""]
+    volumes = await crud.aio.volume.get_multi_by_owner_and_name(db, current_user_id=current_user_id,
+                                                                owners_and_names=volumes_str)
     volumes_out = []
-    volumes_str = volumes_in.split(",")
     for volume_str in volumes_str:
-        volume_str = volume_str.strip()
-        if volume_str == "":
-            continue
-        volume = crud.volume.get_by_owner_and_name(db, current_user_id=current_user_id, owner_and_name=volume_str)
+        volume = volumes.get(volume_str)
         if not volume:
             raise HTTPException(status_code=404, detail=f"Volume {volume_str} does not exist")
         volumes_out.append({
@@ -26,8 +40,8 @@ def patch_job_volumes(db: Session, volumes_in: str, current_user_id: int):
     return volumes_out
 
 
-def patch_job_image(db: Session, image_in: str, current_user: models.User):
-    image = crud.image.get_by_owner_and_name(db, current_user_id=current_user.id, owner_and_name=image_in)
+async def patch_job_image(db: AsyncSession, image_in: str, current_user: models.User):
+    image = await crud.aio.image.get_by_owner_and_name(db, current_user_id=current_user.id, owner_and_name=image_in)
     if not image:
         raise HTTPException(status_code=404, detail=f"Image {image_in} does not exist")
     if len(image_in.split("/")) == 1:
@@ -36,20 +50,308 @@ def patch_job_image(db: Session, image_in: str, current_user: models.User):
         return f"localhost:30007/{settings.REGISTRY_SERVER}/{image_in}"
 
 
-def patch_job_status(job: models.Job):
-    if job.scheduled:
-        try:
-            status = get_vcjob(job.id)["status"]["state"]["phase"]
-            if status == "Pending":
+def status_reconciled(job: models.Job) -> bool:
+    return job_status_reconciler.is_running() and job.status is not None
+
+
+def fallback_job_status(job: models.Job):
+    """
+    Status of a job while the API server is unavailable: from the last phase
+    the informer saw, else the last persisted status, else unknown.
+    """
+    phase = vcjob_informer.get_phase(job.id)
+    if phase is not None:
+        job.status = phase_to_status(phase)
+    elif job.status is None:
+        job.status = "unknown"
+
+
+def unlisted_job_status(job: models.Job, listed_at: datetime):
+    """
+    Status of a scheduled job that was not in a list of the Volcano jobs made
+    at `listed_at`: an error if the job was scheduled before, its Volcano job
+    is gone, else the Volcano job may not have been created yet.
+    """
+    if job.updated_at is None or job.updated_at < listed_at:
+        # As get_vcjob answering 404
+        job.status = "error"
+    else:
+        job.status = "scheduled"
+
+
+async def patch_job_status(job: models.Job):
+    if job.scheduled and not status_reconciled(job):
+        if vcjob_informer.has_synced():
+            # The informer sees every Volcano job, the API server would not know
+            # more about one it has no phase for
+            phase = vcjob_informer.get_phase(job.id)
+            if not vcjob_informer.has_job(job.id):
+                unlisted_job_status(job, vcjob_informer.synced_at())
+            elif phase is None:
+                # Volcano has not set a phase yet
                 job.status = "scheduled"
-            elif status == "Running":
-                job.status = "running"
-            elif status == "Completed":
-                job.status = "completed"
+            else:
+                job.status = phase_to_status(phase)
+            return
+        try:
+            phase = (await get_vcjob(job.id))["status"]["state"]["phase"]
+        except ApiException as e:
+            if is_transient(e):
+                fallback_job_status(job)
             else:
                 job.status = "error"
-        except ApiException:
-            job.status = "error"
+            return
+        except UNAVAILABLE:
+            fallback_job_status(job)
+            return
+        job.status = phase_to_status(phase)
+
+
+async def patch_jobs_status(jobs: List[models.Job]):
+    """
+    Batched patch_job_status for a page of jobs. Without a synced informer,
+    the phases are resolved with paged list calls, matched by job name, until
+    all jobs of the page are found.
+    """
+    scheduled = [job for job in jobs if job.scheduled and not status_reconciled(job)]
+    if not scheduled or vcjob_informer.has_synced():
+        for job in scheduled:
+            await patch_job_status(job)
+        return
+    ids = {job.id for job in scheduled}
+    phases = {}
+    listed_at = datetime.utcnow()
+    try:
+        _continue = None
+        while True:
+            api_response = await list_vcjobs(_continue=_continue)
+            for obj in api_response["items"]:
+                phases[vcjob_id(obj)] = vcjob_phase(obj)
+            _continue = api_response["metadata"].get("continue")
+            if not _continue or ids <= phases.keys():
+                break
+    except ApiException as e:
+        if is_transient(e):
+            # Looking the jobs up one by one would only wait longer
+            for job in scheduled:
+                fallback_job_status(job)
+        else:
+            for job in scheduled:
+                await patch_job_status(job)
+        return
+    except UNAVAILABLE:
+        for job in scheduled:
+            fallback_job_status(job)
+        return
+    for job in scheduled:
+        if job.id not in phases:
+            unlisted_job_status(job, listed_at)
+        elif phases[job.id] is None:
+            # Volcano has not set a phase yet
+            job.status = "scheduled"
+        else:
+            job.status = phase_to_status(phases[job.id])
+
+
+async def iter_bytes(data: bytes) -> AsyncIterator[bytes]:
+    if data:
+        yield data
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip, explicitly or through `*`,
+    with a non-zero q-value.
+    """
+    qvalues = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qvalues[coding.lower()] = q
+    q = qvalues.get("gzip", qvalues.get("x-gzip", qvalues.get("*", 0.0)))
+    return q > 0
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], flush: bool = False) -> AsyncIterator[bytes]:
+    """
+    Gzip an async byte stream on the fly. With `flush`, every chunk is
+    sync-flushed so that followed logs are not held back by the compressor.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if flush:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def try_archive_job_logs(job: models.Job):
+    """
+    Archive the logs of a job whose pods are about to be deleted. A failed
+    archive is logged but does not block the deletion.
+    """
+    if not settings.LOG_ARCHIVE:
+        return
+    try:
+        await archive_job_logs(job)
+    except Exception:
+        logging.exception(f"Failed to archive logs of job {job.id}")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte of a single-range `Range: bytes=...` header. Returns
+    None for a missing or unsupported header, which means the whole content.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    try:
+        if start == "":
+            first, last = size - int(end), size - 1
+        else:
+            first, last = int(start), min(int(end), size - 1) if end else size - 1
+            if end and int(end) < first:
+                # Syntactically invalid, the header is ignored
+                return None
+    except ValueError:
+        return None
+    first = max(first, 0)
+    if first >= size or last < first:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return first, last
+
+
+def _open_archive(job_log: models.JobLog) -> LogArchive:
+    try:
+        return open_archive(job_log)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Log archive missing")
+
+
+def archived_log_response(
+    job_logs: List[models.JobLog],
+    *,
+    role: str,
+    num: int,
+    container: Optional[str] = None,
+    merge: bool = False,
+    tail_lines: Optional[int] = None,
+    since_seconds: Optional[int] = None,
+    limit_bytes: Optional[int] = None,
+    timestamps: bool = False,
+    range_header: Optional[str] = None,
+    accept_encoding: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Serve a job log from its archive, with the same parameters as the live
+    log. A single pod's log also supports `Range` requests over the bytes it
+    would return.
+    """
+    job_logs = [job_log for job_log in job_logs if job_log.container == (container or "")]
+    params = dict(tail_lines=tail_lines, since_seconds=since_seconds, limit_bytes=limit_bytes)
+    gzip = accepts_gzip(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if merge:
+        sources = [(f"[{job_log.role}-{job_log.num}] ".encode(),
+                    _open_archive(job_log).iter_lines(timestamps=True, **params)) for job_log in job_logs]
+        content = merge_log_lines(sources, timestamps=timestamps)
+    else:
+        job_log = next((job_log for job_log in job_logs if job_log.role == role and job_log.num == num), None)
+        if not job_log:
+            raise HTTPException(status_code=404, detail="Log not found")
+        archive = _open_archive(job_log)
+        headers["Accept-Ranges"] = "bytes"
+        byte_range = parse_range(range_header, archive.size(timestamps))
+        if byte_range:
+            first, last = byte_range
+            content = archive.iter_range(first, last, timestamps=timestamps)
+            headers["Content-Range"] = f"bytes {first}-{last}/{archive.size(timestamps)}"
+            headers["Content-Length"] = str(last - first + 1)
+            return StreamingResponse(content, status_code=206, media_type="text/plain; charset=utf-8",
+                                     headers=headers)
+        if gzip and timestamps and all(value is None for value in params.values()):
+            # The stored segments already are the gzip encoding of this response
+            headers["Content-Encoding"] = "gzip"
+            return StreamingResponse(archive.iter_gzip(), media_type="text/plain; charset=utf-8", headers=headers)
+        content = archive.iter_lines(timestamps=timestamps, **params)
+    if gzip:
+        content = gzip_stream(content)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(content, media_type="text/plain; charset=utf-8", headers=headers)
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    Server-sent event stream that is stopped when the client disconnects.
+    Starlette only notices a disconnect on the next write, and uvicorn drops
+    writes to a closed connection silently, so an idle stream would never end.
+    """
+    media_type = "text/event-stream"
+
+    async def __call__(self, scope, receive, send) -> None:
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        tasks = [asyncio.ensure_future(super().__call__(scope, receive, send)),
+                 asyncio.ensure_future(wait_disconnect())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self.body_iterator.aclose()
+
+
+async def sse_events(events: AsyncIterator[Optional[Tuple[int, dict]]]) -> AsyncIterator[bytes]:
+    """
+    Format job events for an event stream. Idle periods become comments so
+    that proxies keep the connection open.
+    """
+    async for item in events:
+        if item is None:
+            yield b": keepalive\n\n"
+            continue
+        event = public_event(*item)
+        yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+
+
+async def websocket_events(ws: WebSocket, events: AsyncIterator[Optional[Tuple[int, dict]]]):
+    """
+    Send job events as JSON messages until the client disconnects. Closes
+    the websocket if the subscription ends first.
+    """
+    async def send_events():
+        async for item in events:
+            if item is not None:
+                await ws.send_json(public_event(*item))
+        await ws.close()
+
+    async def wait_disconnect():
+        while (await ws.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.ensure_future(send_events()), asyncio.ensure_future(wait_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await events.aclose()
 
 
 # WebSocket interfaces
@@ -66,8 +368,8 @@ class Request:
         self.headers = Headers(auth)
 
 
-async def websocket_auth(db: Session, authorization: str) -> models.User:
+async def websocket_auth(db: AsyncSession, authorization: str) -> models.User:
     request = Request(authorization)
     param = await deps.reusable_oauth2(request)
-    current_user = deps.get_current_active_user(deps.get_current_user(db=db, token=param))
+    current_user = deps.get_current_active_user(await deps.get_current_user_async(db=db, token=param))
     return current_user
@@ -5,6 +5,8 @@ from pydantic.networks import EmailStr
 
 from pinta.api import models, schemas
 from pinta.api.api import deps
+from pinta.api.db.session import pool_stats
+from pinta.api.kubernetes import policy
 from pinta.api.utils import send_test_email
 
 router = APIRouter()
@@ -20,3 +22,15 @@ def test_email(
     """
     send_test_email(email_to=email_to)
     return {"msg": "Test email sent"}
+
+
+@router.get("/metrics")
+def read_metrics(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Internal metrics: connection pool usage and checkout wait times of the
+    sync and async database engines, circuit breaker state and retries of
+    Kubernetes calls.
+    """
+    return {"db_pools": pool_stats(), "kubernetes": policy.stats()}
@@ -1,51 +1,71 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from kubernetes.client.rest import ApiException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from kubernetes_asyncio.client.rest import ApiException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from pinta.api import crud, models, schemas
 from pinta.api.api import deps
-from pinta.api.kubernetes.volume import create_pvc, delete_pvc
+from pinta.api.api.etag import check_etag
+from pinta.api.api.pagination import check_skip, cursor_after_id, set_next_cursor
+from pinta.api.api.responses import list_response
+from pinta.api.core.config import settings
+from pinta.api.kubernetes.aio.volume import create_pvc, delete_pvc
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Volume])
 def read_volumes(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = None,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve volumes.
+    Retrieve volumes, by id. Pages continue after `after_id`, or from the `cursor`
+    returned in the X-Next-Cursor header of the previous page. Answers 304 if
+    none of the listed volumes changed since the ETag in If-None-Match.
     """
-    if crud.user.is_superuser(current_user):
-        volumes = crud.volume.get_multi(db, skip=skip, limit=limit)
+    check_skip(skip, cursor, after_id)
+    after_id = cursor_after_id(cursor, after_id)
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    not_modified = check_etag(request, response, owner_id, crud.volume.get_version(db, owner_id=owner_id))
+    if not_modified:
+        return not_modified
+    if owner_id is None:
+        volumes = crud.volume.get_multi(db, skip=skip, limit=limit, after_id=after_id)
     else:
         volumes = crud.volume.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+            db=db, owner_id=current_user.id, skip=skip, limit=limit, after_id=after_id
         )
-    return volumes
+    set_next_cursor(response, volumes, limit)
+    return list_response(response, volumes, schemas.Volume)
 
 
 @router.post("/", response_model=schemas.Volume)
-def create_volume(
+async def create_volume(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     volume_in: schemas.VolumeCreate,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Create new volume.
     """
-    volume = crud.volume.create_with_owner(db=db, obj_in=volume_in, owner_id=current_user.id)
+    if await crud.aio.volume.get_by_owner_and_name(db, current_user_id=current_user.id, owner_and_name=volume_in.name):
+        raise HTTPException(status_code=400, detail="A volume with this name already exists")
+    volume = await crud.aio.volume.create_with_owner(db=db, obj_in=volume_in, owner_id=current_user.id)
     try:
-        create_pvc(volume)
+        await create_pvc(volume)
     except ApiException as e:
         print("Exception when calling CustomObjectsApi->create_cluster_custom_object: %s\n" % e)
-        volume = crud.volume.remove(db=db, id=volume.id)
+        volume = await crud.aio.volume.remove(db=db, id=volume.id)
         raise
     return volume
 
@@ -53,36 +73,38 @@ def create_volume(
 @router.get("/{id}", response_model=schemas.Volume)
 def read_volume(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get volume by ID.
+    Get volume by ID, or 304 if it did not change since the ETag in If-None-Match.
     """
     volume = crud.volume.get(db=db, id=id)
     if not volume:
         raise HTTPException(status_code=404, detail="Volume not found")
     if not crud.user.is_superuser(current_user) and (volume.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return volume
+    return check_etag(request, response, volume.id, volume.updated_at) or volume
 
 
 @router.delete("/{id}", response_model=schemas.Volume)
-def delete_volume(
+async def delete_volume(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     Delete a volume.
     """
-    volume = crud.volume.get(db=db, id=id)
+    volume = await crud.aio.volume.get(db=db, id=id)
     if not volume:
         raise HTTPException(status_code=404, detail="Volume not found")
     if not crud.user.is_superuser(current_user) and (volume.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    delete_pvc(volume)
-    volume = crud.volume.remove(db=db, id=id)
+    await delete_pvc(volume)
+    volume = await crud.aio.volume.remove(db=db, id=id)
     return volume
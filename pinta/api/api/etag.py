@@ -0,0 +1,35 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag of the values a response is derived from.
+    """
+    data = json.dumps(parts, default=str, separators=(",", ":")).encode()
+    return 'W/"' + hashlib.sha1(data).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    # Weak comparison, a W/ prefix is ignored on both sides
+    tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag[2:] in tags
+
+
+def check_etag(request: Request, response: Response, *parts: Any) -> Optional[Response]:
+    """
+    Set the ETag derived from `parts` and the query string on the response.
+    Returns a 304 response to answer with instead if the client already has
+    this version, before any row is serialized.
+    """
+    etag = make_etag(request.url.query, *parts)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,45 @@
+import base64
+import json
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(**values: Any) -> str:
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, dict) or not isinstance(values.get("id"), int):
+            raise ValueError(cursor)
+        return values
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def check_skip(skip: int, cursor: Optional[str], after_id: Optional[int]) -> None:
+    """
+    `skip` only pages by offset, it cannot be combined with a page position.
+    """
+    if skip and (cursor is not None or after_id is not None):
+        raise HTTPException(status_code=400, detail="skip cannot be combined with cursor or after_id")
+
+
+def cursor_after_id(cursor: Optional[str], after_id: Optional[int]) -> Optional[int]:
+    """
+    Id to continue after, from an opaque cursor or a plain `after_id`.
+    """
+    return decode_cursor(cursor)["id"] if cursor is not None else after_id
+
+
+def set_next_cursor(response: Response, items: List[Any], limit: int, **values: Any) -> None:
+    """
+    Return the cursor of the next page in a header, if the page is full.
+    """
+    if items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(id=items[-1].id, **values)
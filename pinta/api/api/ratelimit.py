@@ -0,0 +1,95 @@
+import math
+import re
+import time
+from typing import List, Optional, Pattern, Tuple
+
+from jose import jwt
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from pinta.api.core import security
+from pinta.api.core.cache import TTLCache, user_cache
+from pinta.api.core.config import settings
+
+
+class TokenBucket:
+    """
+    Token buckets of one route group, one per key. A bucket left alone long
+    enough to refill is dropped, it would start full anyway.
+    """
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = TTLCache(max_keys, burst / rate)
+
+    def take(self, key: str) -> float:
+        """
+        Take a token for `key`. Returns 0 if there was one, otherwise the
+        seconds until there is.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        tokens = self.burst if bucket is None else min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        if tokens < 1:
+            return (1 - tokens) / self.rate
+        self._buckets.set(key, (tokens - 1, now))
+        return 0.0
+
+
+def request_key(scope: Scope) -> str:
+    """
+    Who a request counts against: the user of a valid bearer token, else the
+    client address. An invalid token cannot spend another user's tokens.
+    """
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user_id = user_cache.tokens.get(token)
+        if user_id is None:
+            try:
+                user_id = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]).get("sub")
+            except jwt.JWTError:
+                user_id = None
+        if user_id is not None:
+            return f"user:{user_id}"
+    client = scope.get("client")
+    return f"addr:{client[0] if client else ''}"
+
+
+class RateLimitMiddleware:
+    """
+    Per-user rate limits of HTTP requests by route group, configured with
+    RATE_LIMITS and RATE_LIMIT_ROUTES. Requests over the limit are answered
+    with 429 and a Retry-After before reaching the endpoint.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.groups = {
+            group: TokenBucket(rate, burst, settings.RATE_LIMIT_MAX_KEYS)
+            for group, (rate, burst) in settings.RATE_LIMITS.items()
+        }
+        self.routes: List[Tuple[Pattern, str]] = [
+            (re.compile(pattern), group)
+            for pattern, group in settings.RATE_LIMIT_ROUTES.items() if group in self.groups
+        ]
+
+    def group(self, method: str, path: str) -> Optional[TokenBucket]:
+        if not path.startswith(settings.API_STR):
+            return None
+        route = f"{method} {path[len(settings.API_STR):]}"
+        for pattern, group in self.routes:
+            if pattern.search(route):
+                return self.groups[group]
+        return self.groups.get("default")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        bucket = self.group(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if bucket is not None:
+            retry_after = bucket.take(request_key(scope))
+            if retry_after:
+                response = JSONResponse(status_code=429, content={"detail": "Too many requests"},
+                                        headers={"Retry-After": str(math.ceil(retry_after))})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
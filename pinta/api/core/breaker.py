@@ -0,0 +1,86 @@
+import threading
+import time
+
+from pinta.api.core.metrics import Counter
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} unavailable, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency. After `failures` consecutive failures
+    calls fail fast with CircuitOpenError for `reset_seconds`, then a single
+    trial call decides whether it closes again or stays open.
+
+    Shared by the threads of sync endpoints and the event loop.
+    """
+    def __init__(self, name: str, failures: int, reset_seconds: float):
+        self.name = name
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        self.opened = Counter()
+        self.rejected = Counter()
+
+    def before_call(self) -> None:
+        """
+        Raises CircuitOpenError if the call must not be made.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_seconds - time.monotonic()
+                if remaining > 0:
+                    self.rejected.inc()
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = HALF_OPEN
+                self._trial = False
+            if self.state == HALF_OPEN:
+                if self._trial:
+                    self.rejected.inc()
+                    raise CircuitOpenError(self.name, self.reset_seconds)
+                self._trial = True
+
+    def abandon(self) -> None:
+        """
+        The call was cancelled before it told anything about the dependency.
+        """
+        with self._lock:
+            self._trial = False
+
+    def success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self.state = CLOSED
+
+    def failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._consecutive >= self.failures):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self.opened.inc()
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == OPEN and self._opened_at + self.reset_seconds > time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state, consecutive = self.state, self._consecutive
+        return dict(state=state,
+                    consecutive_failures=consecutive,
+                    opened=self.opened.value,
+                    rejected=self.rejected.value)
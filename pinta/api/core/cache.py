@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from pinta.api.core.config import settings
+
+# Columns of a user kept in memory, everything but the password hash
+USER_SNAPSHOT_FIELDS = ("id", "username", "full_name", "email", "is_active", "is_superuser")
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire, evicting the least recently used
+    entry when it is full. Safe to share between the threads of the pool that
+    runs sync endpoints.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class UserCache:
+    """
+    Verified access tokens and snapshots of their users, so that authenticating
+    a request is a lookup instead of a JWT verification and a SELECT.
+
+    Changes made through CRUDUser drop the user's snapshot in this process.
+    Other processes serve the old snapshot for at most AUTH_CACHE_TTL_SECONDS.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        # token -> user id, user id -> snapshot
+        self.tokens = TTLCache(maxsize, ttl)
+        self.users = TTLCache(maxsize, ttl)
+        # Bumped by every invalidation, a snapshot read before it is not stored
+        self.generation = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        user_id = self.tokens.get(token)
+        return None if user_id is None else self.users.get(user_id)
+
+    def set(self, token: str, user: Any, *, expires_at: Optional[float], generation: int) -> None:
+        if generation != self.generation:
+            return
+        ttl = None if expires_at is None else expires_at - time.time()
+        if ttl is not None and ttl <= 0:
+            return
+        self.tokens.set(token, user.id, ttl)
+        self.users.set(user.id, {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS})
+
+    def invalidate(self, user_id: int) -> None:
+        self.generation += 1
+        self.users.pop(user_id)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.tokens.clear()
+        self.users.clear()
+
+
+user_cache = UserCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
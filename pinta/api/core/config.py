@@ -1,5 +1,5 @@
 import secrets
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from pydantic import AnyHttpUrl, BaseSettings, EmailStr, HttpUrl, PostgresDsn, validator
 
@@ -7,8 +7,28 @@ from pydantic import AnyHttpUrl, BaseSettings, EmailStr, HttpUrl, PostgresDsn, v
 class Settings(BaseSettings):
     API_STR: str = "/api"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Access tokens are short-lived, clients renew them at /login/refresh
+    # with a refresh token until it expires
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 30
+    # Verified tokens and their users kept in memory, a size of 0 disables it
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    BCRYPT_ROUNDS: int = 12
+    # bcrypt runs on this many processes, 0 runs it on the request's thread
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hashes in flight before logins are answered with 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Token bucket per user and route group, as [requests per second, burst].
+    # Requests are grouped by the first RATE_LIMIT_ROUTES regex matching
+    # "METHOD /path" below API_STR, unmatched ones fall in the "default"
+    # group if there is one. An empty RATE_LIMITS disables rate limiting
+    RATE_LIMITS: Dict[str, Tuple[float, int]] = {"job": (5.0, 20), "job_log": (2.0, 10)}
+    RATE_LIMIT_ROUTES: Dict[str, str] = {
+        r"^GET /jobs/\d+/log$": "job_log",
+        r"^GET /jobs/\d+$": "job",
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000
     PROJECT_NAME: str
     POSTGRES_SERVER: str
     POSTGRES_USER: str
@@ -30,6 +50,31 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
+        if isinstance(v, str):
+            return v
+        uri = values.get("SQLALCHEMY_DATABASE_URI")
+        if not uri:
+            return None
+        # Same database through the asyncpg driver
+        return "postgresql+asyncpg" + uri[uri.index("://"):]
+
+    # Per engine, the sync and the async engine each have a pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    # 0 disables the limit
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Serialize list responses with orjson, skipping response_model validation
+    FAST_JSON_RESPONSES: bool = False
+    # Largest page of the list endpoints, a page is held in memory to be answered
+    LIST_MAX_LIMIT: int = 1000
+
     # SMTP_TLS: bool = True
     # SMTP_PORT: Optional[int] = None
     # SMTP_HOST: Optional[str] = None
@@ -64,6 +109,45 @@ class Settings(BaseSettings):
     USERS_OPEN_REGISTRATION: bool = False
 
     K8S_DEBUG: bool = False
+    K8S_CONNECTION_POOL_MAXSIZE: int = 32
+    K8S_CONFIG_RELOAD_SECONDS: int = 60
+    K8S_JOB_INFORMER: bool = True
+    K8S_INFORMER_RESYNC_SECONDS: int = 300
+    K8S_INFORMER_WATCH_TIMEOUT_SECONDS: int = 60
+    K8S_STATUS_RECONCILER: bool = True
+    K8S_STATUS_RECONCILE_SECONDS: float = 1.0
+    # [connect, read] timeouts of Kubernetes calls in seconds, per helper
+    # in K8S_TIMEOUTS and K8S_TIMEOUT for the others
+    K8S_TIMEOUT: Tuple[float, float] = (5.0, 30.0)
+    K8S_TIMEOUTS: Dict[str, Tuple[float, float]] = {"list_vcjobs": (5.0, 60.0)}
+    # Items per page of list calls
+    K8S_LIST_PAGE_SIZE: int = 500
+    # Reads are retried on timeouts, connection errors, 429 and 5xx, writes
+    # only on 429. Waits are jittered and grow exponentially up to the max
+    K8S_RETRY_ATTEMPTS: int = 3
+    K8S_RETRY_MAX_WAIT_SECONDS: float = 2.0
+    # Consecutive failures after which calls fail fast for K8S_BREAKER_RESET_SECONDS
+    K8S_BREAKER_FAILURES: int = 5
+    K8S_BREAKER_RESET_SECONDS: float = 30.0
+
+    JOB_BATCH_MAX_SIZE: int = 1000
+    JOB_BATCH_CONCURRENCY: int = 16
+    JOB_EVENT_LOG_SIZE: int = 1000
+    JOB_EVENT_QUEUE_SIZE: int = 256
+    JOB_EVENT_HEARTBEAT_SECONDS: float = 15.0
+
+    LOG_FOLLOW_TAIL_LINES: int = 100
+    LOG_SUBSCRIBER_QUEUE_SIZE: int = 4096
+    LOG_MERGE_IDLE_SECONDS: float = 0.5
+    LOG_ARCHIVE: bool = True
+    LOG_ARCHIVE_DIR: str = "/var/lib/pinta/logs"
+    LOG_ARCHIVE_SEGMENT_BYTES: int = 4194304
+    LOG_ARCHIVE_CONCURRENCY: int = 4
+
+    WS_PROXY_BUFFER_BYTES: int = 1048576
+    WS_PROXY_FLUSH_INTERVAL: float = 0.01
+    WS_PROXY_FRAME_BYTES: int = 65536
+    WS_PERMESSAGE_DEFLATE: bool = False
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional, Set, Tuple
+
+from pinta.api.core.config import settings
+
+# Sent instead of a replay when the requested events are no longer in the log
+RESET = {"type": "reset"}
+
+
+class _Subscriber:
+    def __init__(self, owner_id: Optional[int], size: int):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+
+    def wants(self, event: dict) -> bool:
+        return self.owner_id is None or event["owner_id"] == self.owner_id
+
+
+class JobEventBus:
+    """
+    Fan-out of job status changes to event stream subscribers, with a
+    bounded log of recent events to resume from.
+
+    Event ids start from the wall clock in milliseconds, so an id from
+    before a restart is older than every id after it and resuming from it
+    yields a reset rather than the wrong events.
+    """
+    def __init__(self, log_size: int = 1000, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._log: Deque[Tuple[int, dict]] = deque(maxlen=log_size)
+        self._next_id = int(time.time() * 1000)
+        self._subscribers: Set[_Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def publish_threadsafe(self, events: List[dict]) -> None:
+        """
+        Publish from another thread. Dropped if the bus is not bound to a loop.
+        """
+        if self._loop is not None and events:
+            self._loop.call_soon_threadsafe(self.publish, events)
+
+    def publish(self, events: List[dict]) -> None:
+        for event in events:
+            event_id = self._next_id
+            self._next_id += 1
+            self._log.append((event_id, event))
+            for subscriber in list(self._subscribers):
+                if not subscriber.wants(event):
+                    continue
+                try:
+                    subscriber.queue.put_nowait((event_id, event))
+                except asyncio.QueueFull:
+                    # Too slow to keep up, it can resume from the log
+                    self._subscribers.discard(subscriber)
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    subscriber.queue.put_nowait(None)
+
+    def _replay(self, subscriber: _Subscriber, last_event_id: int) -> List[Tuple[int, dict]]:
+        oldest = self._log[0][0] if self._log else self._next_id
+        if last_event_id < oldest - 1 or last_event_id >= self._next_id:
+            return [(self._next_id - 1, RESET)]
+        return [(event_id, event) for event_id, event in self._log
+                if event_id > last_event_id and subscriber.wants(event)]
+
+    async def subscribe(
+        self,
+        owner_id: Optional[int] = None,
+        last_event_id: Optional[int] = None,
+        heartbeat: Optional[float] = None
+    ) -> AsyncIterator[Optional[Tuple[int, dict]]]:
+        """
+        Yield (event id, event) for the jobs of `owner_id`, or of everyone,
+        starting after `last_event_id`. Yields None after `heartbeat` idle
+        seconds, and ends if the subscriber falls too far behind.
+        """
+        subscriber = _Subscriber(owner_id, self.queue_size)
+        # Taken together with joining so no event is missed or repeated
+        replay = self._replay(subscriber, last_event_id) if last_event_id is not None else []
+        self._subscribers.add(subscriber)
+        getter = None
+        try:
+            for item in replay:
+                yield item
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(subscriber.queue.get())
+                done, _ = await asyncio.wait([getter], timeout=heartbeat)
+                if not done:
+                    yield None
+                    continue
+                item, getter = getter.result(), None
+                if item is None:
+                    break
+                yield item
+        finally:
+            if getter is not None:
+                getter.cancel()
+            self._subscribers.discard(subscriber)
+
+
+def public_event(event_id: int, event: dict) -> dict:
+    """
+    Event as sent to clients.
+    """
+    if event is RESET:
+        return dict(id=event_id, type="reset")
+    return dict(id=event_id, type="status", **{key: value for key, value in event.items() if key != "owner_id"})
+
+
+job_event_bus = JobEventBus(log_size=settings.JOB_EVENT_LOG_SIZE, queue_size=settings.JOB_EVENT_QUEUE_SIZE)
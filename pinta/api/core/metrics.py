@@ -0,0 +1,64 @@
+import bisect
+import threading
+from typing import List, Sequence
+
+# Seconds, from an idle connection to a full pool timing out
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Fixed bucket histogram, reported Prometheus style with cumulative counts.
+    """
+    def __init__(self, buckets: Sequence[float] = WAIT_BUCKETS):
+        self.buckets = list(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative: List[int] = []
+        for count in counts:
+            cumulative.append((cumulative[-1] if cumulative else 0) + count)
+        return dict(
+            buckets=[dict(le=le, count=count) for le, count in zip(self.buckets + ["+Inf"], cumulative)],
+            count=cumulative[-1],
+            sum=total,
+        )
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+class PoolMetrics:
+    """
+    Cumulative statistics of a connection pool: time spent waiting for a
+    connection, connections opened past the pool size and checkouts that
+    timed out.
+    """
+    def __init__(self):
+        self.checkouts = Counter()
+        self.overflows = Counter()
+        self.timeouts = Counter()
+        self.wait = Histogram()
+
+    def snapshot(self) -> dict:
+        return dict(checkouts=self.checkouts.value,
+                    overflows=self.overflows.value,
+                    timeouts=self.timeouts.value,
+                    wait_seconds=self.wait.snapshot())
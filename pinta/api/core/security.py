@@ -1,16 +1,31 @@
+import asyncio
+import hashlib
+import multiprocessing
+import secrets
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from pinta.api.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost are replaced on the next successful login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 ALGORITHM = "HS256"
 
 
+def create_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
 ) -> str:
@@ -25,9 +40,104 @@ def create_access_token(
     return encoded_jwt
 
 
+class PasswordHashingBusy(Exception):
+    """
+    Too many password hashes are already queued, answered with a 503.
+    """
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated process pool, so that a burst of logins
+    neither occupies the threads serving other requests nor queues up
+    without bound. Past `max_pending` hashes in flight, new ones fail at once
+    with PasswordHashingBusy. With 0 workers, hashes run in the calling thread,
+    or the default executor for async callers.
+    """
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                # Not forked, the API process runs threads
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn: Callable, *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHashingBusy()
+            self._pending += 1
+        if self.workers > 0:
+            self.start()
+            try:
+                future = self._executor.submit(fn, *args)
+            except Exception:
+                self._done(None)
+                raise
+        else:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, fn: Callable, *args: Any) -> Any:
+        return self._submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args: Any) -> Any:
+        if self.workers > 0:
+            return await asyncio.wrap_future(self._submit(fn, *args))
+        # No pool, still keep bcrypt off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self.run, fn, *args)
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Whether the password matches, and a new hash if the stored one should be
+    replaced, e.g. after BCRYPT_ROUNDS changed.
+    """
+    return password_hasher.run(_verify_and_update, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await password_hasher.run_async(_verify_and_update, plain_password, hashed_password)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.run(_hash, password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run_async(_hash, password)
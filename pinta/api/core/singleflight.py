@@ -0,0 +1,36 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    At most one call per key in flight. Callers asking for a key while its
+    call runs wait for that call and share its result or exception. Nothing
+    is cached, a call for the key once it finished goes upstream again.
+
+    The result is the same object for every caller, so it must not be
+    mutated.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._done(key, done))
+        # A caller going away does not cancel the call for the others
+        return await asyncio.shield(call)
+
+    def _done(self, key: Hashable, call: "asyncio.Future") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Retrieved even if every caller went away, no "never retrieved" warning
+        if not call.cancelled():
+            call.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
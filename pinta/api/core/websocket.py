@@ -0,0 +1,13 @@
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+
+
+class DeflateWebSocketProtocol(WebSocketProtocol):
+    """
+    uvicorn's websockets protocol with permessage-deflate offered to clients.
+    uvicorn builds the protocol without extensions, so they are set after
+    the fact, before the handshake reads them.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.available_extensions = [ServerPerMessageDeflateFactory()]
@@ -2,3 +2,6 @@ from .crud_user import user
 from .crud_job import job
 from .crud_volume import volume
 from .crud_image import image
+from .crud_job_log import job_log
+from .crud_refresh_token import refresh_token
+from . import aio
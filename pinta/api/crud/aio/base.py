@@ -0,0 +1,91 @@
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, Union
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pinta.api.crud.base import CreateSchemaType, ModelType, UpdateSchemaType, attach, removed, set_loaded
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        CRUD object with default methods to Create, Read, Update, Delete (CRUD),
+        on an AsyncSession. Mirrors `pinta.api.crud.base.CRUDBase`.
+
+        **Parameters**
+
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+        self.columns = frozenset(column.key for column in model.__table__.columns)
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        return await db.get(self.model, id)
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+    ) -> List[ModelType]:
+        query = select(self.model)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        result = await db.execute(query.order_by(self.model.id).offset(skip).limit(limit))
+        return result.scalars().all()
+
+    async def get_version(self, db: AsyncSession, *, owner_id: Optional[int] = None) -> Tuple[Any, ...]:
+        """
+        See `CRUDBase.get_version`.
+        """
+        query = select(func.count(self.model.id), func.max(self.model.id), func.max(self.model.updated_at))
+        if owner_id is not None:
+            query = query.where(self.model.owner_id == owner_id)
+        return tuple((await db.execute(query)).one())
+
+    async def _insert(self, db: AsyncSession, values: Dict[str, Any]) -> ModelType:
+        return (await self._insert_multi(db, [values]))[0]
+
+    async def _insert_multi(
+        self, db: AsyncSession, rows: List[Dict[str, Any]], commit: bool = True
+    ) -> List[ModelType]:
+        """
+        See `CRUDBase._insert_multi`.
+        """
+        if not rows:
+            return []
+        result = await db.execute(insert(self.model.__table__).values(rows).returning(*self.model.__table__.columns))
+        mappings = result.mappings().all()
+        if commit:
+            await db.commit()
+        return [attach(db, self.model, mapping) for mapping in mappings]
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = jsonable_encoder(obj_in)
+        return await self._insert(db, obj_in_data)
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        values = {field: value for field, value in update_data.items() if field in self.columns}
+        if not values:
+            return db_obj
+        table = self.model.__table__
+        result = await db.execute(update(table).where(table.c.id == db_obj.id).values(values).returning(*table.columns))
+        mapping = result.mappings().first()
+        await db.commit()
+        set_loaded(db_obj, mapping)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        table = self.model.__table__
+        result = await db.execute(delete(table).where(table.c.id == id).returning(*table.columns))
+        obj = removed(db, self.model, result.mappings().first())
+        await db.commit()
+        return obj
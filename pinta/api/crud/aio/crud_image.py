@@ -0,0 +1,39 @@
+from typing import Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pinta.api.crud.aio.base import AsyncCRUDBase
+from pinta.api.crud.base import match_owner_and_name, owner_and_name_query
+from pinta.api.models.image import Image
+from pinta.api.schemas.image import ImageCreate, ImageUpdate
+
+
+class AsyncCRUDImage(AsyncCRUDBase[Image, ImageCreate, ImageUpdate]):
+    async def create_with_owner(
+        self, db: AsyncSession, *, obj_in: ImageCreate, owner_id: int
+    ) -> Image:
+        obj_in_data = jsonable_encoder(obj_in)
+        return await self._insert(db, dict(obj_in_data, owner_id=owner_id))
+
+    async def get_multi_by_owner_and_name(
+        self, db: AsyncSession, *, current_user_id: int, owners_and_names: List[str]
+    ) -> Dict[str, Image]:
+        """
+        See `CRUDImage.get_multi_by_owner_and_name`.
+        """
+        if not owners_and_names:
+            return {}
+        query = owner_and_name_query(self.model, current_user_id=current_user_id, owners_and_names=owners_and_names)
+        objs = (await db.execute(query)).scalars().all()
+        return match_owner_and_name(objs, current_user_id=current_user_id, owners_and_names=owners_and_names)
+
+    async def get_by_owner_and_name(
+        self, db: AsyncSession, *, current_user_id: int, owner_and_name: str
+    ) -> Optional[Image]:
+        return (await self.get_multi_by_owner_and_name(
+            db, current_user_id=current_user_id, owners_and_names=[owner_and_name]
+        )).get(owner_and_name)
+
+
+image = AsyncCRUDImage(Image)
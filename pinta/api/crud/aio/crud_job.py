@@ -0,0 +1,68 @@
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pinta.api.crud.aio.base import AsyncCRUDBase
+from pinta.api.crud.crud_job import CRUDJob, job_row
+from pinta.api.models.job import Job
+from pinta.api.schemas.job import JobCreate, JobUpdate, BaseSpec, JobOrder, JobStatus
+
+
+class AsyncCRUDJob(AsyncCRUDBase[Job, JobCreate, JobUpdate]):
+    order_key = staticmethod(CRUDJob.order_key)
+
+    async def create_with_owner(
+        self, db: AsyncSession, *, obj_in: BaseSpec, owner_id: int
+    ) -> Job:
+        return await self._insert(db, job_row(obj_in, owner_id))
+
+    async def create_multi_with_owner(
+        self, db: AsyncSession, *, objs_in: List[BaseSpec], owner_id: int
+    ) -> List[Job]:
+        """
+        Insert several jobs with a single INSERT ... RETURNING, without
+        committing, so the caller can still drop some or roll back.
+        """
+        return await self._insert_multi(db, [job_row(obj_in, owner_id) for obj_in in objs_in], commit=False)
+
+    async def remove_multi(self, db: AsyncSession, *, ids: List[int]) -> None:
+        """
+        Delete several jobs without committing.
+        """
+        await db.execute(delete(self.model).where(Job.id.in_(ids)).execution_options(synchronize_session=False))
+
+    async def get_multi_filtered(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: Optional[int] = None,
+        status: Optional[JobStatus] = None,
+        order_by: JobOrder = JobOrder.id,
+        descending: bool = False,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[Any, int]] = None
+    ) -> List[Job]:
+        """
+        See `CRUDJob.get_multi_filtered`.
+        """
+        query = select(self.model)
+        if owner_id is not None:
+            query = query.where(Job.owner_id == owner_id)
+        if status is not None:
+            query = query.where(Job.status == status)
+        column = getattr(Job, order_by.value)
+        if after is not None:
+            query = query.where(CRUDJob.after_filter(column, descending, *after))
+        if descending:
+            order = [column.desc().nullsfirst(), Job.id.desc()]
+        else:
+            order = [column.asc().nullslast(), Job.id.asc()]
+        if order_by == JobOrder.id:
+            order = order[1:]
+        result = await db.execute(query.order_by(*order).offset(skip).limit(limit))
+        return result.scalars().all()
+
+
+job = AsyncCRUDJob(Job)
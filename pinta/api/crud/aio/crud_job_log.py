@@ -0,0 +1,24 @@
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pinta.api.crud.aio.base import AsyncCRUDBase
+from pinta.api.models.job_log import JobLog
+from pinta.api.schemas.job_log import JobLogCreate, JobLogUpdate
+
+
+class AsyncCRUDJobLog(AsyncCRUDBase[JobLog, JobLogCreate, JobLogUpdate]):
+    async def get_multi_by_job(self, db: AsyncSession, *, job_id: int) -> List[JobLog]:
+        result = await db.execute(
+            select(self.model)
+            .where(JobLog.job_id == job_id)
+            .order_by(JobLog.role, JobLog.num)
+        )
+        return result.scalars().all()
+
+    async def create_multi(self, db: AsyncSession, *, objs_in: List[JobLogCreate]) -> List[JobLog]:
+        return await self._insert_multi(db, [obj_in.dict() for obj_in in objs_in])
+
+
+job_log = AsyncCRUDJobLog(JobLog)
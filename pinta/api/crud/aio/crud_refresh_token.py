@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pinta.api.core.security import create_refresh_token, hash_refresh_token
+from pinta.api.crud.aio.base import AsyncCRUDBase
+from pinta.api.crud.crud_refresh_token import refresh_token_row
+from pinta.api.models.refresh_token import RefreshToken
+from pinta.api.models.user import User
+from pinta.api.schemas.refresh_token import RefreshTokenCreate, RefreshTokenUpdate
+
+
+class AsyncCRUDRefreshToken(AsyncCRUDBase[RefreshToken, RefreshTokenCreate, RefreshTokenUpdate]):
+    async def create_for_user(self, db: AsyncSession, *, user_id: int) -> str:
+        """
+        See `CRUDRefreshToken.create_for_user`.
+        """
+        now = datetime.utcnow()
+        await db.execute(delete(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            or_(RefreshToken.expires_at <= now, RefreshToken.revoked_at.isnot(None))
+        ))
+        token = create_refresh_token()
+        await self._insert(db, refresh_token_row(user_id, token, now))
+        return token
+
+    async def get_user(self, db: AsyncSession, *, token: str) -> Optional[User]:
+        result = await db.execute(
+            select(User)
+            .join(RefreshToken, RefreshToken.user_id == User.id)
+            .where(RefreshToken.token_hash == hash_refresh_token(token),
+                   RefreshToken.revoked_at.is_(None),
+                   RefreshToken.expires_at > datetime.utcnow())
+        )
+        return result.scalars().first()
+
+    async def revoke(self, db: AsyncSession, *, token: str) -> bool:
+        result = await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == hash_refresh_token(token), RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def revoke_all(self, db: AsyncSession, *, user_id: int) -> None:
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+refresh_token = AsyncCRUDRefreshToken(RefreshToken)
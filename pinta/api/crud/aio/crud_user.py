@@ -0,0 +1,58 @@
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pinta.api.core.cache import user_cache
+from pinta.api.core.security import get_password_hash_async, verify_and_update_password_async
+from pinta.api.crud.aio.base import AsyncCRUDBase
+from pinta.api.crud.aio.crud_refresh_token import refresh_token
+from pinta.api.models.user import User
+from pinta.api.schemas.user import UserCreate, UserUpdate
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.username == username))
+        return result.scalars().first()
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        password_changed = bool(update_data.get("password"))
+        if password_changed:
+            hashed_password = await get_password_hash_async(update_data["password"])
+            del update_data["password"]
+            update_data["hashed_password"] = hashed_password
+        user = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        user_cache.invalidate(user.id)
+        if password_changed:
+            await refresh_token.revoke_all(db, user_id=user.id)
+        return user
+
+    async def authenticate(self, db: AsyncSession, *, username: str, password: str) -> Optional[User]:
+        user = await self.get_by_username(db, username=username)
+        if not user:
+            return None
+        # Do not hold a pooled connection while bcrypt runs
+        db.expunge(user)
+        await db.rollback()
+        valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            user = await self.update(db, db_obj=user, obj_in=dict(hashed_password=new_hash))
+        return user
+
+    def is_active(self, user: User) -> bool:
+        return user.is_active
+
+    def is_superuser(self, user: User) -> bool:
+        return user.is_superuser
+
+
+user = AsyncCRUDUser(User)
@@ -1,16 +1,106 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Mapping, Optional, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, false, func, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import Select
 
 from pinta.api.db.base_class import Base
+from pinta.api.models.user import User
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def split_owner_and_name(owner_and_name: str) -> Tuple[Optional[str], str]:
+    """
+    Split a `name` or `username/name` reference.
+    """
+    delim = owner_and_name.split("/", 1)
+    if len(delim) == 1:
+        return None, delim[0]
+    return delim[0], delim[1]
+
+
+def owner_and_name_query(model: Type[ModelType], *, current_user_id: int, owners_and_names: List[str]) -> Select:
+    """
+    One JOINed query for objects of a model with `owner` and `name` given as
+    `name` (owned by the current user) or `username/name` references. Objects
+    of other users are only found if they are public.
+    """
+    names = set()
+    pairs = set()
+    for owner_and_name in owners_and_names:
+        username, name = split_owner_and_name(owner_and_name)
+        if username is None:
+            names.add(name)
+        else:
+            pairs.add((username, name))
+    own = and_(model.owner_id == current_user_id, model.name.in_(names)) if names else false()
+    qualified = and_(tuple_(User.username, model.name).in_(pairs),
+                     or_(model.is_public.is_(True), model.owner_id == current_user_id)) if pairs else false()
+    return (
+        select(model)
+        .join(model.owner)
+        .options(contains_eager(model.owner))
+        .where(or_(own, qualified))
+    )
+
+
+def match_owner_and_name(objs: List[ModelType], *, current_user_id: int, owners_and_names: List[str]) -> Dict[str, ModelType]:
+    """
+    Map each reference of owner_and_name_query() to the object it names.
+    """
+    own = {obj.name: obj for obj in objs if obj.owner_id == current_user_id}
+    qualified = {(obj.owner.username, obj.name): obj for obj in objs}
+    found = {}
+    for owner_and_name in owners_and_names:
+        username, name = split_owner_and_name(owner_and_name)
+        obj = own.get(name) if username is None else qualified.get((username, name))
+        if obj is not None:
+            found[owner_and_name] = obj
+    return found
+
+
+def attach(db: Union[Session, AsyncSession], model: Type[ModelType], mapping: Mapping[str, Any]) -> ModelType:
+    """
+    Object for a row returned by a write, added to the session as if it had
+    been loaded by a query.
+    """
+    obj = model(**mapping)
+    make_transient_to_detached(obj)
+    db.add(obj)
+    return obj
+
+
+def set_loaded(db_obj: ModelType, mapping: Mapping[str, Any]) -> None:
+    """
+    Store the values returned by an UPDATE as the object's loaded state,
+    which also clears their expiry after the commit.
+    """
+    for key, value in mapping.items():
+        set_committed_value(db_obj, key, value)
+
+
+def removed(db: Union[Session, AsyncSession], model: Type[ModelType], mapping: Optional[Mapping[str, Any]]) -> Optional[ModelType]:
+    """
+    Detached copy of a row returned by a DELETE. An instance of it still in
+    the session is expunged before the commit, so that it keeps its loaded
+    values instead of being expired and refreshed from a missing row.
+    """
+    if mapping is None:
+        return None
+    stale = db.identity_map.get(identity_key(model, mapping["id"]))
+    if stale is not None:
+        db.expunge(stale)
+    return model(**mapping)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -22,22 +112,50 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        self.columns = frozenset(column.key for column in model.__table__.columns)
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        query = db.query(self.model)
+        if after_id is not None:
+            query = query.filter(self.model.id > after_id)
+        return query.order_by(self.model.id).offset(skip).limit(limit).all()
+
+    def get_version(self, db: Session, *, owner_id: Optional[int] = None) -> Tuple[Any, ...]:
+        """
+        Row count, largest id and latest updated_at of all objects, or of the
+        objects of an owner. Changes with every insert, update and delete, so
+        it identifies a version of the collection. Only for models with an
+        updated_at column.
+        """
+        query = db.query(func.count(self.model.id), func.max(self.model.id), func.max(self.model.updated_at))
+        if owner_id is not None:
+            query = query.filter(self.model.owner_id == owner_id)
+        return tuple(query.one())
+
+    def _insert(self, db: Session, values: Dict[str, Any]) -> ModelType:
+        return self._insert_multi(db, [values])[0]
+
+    def _insert_multi(self, db: Session, rows: List[Dict[str, Any]], commit: bool = True) -> List[ModelType]:
+        """
+        INSERT ... RETURNING, and commit. The returned objects are attached to
+        the session as loaded, so reading them needs no refresh.
+        """
+        if not rows:
+            return []
+        result = db.execute(insert(self.model.__table__).values(rows).returning(*self.model.__table__.columns))
+        mappings = result.mappings().all()
+        if commit:
+            db.commit()
+        return [attach(db, self.model, mapping) for mapping in mappings]
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self._insert(db, obj_in_data)
 
     def update(
         self,
@@ -46,21 +164,23 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        values = {field: value for field, value in update_data.items() if field in self.columns}
+        if not values:
+            return db_obj
+        table = self.model.__table__
+        result = db.execute(update(table).where(table.c.id == db_obj.id).values(values).returning(*table.columns))
+        mapping = result.mappings().first()
         db.commit()
-        db.refresh(db_obj)
+        set_loaded(db_obj, mapping)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
+    def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
+        table = self.model.__table__
+        mapping = db.execute(delete(table).where(table.c.id == id).returning(*table.columns)).mappings().first()
+        obj = removed(db, self.model, mapping)
         db.commit()
         return obj
@@ -1,33 +1,120 @@
-from typing import List
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
 
-from fastapi.encoders import jsonable_encoder
+from sqlalchemy import DateTime, and_, or_
 from sqlalchemy.orm import Session
 
 from pinta.api.crud.base import CRUDBase
 from pinta.api.models.job import Job
-from pinta.api.schemas.job import JobCreate, JobUpdate, BaseSpec, PSWorkerJob, MPIJob, ImageBuilderJob
+from pinta.api.schemas.job import JobCreate, JobUpdate, BaseSpec, PSWorkerJob, MPIJob, ImageBuilderJob, JobOrder, JobStatus
+
+
+def job_row(obj_in: BaseSpec, owner_id: int) -> dict:
+    return dict(name=obj_in.name, description=obj_in.description, type=obj_in.type, image=obj_in.image,
+                volumes=obj_in.volumes, working_dir=obj_in.working_dir,
+                master_command=obj_in.master_command, num_masters=obj_in.num_masters,
+                replica_command=obj_in.replica_command, num_replicas=obj_in.num_replicas,
+                ports=obj_in.ports, scheduled=obj_in.scheduled, owner_id=owner_id)
 
 
 class CRUDJob(CRUDBase[Job, JobCreate, JobUpdate]):
     def create_with_owner(
         self, db: Session, *, obj_in: BaseSpec, owner_id: int
     ) -> Job:
-        db_obj = Job(name=obj_in.name, description=obj_in.description, type=obj_in.type, image=obj_in.image,
-                     volumes=obj_in.volumes, working_dir=obj_in.working_dir,
-                     master_command=obj_in.master_command, num_masters=obj_in.num_masters,
-                     replica_command=obj_in.replica_command, num_replicas=obj_in.num_replicas,
-                     ports=obj_in.ports, scheduled=obj_in.scheduled, owner_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self._insert(db, job_row(obj_in, owner_id))
+
+    def create_multi_with_owner(
+        self, db: Session, *, objs_in: List[BaseSpec], owner_id: int
+    ) -> List[Job]:
+        """
+        Insert several jobs with a single INSERT ... RETURNING, without
+        committing, so the caller can still drop some or roll back.
+        """
+        return self._insert_multi(db, [job_row(obj_in, owner_id) for obj_in in objs_in], commit=False)
+
+    def remove_multi(self, db: Session, *, ids: List[int]) -> None:
+        """
+        Delete several jobs without committing.
+        """
+        db.query(self.model).filter(Job.id.in_(ids)).delete(synchronize_session=False)
+
+    def get_multi_filtered(
+        self,
+        db: Session,
+        *,
+        owner_id: Optional[int] = None,
+        status: Optional[JobStatus] = None,
+        order_by: JobOrder = JobOrder.id,
+        descending: bool = False,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[Any, int]] = None
+    ) -> List[Job]:
+        """
+        Jobs in `order_by` order, then by id. `after` is the (order key, id)
+        of the last job of the previous page, as returned by order_key().
+        """
+        query = db.query(self.model)
+        if owner_id is not None:
+            query = query.filter(Job.owner_id == owner_id)
+        if status is not None:
+            query = query.filter(Job.status == status)
+        column = getattr(Job, order_by.value)
+        if after is not None:
+            query = query.filter(self.after_filter(column, descending, *after))
+        # Explicit so that the keyset condition and the order always agree on NULLs
+        if descending:
+            order = [column.desc().nullsfirst(), Job.id.desc()]
+        else:
+            order = [column.asc().nullslast(), Job.id.asc()]
+        if order_by == JobOrder.id:
+            order = order[1:]
+        return query.order_by(*order).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def order_key(job: Job, order_by: JobOrder) -> Any:
+        """
+        JSON serializable value of the order column of a job.
+        """
+        value = getattr(job, order_by.value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, JobStatus):
+            return value.value
+        return value
+
+    @staticmethod
+    def after_filter(column, descending: bool, key: Any, id: int):
+        if column is Job.id:
+            return Job.id < id if descending else Job.id > id
+        if key is not None:
+            # Every other order column is keyed by a string, see order_key()
+            if not isinstance(key, str):
+                raise ValueError(f"Invalid key for {column.key}: {key!r}")
+            if isinstance(column.type, DateTime):
+                key = datetime.fromisoformat(key)
+            elif column is Job.status:
+                key = JobStatus(key)
+        same = and_(column == key, Job.id < id if descending else Job.id > id)
+        if descending:
+            # NULLs first, then keys descending
+            if key is None:
+                return or_(and_(column.is_(None), Job.id < id), column.isnot(None))
+            return or_(column < key, same)
+        # Keys ascending, then NULLs
+        if key is None:
+            return and_(column.is_(None), Job.id > id)
+        return or_(column > key, same, column.is_(None))
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
     ) -> List[Job]:
+        query = db.query(self.model).filter(Job.owner_id == owner_id)
+        if after_id is not None:
+            query = query.filter(Job.id > after_id)
         return (
-            db.query(self.model)
-            .filter(Job.owner_id == owner_id)
+            query
+            .order_by(Job.id)
             .offset(skip)
             .limit(limit)
             .all()
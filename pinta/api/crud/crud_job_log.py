@@ -0,0 +1,32 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from pinta.api.crud.base import CRUDBase
+from pinta.api.models.job_log import JobLog
+from pinta.api.schemas.job_log import JobLogCreate, JobLogUpdate
+
+
+class CRUDJobLog(CRUDBase[JobLog, JobLogCreate, JobLogUpdate]):
+    def get_multi_by_job(self, db: Session, *, job_id: int) -> List[JobLog]:
+        return (
+            db.query(self.model)
+            .filter(JobLog.job_id == job_id)
+            .order_by(JobLog.role, JobLog.num)
+            .all()
+        )
+
+    def get_by_pod(
+        self, db: Session, *, job_id: int, role: str, num: int, container: str = ""
+    ) -> Optional[JobLog]:
+        return (
+            db.query(self.model)
+            .filter(JobLog.job_id == job_id, JobLog.role == role, JobLog.num == num, JobLog.container == container)
+            .first()
+        )
+
+    def create_multi(self, db: Session, *, objs_in: List[JobLogCreate]) -> List[JobLog]:
+        return self._insert_multi(db, [obj_in.dict() for obj_in in objs_in])
+
+
+job_log = CRUDJobLog(JobLog)
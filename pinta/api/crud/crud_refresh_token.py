@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.orm import Session
+
+from pinta.api.core.config import settings
+from pinta.api.core.security import create_refresh_token, hash_refresh_token
+from pinta.api.crud.base import CRUDBase
+from pinta.api.models.refresh_token import RefreshToken
+from pinta.api.models.user import User
+from pinta.api.schemas.refresh_token import RefreshTokenCreate, RefreshTokenUpdate
+
+
+def refresh_token_row(user_id: int, token: str, now: datetime) -> dict:
+    return dict(user_id=user_id,
+                token_hash=hash_refresh_token(token),
+                created_at=now,
+                expires_at=now + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES))
+
+
+class CRUDRefreshToken(CRUDBase[RefreshToken, RefreshTokenCreate, RefreshTokenUpdate]):
+    def create_for_user(self, db: Session, *, user_id: int) -> str:
+        """
+        Issue a refresh token, the only time it is available in clear. The
+        user's expired and revoked tokens are dropped on the way.
+        """
+        now = datetime.utcnow()
+        db.execute(delete(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            or_(RefreshToken.expires_at <= now, RefreshToken.revoked_at.isnot(None))
+        ))
+        token = create_refresh_token()
+        self._insert(db, refresh_token_row(user_id, token, now))
+        return token
+
+    def get_user(self, db: Session, *, token: str) -> Optional[User]:
+        """
+        User of a valid refresh token, one lookup by the unique token hash.
+        """
+        return (
+            db.query(User)
+            .join(RefreshToken, RefreshToken.user_id == User.id)
+            .filter(RefreshToken.token_hash == hash_refresh_token(token),
+                    RefreshToken.revoked_at.is_(None),
+                    RefreshToken.expires_at > datetime.utcnow())
+            .first()
+        )
+
+    def revoke(self, db: Session, *, token: str) -> bool:
+        result = db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == hash_refresh_token(token), RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    def revoke_all(self, db: Session, *, user_id: int) -> None:
+        """
+        Revoke the refresh tokens of a user, e.g. after a password change.
+        """
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        db.commit()
+
+
+refresh_token = CRUDRefreshToken(RefreshToken)
@@ -2,8 +2,10 @@ from typing import Any, Dict, Optional, Union
 
 from sqlalchemy.orm import Session
 
-from pinta.api.core.security import get_password_hash, verify_password
+from pinta.api.core.cache import user_cache
+from pinta.api.core.security import get_password_hash, verify_and_update_password
 from pinta.api.crud.base import CRUDBase
+from pinta.api.crud.crud_refresh_token import refresh_token
 from pinta.api.models.user import User
 from pinta.api.schemas.user import UserCreate, UserUpdate
 
@@ -16,17 +18,13 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return db.query(User).filter(User.email == email).first()
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
+        return self._insert(db, dict(
             username=obj_in.username,
             email=obj_in.email,
             hashed_password=get_password_hash(obj_in.password),
             full_name=obj_in.full_name,
             is_superuser=obj_in.is_superuser,
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        ))
 
     def update(
         self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
@@ -35,18 +33,34 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        if update_data["password"]:
+        password_changed = bool(update_data.get("password"))
+        if password_changed:
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        user = super().update(db, db_obj=db_obj, obj_in=update_data)
+        user_cache.invalidate(user.id)
+        if password_changed:
+            refresh_token.revoke_all(db, user_id=user.id)
+        return user
+
+    def remove(self, db: Session, *, id: int) -> Optional[User]:
+        user = super().remove(db, id=id)
+        user_cache.invalidate(id)
+        return user
 
     def authenticate(self, db: Session, *, username: str, password: str) -> Optional[User]:
         user = self.get_by_username(db, username=username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        # Do not hold a pooled connection while bcrypt runs
+        db.expunge(user)
+        db.rollback()
+        valid, new_hash = verify_and_update_password(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            user = self.update(db, db_obj=user, obj_in=dict(hashed_password=new_hash))
         return user
 
     def is_active(self, user: User) -> bool:
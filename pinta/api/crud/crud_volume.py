@@ -1,9 +1,9 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
-from pinta.api.crud.base import CRUDBase
+from pinta.api.crud.base import CRUDBase, match_owner_and_name, owner_and_name_query
 from pinta.api.models.volume import Volume
 from pinta.api.schemas.volume import VolumeCreate, VolumeUpdate
 
@@ -13,40 +13,41 @@ class CRUDVolume(CRUDBase[Volume, VolumeCreate, VolumeUpdate]):
         self, db: Session, *, obj_in: VolumeCreate, owner_id: int
     ) -> Volume:
         obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self._insert(db, dict(obj_in_data, owner_id=owner_id))
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
     ) -> List[Volume]:
+        query = db.query(self.model).filter(Volume.owner_id == owner_id)
+        if after_id is not None:
+            query = query.filter(Volume.id > after_id)
         return (
-            db.query(self.model)
-            .filter(Volume.owner_id == owner_id)
+            query
+            .order_by(Volume.id)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def get_multi_by_owner_and_name(
+        self, db: Session, *, current_user_id: int, owners_and_names: List[str]
+    ) -> Dict[str, Volume]:
+        """
+        Resolve `name` and `username/name` references with a single query.
+        References to missing, or other users' private, volumes are left out.
+        """
+        if not owners_and_names:
+            return {}
+        query = owner_and_name_query(self.model, current_user_id=current_user_id, owners_and_names=owners_and_names)
+        objs = db.execute(query).scalars().all()
+        return match_owner_and_name(objs, current_user_id=current_user_id, owners_and_names=owners_and_names)
+
     def get_by_owner_and_name(
         self, db: Session, *, current_user_id: int, owner_and_name: str
     ) -> Optional[Volume]:
-        delim = owner_and_name.split("/", 1)
-        if len(delim) == 1:
-            return (
-                db.query(self.model)
-                .filter(Volume.owner_id == current_user_id, Volume.name == owner_and_name)
-                .first()
-            )
-        elif len(delim) == 2:
-            username, volume_name = delim[0], delim[1]
-            return (
-                db.query(self.model)
-                .filter(Volume.owner.username == username, Volume.name == volume_name)
-                .first()
-            )
+        return self.get_multi_by_owner_and_name(
+            db, current_user_id=current_user_id, owners_and_names=[owner_and_name]
+        ).get(owner_and_name)
 
 
 volume = CRUDVolume(Volume)
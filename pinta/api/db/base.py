@@ -3,3 +3,7 @@
 from pinta.api.db.base_class import Base  # noqa
 from pinta.api.models.user import User  # noqa
 from pinta.api.models.job import Job  # noqa
+from pinta.api.models.job_log import JobLog  # noqa
+from pinta.api.models.volume import Volume  # noqa
+from pinta.api.models.image import Image  # noqa
+from pinta.api.models.refresh_token import RefreshToken  # noqa
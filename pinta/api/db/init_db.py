@@ -1,25 +1,56 @@
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
 
 from pinta.api import crud, schemas
 from pinta.api.core.config import settings
 from pinta.api.db import base  # noqa: F401
+from pinta.api.db.session import engine
 
 # make sure all SQL Alchemy models are imported (pinta.api.db.base) before initializing DB
 # otherwise, SQL Alchemy might fail to initialize relationships properly
 # for more details: https://github.com/tiangolo/full-stack-fastapi-postgresql/issues/28
 
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+
+def run_migrations(connection: Connection) -> None:
+    """
+    Bring the schema up to date with the migrations, keeping the data.
+
+    The connection must not be in a transaction: alembic begins and commits
+    its own, migrations like 0006 need to step out of it.
+    """
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    config.attributes["connection"] = connection
+    inspector = inspect(connection)
+    tables = inspector.get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        # Created with create_all before there were migrations, mark the
+        # revision its tables match
+        if "job_logs" not in tables:
+            revision = "0001"
+        elif not any(index["name"] == "ix_volumes_owner_id_name" for index in inspector.get_indexes("volumes")):
+            revision = "0002"
+        elif not any(column["name"] == "updated_at" for column in inspector.get_columns("jobs")):
+            revision = "0003"
+        elif "refresh_tokens" not in tables:
+            revision = "0004"
+        else:
+            # 0006 is a no-op if the job status type already has all values
+            revision = "0005"
+        command.stamp(config, revision)
+    command.upgrade(config, "head")
+
 
 def init_db(db: Session) -> None:
-    # Tables should be created with Alembic migrations
-    # But if you don't want to use migrations, create
-    # the tables un-commenting the next line
-    # Base.metadata.create_all(bind=engine)
-    from .base_class import Base
-    # for tbl in reversed(Base.metadata.sorted_tables):
-    #     # db.get_bind().execute(tbl.delete())
-    #     tbl.drop(db.get_bind())
-    Base.metadata.drop_all(bind=db.get_bind())
-    Base.metadata.create_all(bind=db.get_bind())
+    with engine.connect() as connection:
+        run_migrations(connection)
 
     user = crud.user.get_by_username(db, username=settings.FIRST_SUPERUSER)
     if not user:
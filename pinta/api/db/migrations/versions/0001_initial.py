@@ -0,0 +1,95 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2020-07-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_superuser", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_full_name", "users", ["full_name"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("type", sa.Enum("ps_worker", "mpi", "symmetric", "image_builder", name="jobtype"), nullable=True),
+        sa.Column("image", sa.String(), nullable=True),
+        sa.Column("volumes", sa.String(), nullable=True),
+        sa.Column("working_dir", sa.String(), nullable=True),
+        sa.Column("master_command", sa.String(), nullable=True),
+        sa.Column("num_masters", sa.Integer(), nullable=True),
+        sa.Column("replica_command", sa.String(), nullable=True),
+        sa.Column("num_replicas", sa.Integer(), nullable=True),
+        sa.Column("ports", sa.String(), nullable=True),
+        sa.Column("scheduled", sa.Boolean(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"])
+    op.create_index("ix_jobs_name", "jobs", ["name"])
+    op.create_index("ix_jobs_description", "jobs", ["description"])
+    op.create_index("ix_jobs_image", "jobs", ["image"])
+
+    op.create_table(
+        "volumes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("capacity", sa.String(), nullable=True),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_volumes_id", "volumes", ["id"])
+    op.create_index("ix_volumes_name", "volumes", ["name"])
+    op.create_index("ix_volumes_description", "volumes", ["description"])
+
+    op.create_table(
+        "images",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_images_id", "images", ["id"])
+    op.create_index("ix_images_name", "images", ["name"])
+    op.create_index("ix_images_description", "images", ["description"])
+
+
+def downgrade():
+    op.drop_table("images")
+    op.drop_table("volumes")
+    op.drop_table("jobs")
+    op.drop_table("users")
+    sa.Enum(name="jobtype").drop(op.get_bind(), checkfirst=True)
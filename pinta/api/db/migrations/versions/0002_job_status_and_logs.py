@@ -0,0 +1,70 @@
+"""Job status columns, archived job logs and keyset pagination indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2020-08-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+job_status = sa.Enum("scheduled", "running", "completed", "error", name="jobstatus")
+
+
+def upgrade():
+    job_status.create(op.get_bind(), checkfirst=True)
+    op.add_column("jobs", sa.Column("status", job_status, nullable=True))
+    op.add_column("jobs", sa.Column("phase", sa.String(), nullable=True))
+    op.add_column("jobs", sa.Column("phase_changed_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("started_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("finished_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("failure_reason", sa.String(), nullable=True))
+    op.create_index("ix_jobs_status", "jobs", ["status"])
+    op.create_index("ix_jobs_phase_changed_at", "jobs", ["phase_changed_at"])
+
+    op.create_table(
+        "job_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        # The type already exists, created with the jobs table
+        sa.Column("job_type", postgresql.ENUM("ps_worker", "mpi", "symmetric", "image_builder", name="jobtype",
+                                              create_type=False), nullable=True),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("num", sa.Integer(), nullable=False),
+        sa.Column("container", sa.String(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("lines", sa.Integer(), nullable=True),
+        sa.Column("size", sa.Integer(), nullable=True),
+        sa.Column("compressed_size", sa.Integer(), nullable=True),
+        sa.Column("segments", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_job_logs_id", "job_logs", ["id"])
+    op.create_index("ix_job_logs_job_id", "job_logs", ["job_id"])
+
+    op.create_index("ix_jobs_owner_id_id", "jobs", ["owner_id", "id"])
+    op.create_index("ix_volumes_owner_id_id", "volumes", ["owner_id", "id"])
+    op.create_index("ix_images_owner_id_id", "images", ["owner_id", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_images_owner_id_id", "images")
+    op.drop_index("ix_volumes_owner_id_id", "volumes")
+    op.drop_index("ix_jobs_owner_id_id", "jobs")
+    op.drop_table("job_logs")
+    op.drop_index("ix_jobs_phase_changed_at", "jobs")
+    op.drop_index("ix_jobs_status", "jobs")
+    for column in ("failure_reason", "finished_at", "started_at", "phase_changed_at", "phase", "status"):
+        op.drop_column("jobs", column)
+    job_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,72 @@
+"""Owner-scoped name indexes
+
+Lookups filter by (owner_id, name), so replace the single column indexes
+with composite ones, unique for volumes and images, and drop indexes that
+no query uses. Duplicate volume names are resolved first, duplicate image
+names stop the upgrade until they are removed.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2020-09-01 00:00:00
+
+"""
+from alembic import op
+from alembic.util import CommandError
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+DROPPED = [
+    ("jobs", "id"), ("jobs", "name"), ("jobs", "description"), ("jobs", "image"),
+    ("volumes", "id"), ("volumes", "name"), ("volumes", "description"),
+    ("images", "id"), ("images", "name"), ("images", "description"),
+]
+
+
+def duplicates(table):
+    """
+    Rows of `table` whose (owner_id, name) an older row already has.
+    """
+    return (
+        f"FROM {table} WHERE EXISTS (SELECT 1 FROM {table} AS first "
+        f"WHERE first.owner_id = {table}.owner_id AND first.name = {table}.name AND first.id < {table}.id)"
+    )
+
+
+def check(conflicts, message):
+    if conflicts:
+        raise CommandError(message + "\n" + "\n".join(
+            f"  id={id} owner_id={owner_id} name={name!r}" for id, owner_id, name in conflicts
+        ))
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Duplicate images are the same registry image, which row to keep is not ours to decide
+    check(conn.execute(sa.text(f"SELECT id, owner_id, name {duplicates('images')} ORDER BY id")).fetchall(),
+          "Images with the same owner and name, delete all but one and upgrade again:")
+    # Duplicate volumes are different claims, keep them under a new name
+    renamed = "volumes.name || '-' || CAST(volumes.id AS VARCHAR)"
+    check(conn.execute(sa.text(
+        f"SELECT id, owner_id, {renamed} {duplicates('volumes')} AND EXISTS (SELECT 1 FROM volumes AS taken "
+        f"WHERE taken.owner_id = volumes.owner_id AND taken.name = {renamed}) ORDER BY id"
+    )).fetchall(), "Duplicate volumes cannot be renamed, the new names are taken:")
+    op.execute(f"UPDATE volumes SET name = {renamed} WHERE id IN (SELECT id {duplicates('volumes')})")
+    op.create_index("ix_volumes_owner_id_name", "volumes", ["owner_id", "name"], unique=True)
+    op.create_index("ix_images_owner_id_name", "images", ["owner_id", "name"], unique=True)
+    op.create_index("ix_jobs_owner_id_name", "jobs", ["owner_id", "name"])
+    for table, column in DROPPED:
+        op.drop_index(f"ix_{table}_{column}", table)
+
+
+def downgrade():
+    for table, column in DROPPED:
+        op.create_index(f"ix_{table}_{column}", table, [column])
+    op.drop_index("ix_jobs_owner_id_name", "jobs")
+    op.drop_index("ix_images_owner_id_name", "images")
+    op.drop_index("ix_volumes_owner_id_name", "volumes")
@@ -0,0 +1,32 @@
+"""Modification times of jobs, volumes and images
+
+The ETags of the list endpoints are derived from the row count, the
+largest id and the latest updated_at of the listed rows.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2020-09-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+TABLES = ["jobs", "volumes", "images"]
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_column(table, "updated_at")
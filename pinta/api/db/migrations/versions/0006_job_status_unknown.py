@@ -0,0 +1,30 @@
+"""Unknown job status
+
+Answered instead of a job's status while the Kubernetes API server cannot
+be asked. Before PostgreSQL 12 an enum value cannot be added in a
+transaction, so it is added outside of the migration's.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2020-10-15 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'unknown'")
+
+
+def downgrade():
+    # PostgreSQL cannot drop an enum value, it stays unused
+    op.execute("UPDATE jobs SET status = NULL WHERE status = 'unknown'")
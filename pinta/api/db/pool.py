@@ -0,0 +1,57 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from pinta.api.core.metrics import PoolMetrics
+
+
+class InstrumentedPoolMixin:
+    """
+    Records PoolMetrics for a QueuePool. The metrics survive recreate(),
+    which the engine calls on dispose() and after a disconnect.
+    """
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts.inc()
+            raise
+        finally:
+            self.metrics.checkouts.inc()
+            self.metrics.wait.observe(time.perf_counter() - start)
+
+    def _inc_overflow(self):
+        allowed = super()._inc_overflow()
+        # _overflow counts from -pool_size, positive means past the pool size
+        if allowed and self._overflow > 0:
+            self.metrics.overflows.inc()
+        return allowed
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        return dict(size=self.size(),
+                    max_overflow=self._max_overflow,
+                    checked_out=self.checkedout(),
+                    checked_in=self.checkedin(),
+                    overflow=max(self.overflow(), 0),
+                    **self.metrics.snapshot())
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -1,7 +1,32 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from pinta.api.core.config import settings
+from pinta.api.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+pool_args = dict(pool_size=settings.DB_POOL_SIZE,
+                 max_overflow=settings.DB_MAX_OVERFLOW,
+                 pool_timeout=settings.DB_POOL_TIMEOUT,
+                 pool_recycle=settings.DB_POOL_RECYCLE,
+                 pool_pre_ping=True)
+
+connect_args = {}
+async_connect_args = {}
+if settings.DB_STATEMENT_TIMEOUT_MS:
+    connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    async_connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, poolclass=InstrumentedQueuePool,
+                       connect_args=connect_args, **pool_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# asyncpg engine for handlers that must not block the event loop. Objects stay
+# loaded after commit, lazy loads are not possible on an AsyncSession.
+async_engine = create_async_engine(settings.SQLALCHEMY_ASYNC_DATABASE_URI, poolclass=InstrumentedAsyncQueuePool,
+                                   connect_args=async_connect_args, **pool_args)
+AsyncSessionLocal = sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine, class_=AsyncSession)
+
+
+def pool_stats() -> dict:
+    return {"sync": engine.pool.stats(), "async": async_engine.sync_engine.pool.stats()}
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Optional
+
+from kubernetes_asyncio import client, config
+from kubernetes_asyncio.client.api_client import ApiClient
+from kubernetes_asyncio.stream import WsApiClient
+
+from pinta.api.core.config import settings
+
+_lock: Optional[asyncio.Lock] = None
+_api_client: Optional[ApiClient] = None
+_ws_api_client: Optional[WsApiClient] = None
+_loaded_at = 0.0
+
+
+async def _load_configuration() -> client.Configuration:
+    if settings.K8S_DEBUG:
+        await config.load_kube_config()
+    else:
+        config.load_incluster_config()
+    configuration = client.Configuration.get_default_copy()
+    configuration.connection_pool_maxsize = settings.K8S_CONNECTION_POOL_MAXSIZE
+    return configuration
+
+
+def _get_lock() -> asyncio.Lock:
+    global _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    return _lock
+
+
+async def init_api_client() -> ApiClient:
+    """
+    Create the shared kubernetes_asyncio clients. Must run on the event loop
+    that serves requests, since aiohttp sessions are bound to it.
+    """
+    global _api_client, _ws_api_client, _loaded_at
+    async with _get_lock():
+        if _api_client is None:
+            configuration = await _load_configuration()
+            _api_client = ApiClient(configuration)
+            _ws_api_client = WsApiClient(configuration)
+            _loaded_at = time.monotonic()
+        return _api_client
+
+
+async def _maybe_reload_credentials() -> None:
+    global _loaded_at
+    if time.monotonic() - _loaded_at <= settings.K8S_CONFIG_RELOAD_SECONDS:
+        return
+    async with _get_lock():
+        if time.monotonic() - _loaded_at > settings.K8S_CONFIG_RELOAD_SECONDS:
+            configuration = await _load_configuration()
+            # Both clients share one Configuration object
+            _api_client.configuration.api_key = dict(configuration.api_key)
+            _api_client.configuration.api_key_prefix = dict(configuration.api_key_prefix)
+            _loaded_at = time.monotonic()
+
+
+async def get_api_client() -> ApiClient:
+    if _api_client is None:
+        return await init_api_client()
+    await _maybe_reload_credentials()
+    return _api_client
+
+
+async def get_ws_api_client() -> WsApiClient:
+    if _ws_api_client is None:
+        await init_api_client()
+    else:
+        await _maybe_reload_credentials()
+    return _ws_api_client
+
+
+async def close_api_client() -> None:
+    global _api_client, _ws_api_client
+    async with _get_lock():
+        if _api_client is not None:
+            await _api_client.close()
+            await _ws_api_client.close()
+            _api_client = _ws_api_client = None
+
+
+async def custom_objects_api() -> client.CustomObjectsApi:
+    return client.CustomObjectsApi(await get_api_client())
+
+
+async def core_v1_api() -> client.CoreV1Api:
+    return client.CoreV1Api(await get_api_client())
+
+
+async def ws_core_v1_api() -> client.CoreV1Api:
+    return client.CoreV1Api(await get_ws_api_client())
@@ -0,0 +1,180 @@
+import logging
+from typing import AsyncIterator, Optional
+
+from aiohttp import ClientResponse, ClientTimeout
+from kubernetes_asyncio.client.rest import ApiException, RESTResponse
+
+from pinta.api.core.config import settings
+from pinta.api.core.singleflight import SingleFlight
+from pinta.api.kubernetes.aio.api_client import core_v1_api, custom_objects_api, ws_core_v1_api
+from pinta.api.kubernetes.job import commit_image_builder_command, pintajob_body
+from pinta.api.kubernetes.policy import aio_timeout, kubernetes_call, timeout
+from pinta.api.models import Job
+
+# Concurrent identical reads share one call to the API server
+_reads = SingleFlight()
+
+
+async def get_vcjob(id: int):
+    return await _reads.do(("vcjob", id), lambda: _get_vcjob(id))
+
+
+@kubernetes_call(idempotent=True)
+async def _get_vcjob(id: int):
+    api = await custom_objects_api()
+    api_response = await api.get_namespaced_custom_object(
+        group="batch.volcano.sh",
+        version="v1alpha1",
+        namespace="default",
+        plural="jobs",
+        name="pinta-job-" + str(id),
+        _request_timeout=aio_timeout("get_vcjob")
+    )
+    return api_response
+
+
+@kubernetes_call(idempotent=True)
+async def list_vcjobs(limit: int = settings.K8S_LIST_PAGE_SIZE, _continue: Optional[str] = None):
+    """
+    A page of the Volcano jobs of the namespace, callers match them to jobs by
+    name with vcjob_id(). The first page is served from the API server's watch
+    cache instead of etcd, the next ones continue from its continue token.
+    """
+    api = await custom_objects_api()
+    page = dict(_continue=_continue) if _continue else dict(resource_version="0")
+    api_response = await api.list_namespaced_custom_object(
+        group="batch.volcano.sh",
+        version="v1alpha1",
+        namespace="default",
+        plural="jobs",
+        limit=limit,
+        _request_timeout=aio_timeout("list_vcjobs"),
+        **page
+    )
+    return api_response
+
+
+@kubernetes_call(idempotent=False)
+async def create_pintajob(job_in: Job, volumes):
+    api = await custom_objects_api()
+    api_response = await api.create_namespaced_custom_object(
+        group="pinta.qed.usc.edu",
+        version="v1",
+        namespace="default",
+        plural="pintajobs",
+        body=pintajob_body(job_in, volumes),
+        _request_timeout=aio_timeout("create_pintajob")
+    )
+    return api_response
+
+
+async def commit_image_builder(name: str, id: int, username: str):
+    api = await ws_core_v1_api()
+    resp = await api.connect_get_namespaced_pod_exec(
+        f"pinta-job-{id}-image-builder-0",
+        "default",
+        command=commit_image_builder_command(name, username),
+        container="docker-cli",
+        stderr=True, stdin=False,
+        stdout=True, tty=False
+    )
+    logging.info(f"Committed image {name} of job {id}: {resp}")
+    return resp
+
+
+@kubernetes_call(idempotent=False)
+async def delete_pintajob(id: int):
+    api = await custom_objects_api()
+    api_response = await api.delete_namespaced_custom_object(
+        group="pinta.qed.usc.edu",
+        version="v1",
+        namespace="default",
+        plural="pintajobs",
+        name="pinta-job-" + str(id),
+        _request_timeout=aio_timeout("delete_pintajob")
+    )
+    return api_response
+
+
+async def get_pintajob_log(id: int, role: str, num: int):
+    return await _reads.do(("pintajob_log", id, role, num), lambda: _get_pintajob_log(id, role, num))
+
+
+@kubernetes_call(idempotent=True)
+async def _get_pintajob_log(id: int, role: str, num: int):
+    api = await core_v1_api()
+    api_response = await api.read_namespaced_pod_log(f"pinta-job-{id}-{role}-{num}", "default",
+                                                     _request_timeout=aio_timeout("get_pintajob_log"))
+    return api_response
+
+
+@kubernetes_call(idempotent=True)
+async def open_pod_log(
+    pod: str,
+    *,
+    container: Optional[str] = None,
+    follow: bool = False,
+    tail_lines: Optional[int] = None,
+    since_seconds: Optional[int] = None,
+    limit_bytes: Optional[int] = None,
+    timestamps: bool = False
+) -> ClientResponse:
+    """
+    Start reading a pod log without buffering it. The caller consumes the
+    body with iter_pod_log().
+    """
+    api = await core_v1_api()
+    connect, read = timeout("open_pod_log")
+    params = dict(container=container, tail_lines=tail_lines, since_seconds=since_seconds, limit_bytes=limit_bytes)
+    resp = await api.read_namespaced_pod_log(
+        pod,
+        "default",
+        follow=follow,
+        timestamps=timestamps,
+        _preload_content=False,
+        # No total timeout, a followed log may stay open for hours and idle
+        # for as long as the pod prints nothing
+        _request_timeout=ClientTimeout(total=None, sock_connect=connect, sock_read=None if follow else read),
+        **{k: v for k, v in params.items() if v is not None}
+    )
+    if not 200 <= resp.status <= 299:
+        data = await resp.text()
+        resp.release()
+        raise ApiException(http_resp=RESTResponse(resp, data))
+    return resp
+
+
+async def read_pod_log(
+    pod: str,
+    *,
+    container: Optional[str] = None,
+    tail_lines: Optional[int] = None,
+    since_seconds: Optional[int] = None,
+    limit_bytes: Optional[int] = None,
+    timestamps: bool = False
+) -> bytes:
+    """
+    Read a window of a pod log into memory. Concurrent reads of the same
+    window share one upstream request.
+    """
+    async def read() -> bytes:
+        resp = await open_pod_log(pod,
+                                  container=container,
+                                  tail_lines=tail_lines,
+                                  since_seconds=since_seconds,
+                                  limit_bytes=limit_bytes,
+                                  timestamps=timestamps)
+        try:
+            return await resp.read()
+        finally:
+            resp.release()
+    key = ("pod_log", pod, container, tail_lines, since_seconds, limit_bytes, timestamps)
+    return await _reads.do(key, read)
+
+
+async def iter_pod_log(resp: ClientResponse, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in resp.content.iter_chunked(chunk_size):
+            yield chunk
+    finally:
+        resp.release()
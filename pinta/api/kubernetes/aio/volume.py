@@ -0,0 +1,26 @@
+from pinta.api.kubernetes.aio.api_client import core_v1_api
+from pinta.api.kubernetes.policy import aio_timeout, kubernetes_call
+from pinta.api.kubernetes.volume import pvc_body
+from pinta.api.schemas.volume import Volume
+
+
+@kubernetes_call(idempotent=False)
+async def create_pvc(volume: Volume):
+    api = await core_v1_api()
+    api_response = await api.create_namespaced_persistent_volume_claim(
+        namespace="default",
+        body=pvc_body(volume),
+        _request_timeout=aio_timeout("create_pvc")
+    )
+    return api_response
+
+
+@kubernetes_call(idempotent=False)
+async def delete_pvc(volume: Volume):
+    api = await core_v1_api()
+    api_response = await api.delete_namespaced_persistent_volume_claim(
+        name=f"pinta-volume-{volume.id}",
+        namespace="default",
+        _request_timeout=aio_timeout("delete_pvc")
+    )
+    return api_response
@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Optional
+
+from kubernetes import client, config
+
+from pinta.api.core.config import settings
+
+_lock = threading.Lock()
+_api_client: Optional[client.ApiClient] = None
+_loaded_at = 0.0
+
+
+def _load_configuration() -> client.Configuration:
+    if settings.K8S_DEBUG:
+        config.load_kube_config()
+    else:
+        config.load_incluster_config()
+    # Configuration() hands out a copy of the default set by the loaders above
+    configuration = client.Configuration()
+    configuration.connection_pool_maxsize = settings.K8S_CONNECTION_POOL_MAXSIZE
+    return configuration
+
+
+def _reload_credentials(api_client: client.ApiClient) -> None:
+    # Only the credentials are swapped, so the urllib3 pool and its
+    # keep-alive connections survive a service account token rotation.
+    configuration = _load_configuration()
+    api_client.configuration.api_key = dict(configuration.api_key)
+    api_client.configuration.api_key_prefix = dict(configuration.api_key_prefix)
+
+
+def init_api_client() -> client.ApiClient:
+    """
+    Create the process-wide Kubernetes API client. Called once at startup.
+    """
+    global _api_client, _loaded_at
+    with _lock:
+        if _api_client is None:
+            _api_client = client.ApiClient(_load_configuration())
+            _loaded_at = time.monotonic()
+        return _api_client
+
+
+def get_api_client() -> client.ApiClient:
+    """
+    Return the shared API client, reloading its credentials once every
+    K8S_CONFIG_RELOAD_SECONDS to pick up rotated tokens.
+    """
+    global _loaded_at
+    if _api_client is None:
+        return init_api_client()
+    if time.monotonic() - _loaded_at > settings.K8S_CONFIG_RELOAD_SECONDS:
+        with _lock:
+            if time.monotonic() - _loaded_at > settings.K8S_CONFIG_RELOAD_SECONDS:
+                _reload_credentials(_api_client)
+                _loaded_at = time.monotonic()
+    return _api_client
+
+
+def close_api_client() -> None:
+    global _api_client
+    with _lock:
+        if _api_client is not None:
+            _api_client.rest_client.pool_manager.clear()
+            _api_client = None
+
+
+def custom_objects_api() -> client.CustomObjectsApi:
+    return client.CustomObjectsApi(get_api_client())
+
+
+def core_v1_api() -> client.CoreV1Api:
+    return client.CoreV1Api(get_api_client())
+
+
+def stream_core_v1_api() -> client.CoreV1Api:
+    """
+    CoreV1Api for use with kubernetes.stream.stream(), which temporarily
+    replaces ApiClient.request and therefore must not touch the shared client.
+    """
+    return client.CoreV1Api(client.ApiClient(get_api_client().configuration))
@@ -0,0 +1,252 @@
+import asyncio
+import bisect
+import gzip
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from kubernetes_asyncio.client.rest import ApiException
+
+from pinta.api import crud, schemas
+from pinta.api.core.config import settings
+from pinta.api.db.session import AsyncSessionLocal
+from pinta.api.kubernetes.aio.job import open_pod_log
+from pinta.api.kubernetes.job import TERMINAL_PHASES
+from pinta.api.kubernetes.logs import iter_pod_log_lines, job_pods, split_timestamp
+from pinta.api.kubernetes.policy import UNAVAILABLE
+from pinta.api.models import Job, JobLog
+
+INDEX_FILE = "index.json"
+
+_in_flight: Dict[int, asyncio.Future] = {}
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class LogArchive:
+    """
+    Log of one pod stored as a series of independent gzip segments, cut at
+    line boundaries, plus an index with the line and byte count of every
+    segment. Lines are stored with their kubelet timestamps, the index also
+    counts bytes without them, so tail and range reads only decompress the
+    segments they need for either view.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.segments: List[dict] = json.load(f)["segments"]
+        self._line_starts = self._starts("lines")
+        self._byte_starts = {True: self._starts("bytes"), False: self._starts("text_bytes")}
+
+    def _starts(self, key: str) -> List[int]:
+        starts = [0]
+        for segment in self.segments:
+            starts.append(starts[-1] + segment[key])
+        return starts
+
+    @property
+    def lines(self) -> int:
+        return self._line_starts[-1]
+
+    def size(self, timestamps: bool) -> int:
+        return self._byte_starts[timestamps][-1]
+
+    def _read_segment(self, i: int) -> bytes:
+        with gzip.open(os.path.join(self.path, self.segments[i]["file"])) as f:
+            return f.read()
+
+    async def _segment_lines(self, i: int) -> List[bytes]:
+        data = await asyncio.get_running_loop().run_in_executor(None, self._read_segment, i)
+        return data.splitlines(keepends=True)
+
+    async def iter_lines(
+        self,
+        timestamps: bool = False,
+        tail_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None,
+        limit_bytes: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Lines of the log, with the same filters as the pod log API.
+        """
+        first_line = max(self.lines - tail_lines, 0) if tail_lines is not None else 0
+        first = max(bisect.bisect_right(self._line_starts, first_line) - 1, 0)
+        cutoff = None
+        if since_seconds is not None:
+            since = datetime.utcnow() - timedelta(seconds=since_seconds)
+            cutoff = f"{since:%Y-%m-%dT%H:%M:%S}.{since.microsecond:06d}000".encode()
+        sent = 0
+        for i in range(first, len(self.segments)):
+            lines = await self._segment_lines(i)
+            skip = first_line - self._line_starts[i] if i == first else 0
+            for line in lines[skip:]:
+                key, text = split_timestamp(line)
+                if cutoff is not None and key < cutoff:
+                    continue
+                if not timestamps:
+                    line = text
+                if limit_bytes is not None and sent + len(line) > limit_bytes:
+                    yield line[:limit_bytes - sent]
+                    return
+                sent += len(line)
+                yield line
+
+    async def iter_range(self, start: int, end: int, timestamps: bool = False) -> AsyncIterator[bytes]:
+        """
+        Bytes start..end (inclusive) of the log, as returned by iter_lines.
+        """
+        starts = self._byte_starts[timestamps]
+        first = bisect.bisect_right(starts, start) - 1
+        for i in range(first, len(self.segments)):
+            if starts[i] > end:
+                break
+            lines = await self._segment_lines(i)
+            data = b"".join(lines if timestamps else (split_timestamp(line)[1] for line in lines))
+            yield data[max(start - starts[i], 0):end + 1 - starts[i]]
+
+    async def iter_gzip(self, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """
+        The segments as stored. Concatenated gzip members form one valid gzip
+        stream of the timestamped log, so no recompression is needed.
+        """
+        loop = asyncio.get_running_loop()
+        for segment in self.segments:
+            with open(os.path.join(self.path, segment["file"]), "rb") as f:
+                while True:
+                    chunk = await loop.run_in_executor(None, f.read, chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+
+def _write_file(path: str, data: bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_segment(path: str, data: bytes) -> int:
+    compressed = gzip.compress(data, compresslevel=6)
+    _write_file(path, compressed)
+    return len(compressed)
+
+
+async def write_archive(path: str, lines: AsyncIterator[bytes]) -> dict:
+    """
+    Write timestamped log lines to `path` as segments of about
+    LOG_ARCHIVE_SEGMENT_BYTES each, then the index. Returns the totals.
+    """
+    loop = asyncio.get_running_loop()
+    os.makedirs(path, exist_ok=True)
+    segments = []
+    totals = dict(lines=0, size=0, compressed_size=0, segments=0)
+    buffer: List[bytes] = []
+    text_bytes = 0
+    size = 0
+
+    async def flush():
+        name = f"{len(segments):05d}.log.gz"
+        compressed = await loop.run_in_executor(None, _write_segment, os.path.join(path, name), b"".join(buffer))
+        segments.append(dict(file=name, lines=len(buffer), bytes=size, text_bytes=text_bytes))
+        totals["lines"] += len(buffer)
+        totals["size"] += size
+        totals["compressed_size"] += compressed
+        totals["segments"] += 1
+
+    async for line in lines:
+        buffer.append(line)
+        size += len(line)
+        text_bytes += len(split_timestamp(line)[1])
+        if size >= settings.LOG_ARCHIVE_SEGMENT_BYTES:
+            await flush()
+            buffer, size, text_bytes = [], 0, 0
+    if buffer or not segments:
+        await flush()
+    index = json.dumps(dict(segments=segments)).encode()
+    await loop.run_in_executor(None, _write_file, os.path.join(path, INDEX_FILE), index)
+    return totals
+
+
+def archive_path(job_id: int, role: str, num: int, container: str = "") -> str:
+    name = f"{role}-{num}" + (f"-{container}" if container else "")
+    return os.path.join(str(job_id), name)
+
+
+def open_archive(job_log: JobLog) -> LogArchive:
+    return LogArchive(os.path.join(settings.LOG_ARCHIVE_DIR, job_log.path))
+
+
+async def _archive_pod(job_id: int, role: str, num: int) -> Optional[Tuple[str, dict]]:
+    try:
+        resp = await open_pod_log(f"pinta-job-{job_id}-{role}-{num}", timestamps=True)
+    except ApiException as e:
+        # The pod never started or is already gone
+        logging.info(f"Not archiving log of job {job_id} {role}-{num}: {e.reason}")
+        return None
+    except UNAVAILABLE as e:
+        logging.warning(f"Not archiving log of job {job_id} {role}-{num}: {e!r}")
+        return None
+    path = archive_path(job_id, role, num)
+    full_path = os.path.join(settings.LOG_ARCHIVE_DIR, path)
+    try:
+        return path, await write_archive(full_path, iter_pod_log_lines(resp))
+    except BaseException:
+        shutil.rmtree(full_path, ignore_errors=True)
+        raise
+
+
+async def _archive_job(job_id: int, job_type, owner_id: int, pods: List[Tuple[str, int]]) -> List[JobLog]:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.LOG_ARCHIVE_CONCURRENCY)
+    async with _semaphore:
+        async with AsyncSessionLocal() as db:
+            job_logs = await crud.aio.job_log.get_multi_by_job(db, job_id=job_id)
+        if job_logs:
+            return job_logs
+        # No connection held while the logs are copied
+        results = await asyncio.gather(*[_archive_pod(job_id, role, num) for role, num in pods])
+        objs_in = [
+            schemas.JobLogCreate(job_id=job_id, job_type=job_type, owner_id=owner_id,
+                                 role=role, num=num, path=result[0], **result[1])
+            for (role, num), result in zip(pods, results) if result is not None
+        ]
+        async with AsyncSessionLocal() as db:
+            return await crud.aio.job_log.create_multi(db, objs_in=objs_in)
+
+
+async def archive_job_logs(job: Job) -> List[JobLog]:
+    """
+    Archive the logs of all pods of a job, once. Must be called before the
+    pods are deleted. Concurrent calls for the same job share one run.
+    """
+    if job.id not in _in_flight:
+        future = asyncio.ensure_future(_archive_job(job.id, job.type, job.owner_id, job_pods(job)))
+        _in_flight[job.id] = future
+        future.add_done_callback(lambda _, id=job.id: _in_flight.pop(id, None))
+    return await asyncio.shield(_in_flight[job.id])
+
+
+async def archive_finished_job(id: int) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            job = await crud.aio.job.get(db, id=id)
+        if not job or not job.scheduled:
+            return
+        await archive_job_logs(job)
+    except Exception:
+        logging.exception(f"Failed to archive logs of job {id}")
+
+
+def archive_on_finish(loop: asyncio.AbstractEventLoop) -> Callable[[int, str, dict], None]:
+    """
+    Informer listener that archives a job's logs when it reaches a terminal
+    phase. The informer calls it from its own thread.
+    """
+    def listener(id: int, phase: str, obj: dict) -> None:
+        if phase in TERMINAL_PHASES:
+            asyncio.run_coroutine_threadsafe(archive_finished_job(id), loop)
+    return listener
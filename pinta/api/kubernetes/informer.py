@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from pinta.api.core.config import settings
+from pinta.api.kubernetes.api_client import custom_objects_api
+from pinta.api.kubernetes.job import vcjob_id, vcjob_phase
+
+
+class VCJobInformer:
+    """
+    In-memory map from job id to Volcano job phase, kept up to date by a
+    list+watch on batch.volcano.sh/v1alpha1 jobs. Jobs Volcano has not set a
+    phase for yet are kept with a None phase.
+
+    The watch resumes from the last seen resourceVersion and falls back to a
+    full re-list when the version has expired (HTTP 410) or every
+    `resync_seconds`.
+
+    Listeners added with add_listener() are called from the informer thread
+    with (id, phase, object) whenever the phase of a job changes.
+    """
+    group = "batch.volcano.sh"
+    version = "v1alpha1"
+    plural = "jobs"
+
+    def __init__(self, namespace: str = "default", resync_seconds: int = 300, watch_timeout_seconds: int = 60):
+        self.namespace = namespace
+        self.resync_seconds = resync_seconds
+        self.watch_timeout_seconds = watch_timeout_seconds
+        self._phases: Dict[int, Optional[str]] = {}
+        self._resource_version: Optional[str] = None
+        self._synced = threading.Event()
+        self._synced_at: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._watch: Optional[watch.Watch] = None
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[int, str, dict], None]] = []
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vcjob-informer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watch is not None:
+            self._watch.stop()
+        self._thread = None
+
+    def add_listener(self, listener: Callable[[int, str, dict], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, id: int, phase: str, obj: dict) -> None:
+        for listener in self._listeners:
+            try:
+                listener(id, phase, obj)
+            except Exception:
+                logging.exception("Volcano job informer listener failed")
+
+    def has_synced(self) -> bool:
+        return self._synced.is_set()
+
+    def synced_at(self) -> Optional[datetime]:
+        """
+        UTC time the last full list was requested, every Volcano job that
+        existed then is known since.
+        """
+        return self._synced_at
+
+    def has_job(self, id: int) -> bool:
+        return id in self._phases
+
+    def get_phase(self, id: int) -> Optional[str]:
+        return self._phases.get(id)
+
+    def _list_args(self) -> dict:
+        return dict(group=self.group, version=self.version, namespace=self.namespace, plural=self.plural)
+
+    def _list(self) -> None:
+        listed_at = datetime.utcnow()
+        api_response = custom_objects_api().list_namespaced_custom_object(**self._list_args())
+        phases = {}
+        objs = {}
+        for obj in api_response["items"]:
+            id = vcjob_id(obj)
+            if id is not None:
+                phases[id] = vcjob_phase(obj)
+                objs[id] = obj
+        # Swap the whole map so readers never see a half-built one
+        previous, self._phases = self._phases, phases
+        for id, phase in phases.items():
+            if phase is not None and previous.get(id) != phase:
+                self._notify(id, phase, objs[id])
+        self._resource_version = api_response["metadata"]["resourceVersion"]
+        self._synced_at = listed_at
+        self._synced.set()
+
+    def _apply(self, event_type: str, obj: dict) -> None:
+        id = vcjob_id(obj)
+        if id is None:
+            return
+        if event_type == "DELETED":
+            self._phases.pop(id, None)
+        else:
+            phase = vcjob_phase(obj)
+            if phase is None:
+                self._phases.setdefault(id, None)
+            elif self._phases.get(id) != phase:
+                self._phases[id] = phase
+                self._notify(id, phase, obj)
+
+    def _watch_until(self, deadline: float) -> None:
+        self._watch = watch.Watch()
+        kwargs = self._list_args()
+        kwargs["timeout_seconds"] = self.watch_timeout_seconds
+        if self._resource_version is not None:
+            kwargs["resource_version"] = self._resource_version
+        for event in self._watch.stream(custom_objects_api().list_namespaced_custom_object, **kwargs):
+            obj = event["raw_object"]
+            if event["type"] == "ERROR":
+                if obj.get("code") == 410:
+                    # resourceVersion too old, re-list on the next round
+                    self._resource_version = None
+                self._watch.stop()
+                break
+            self._apply(event["type"], obj)
+            self._resource_version = obj["metadata"]["resourceVersion"]
+            if self._stop.is_set() or time.monotonic() >= deadline:
+                self._watch.stop()
+                break
+
+    def _run(self) -> None:
+        next_resync = 0.0
+        while not self._stop.is_set():
+            try:
+                if self._resource_version is None or time.monotonic() >= next_resync:
+                    self._list()
+                    next_resync = time.monotonic() + self.resync_seconds
+                self._watch_until(next_resync)
+            except ApiException as e:
+                if e.status == 410:
+                    self._resource_version = None
+                else:
+                    logging.warning(f"Volcano job watch failed: {e}")
+                    self._stop.wait(5)
+            except Exception:
+                logging.exception("Volcano job informer crashed, restarting")
+                self._stop.wait(5)
+
+
+vcjob_informer = VCJobInformer(
+    resync_seconds=settings.K8S_INFORMER_RESYNC_SECONDS,
+    watch_timeout_seconds=settings.K8S_INFORMER_WATCH_TIMEOUT_SECONDS,
+)
@@ -1,34 +1,77 @@
-from kubernetes import client, config
+import logging
+import re
+from typing import List, Optional
+
 from kubernetes.stream import stream
 
 from pinta.api.schemas.job import JobType
 from pinta.api.core.config import settings
+from pinta.api.kubernetes.api_client import core_v1_api, custom_objects_api, stream_core_v1_api
+from pinta.api.kubernetes.policy import kubernetes_call, timeout
 from pinta.api.models import Job
 
+VCJOB_NAME = re.compile(r"^pinta-job-(\d+)$")
 
-def get_vcjob(id: int):
-    if settings.K8S_DEBUG:
-        config.load_kube_config()
+# Volcano job phases after which the pods produce no more output
+TERMINAL_PHASES = {"Completed", "Failed", "Aborted", "Terminated"}
+
+
+def vcjob_id(obj: dict) -> Optional[int]:
+    match = VCJOB_NAME.match(obj.get("metadata", {}).get("name", ""))
+    return int(match.group(1)) if match else None
+
+
+def vcjob_phase(obj: dict) -> Optional[str]:
+    return obj.get("status", {}).get("state", {}).get("phase")
+
+
+def phase_to_status(phase: str) -> str:
+    if phase == "Pending":
+        return "scheduled"
+    elif phase == "Running":
+        return "running"
+    elif phase == "Completed":
+        return "completed"
     else:
-        config.load_incluster_config()
-    api = client.CustomObjectsApi()
+        return "error"
+
+
+@kubernetes_call(idempotent=True)
+def get_vcjob(id: int):
+    api = custom_objects_api()
     api_response = api.get_namespaced_custom_object(
         group="batch.volcano.sh",
         version="v1alpha1",
         namespace="default",
         plural="jobs",
-        name="pinta-job-" + str(id)
+        name="pinta-job-" + str(id),
+        _request_timeout=timeout("get_vcjob")
     )
     return api_response
 
 
-def create_pintajob(job_in: Job, volumes):
-    if settings.K8S_DEBUG:
-        config.load_kube_config()
-    else:
-        config.load_incluster_config()
-    api = client.CustomObjectsApi()
+@kubernetes_call(idempotent=True)
+def list_vcjobs(limit: int = settings.K8S_LIST_PAGE_SIZE, _continue: Optional[str] = None):
+    """
+    A page of the Volcano jobs of the namespace, callers match them to jobs by
+    name with vcjob_id(). The first page is served from the API server's watch
+    cache instead of etcd, the next ones continue from its continue token.
+    """
+    api = custom_objects_api()
+    page = dict(_continue=_continue) if _continue else dict(resource_version="0")
+    api_response = api.list_namespaced_custom_object(
+        group="batch.volcano.sh",
+        version="v1alpha1",
+        namespace="default",
+        plural="jobs",
+        limit=limit,
+        _request_timeout=timeout("list_vcjobs"),
+        **page
+    )
+    return api_response
+
 
+def pintajob_body(job_in: Job, volumes) -> dict:
     spec = {
         "type": job_in.type,
         "volumes": volumes
@@ -111,29 +154,35 @@ def create_pintajob(job_in: Job, volumes):
         },
         "spec": spec
     }
+    return ptjob
+
 
+@kubernetes_call(idempotent=False)
+def create_pintajob(job_in: Job, volumes):
+    api = custom_objects_api()
     api_response = api.create_namespaced_custom_object(
         group="pinta.qed.usc.edu",
         version="v1",
         namespace="default",
         plural="pintajobs",
-        body=ptjob
+        body=pintajob_body(job_in, volumes),
+        _request_timeout=timeout("create_pintajob")
     )
     return api_response
 
 
-def commit_image_builder(name: str, id: int, username: str):
-    if settings.K8S_DEBUG:
-        config.load_kube_config()
-    else:
-        config.load_incluster_config()
-    api = client.CoreV1Api()
-    exec_command = [
+def commit_image_builder_command(name: str, username: str) -> List[str]:
+    return [
         "/bin/sh",
         "-c",
         f"docker commit image-builder-container {settings.REGISTRY_SERVER}/{username}/{name}; "
         f"docker push {settings.REGISTRY_SERVER}/{username}/{name}"
     ]
+
+
+def commit_image_builder(name: str, id: int, username: str):
+    api = stream_core_v1_api()
+    exec_command = commit_image_builder_command(name, username)
     resp = stream(
         func=api.connect_get_namespaced_pod_exec,
         name=f"pinta-job-{id}-image-builder-0",
@@ -143,39 +192,27 @@ def commit_image_builder(name: str, id: int, username: str):
         stderr=True, stdin=False,
         stdout=True, tty=False
     )
-    print("Response: " + resp)
-    api = client.CustomObjectsApi()
-    api_response = api.delete_namespaced_custom_object(
-        group="pinta.qed.usc.edu",
-        version="v1",
-        namespace="default",
-        plural="pintajobs",
-        name="pinta-job-" + str(id)
-    )
-    return api_response
+    logging.info(f"Committed image {name} of job {id}: {resp}")
+    return resp
 
 
+@kubernetes_call(idempotent=False)
 def delete_pintajob(id: int):
-    if settings.K8S_DEBUG:
-        config.load_kube_config()
-    else:
-        config.load_incluster_config()
-    api = client.CustomObjectsApi()
+    api = custom_objects_api()
     api_response = api.delete_namespaced_custom_object(
         group="pinta.qed.usc.edu",
         version="v1",
         namespace="default",
         plural="pintajobs",
-        name="pinta-job-" + str(id)
+        name="pinta-job-" + str(id),
+        _request_timeout=timeout("delete_pintajob")
     )
     return api_response
 
 
+@kubernetes_call(idempotent=True)
 def get_pintajob_log(id: int, role: str, num: int):
-    if settings.K8S_DEBUG:
-        config.load_kube_config()
-    else:
-        config.load_incluster_config()
-    api = client.CoreV1Api()
-    api_response = api.read_namespaced_pod_log(f"pinta-job-{id}-{role}-{num}", "default")
+    api = core_v1_api()
+    api_response = api.read_namespaced_pod_log(f"pinta-job-{id}-{role}-{num}", "default",
+                                               _request_timeout=timeout("get_pintajob_log"))
     return api_response
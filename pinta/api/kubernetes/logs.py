@@ -0,0 +1,225 @@
+import asyncio
+import heapq
+import logging
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from aiohttp import ClientResponse
+from kubernetes_asyncio.client.rest import ApiException
+
+from pinta.api.core.breaker import CircuitOpenError
+from pinta.api.core.config import settings
+from pinta.api.kubernetes.aio.job import open_pod_log
+from pinta.api.models import Job
+from pinta.api.schemas.job import JobType
+
+
+def job_pods(job: Job) -> List[Tuple[str, int]]:
+    """
+    (role, index) of every pod of a job.
+    """
+    pods = []
+    master_role = JobType.master_role(job.type)
+    if master_role:
+        pods += [(master_role, num) for num in range(job.num_masters or 0)]
+    pods += [(JobType.replica_role(job.type), num) for num in range(job.num_replicas or 0)]
+    return pods
+
+
+def split_timestamp(line: bytes) -> Tuple[bytes, bytes]:
+    """
+    Split a line read with timestamps=True into a sortable timestamp key and
+    the original line. The kubelet trims trailing zeros from the RFC3339Nano
+    fraction, so it is padded back to nine digits for comparison.
+    """
+    timestamp, sep, rest = line.partition(b" ")
+    if not sep:
+        return b"", line
+    seconds, _, fraction = timestamp.rstrip(b"Z").partition(b".")
+    return seconds + b"." + fraction.ljust(9, b"0"), rest
+
+
+async def iter_pod_log_lines(resp: ClientResponse) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            line = await resp.content.readline()
+            if not line:
+                break
+            yield line
+    finally:
+        resp.release()
+
+
+async def merge_log_lines(
+    sources: List[Tuple[bytes, AsyncIterator[bytes]]],
+    timestamps: bool = False,
+    idle_timeout: Optional[float] = None
+) -> AsyncIterator[bytes]:
+    """
+    k-way merge of timestamped log lines from several pods, ordered by the
+    kubelet timestamp and prefixed with the source's prefix.
+
+    A line is only emitted once every source has a line waiting, so the
+    output is strictly ordered for finished logs. When following, a source
+    that stays quiet for `idle_timeout` seconds stops holding back the others
+    until it produces again.
+    """
+    iterators = [iterator for _, iterator in sources]
+    pending: Dict[int, asyncio.Future] = {
+        i: asyncio.ensure_future(iterator.__anext__()) for i, iterator in enumerate(iterators)
+    }
+    idle: Set[int] = set()
+    heap: List[Tuple[bytes, int, bytes, bytes]] = []
+    try:
+        while pending or heap:
+            waiting = [task for i, task in pending.items() if i not in idle]
+            if waiting:
+                _, not_done = await asyncio.wait(waiting, timeout=idle_timeout)
+                idle.update(i for i, task in pending.items() if task in not_done)
+            elif not heap:
+                await asyncio.wait(list(pending.values()), return_when=asyncio.FIRST_COMPLETED)
+            for i, task in list(pending.items()):
+                if not task.done():
+                    continue
+                del pending[i]
+                idle.discard(i)
+                try:
+                    line = task.result()
+                except StopAsyncIteration:
+                    continue
+                key, rest = split_timestamp(line)
+                heapq.heappush(heap, (key, i, line, rest))
+            if heap:
+                _, i, line, rest = heapq.heappop(heap)
+                yield sources[i][0] + (line if timestamps else rest)
+                pending[i] = asyncio.ensure_future(iterators[i].__anext__())
+    finally:
+        for task in pending.values():
+            task.cancel()
+        await asyncio.gather(*pending.values(), return_exceptions=True)
+        for iterator in iterators:
+            await iterator.aclose()
+
+
+async def open_job_logs(id: int, pods: List[Tuple[str, int]], **params) -> List[Tuple[bytes, AsyncIterator[bytes]]]:
+    """
+    Open the timestamped logs of several pods concurrently. Pods whose log
+    cannot be read are skipped, unless none can be read.
+    """
+    results = await asyncio.gather(
+        *[open_pod_log(f"pinta-job-{id}-{role}-{num}", timestamps=True, **params) for role, num in pods],
+        return_exceptions=True
+    )
+    sources = []
+    errors = []
+    for (role, num), result in zip(pods, results):
+        if isinstance(result, ApiException):
+            errors.append(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            sources.append((f"[{role}-{num}] ".encode(), iter_pod_log_lines(result)))
+    if errors and not sources:
+        raise errors[0]
+    return sources
+
+
+class _Upstream:
+    def __init__(self, pod: str, container: str, on_done: Callable[["_Upstream"], None]):
+        self.pod = pod
+        self.container = container
+        self.on_done = on_done
+        self.subscribers: List[asyncio.Queue] = []
+        self.task: Optional[asyncio.Task] = None
+        # The last lines seen, replayed to subscribers joining later
+        self.recent: Deque[bytes] = deque(maxlen=settings.LOG_FOLLOW_TAIL_LINES)
+
+    def publish(self, item: Optional[bytes]) -> None:
+        if item is not None:
+            self.recent.append(item)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Too slow to keep up, cut it off rather than buffer without bound
+                self.subscribers.remove(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def run(self) -> None:
+        try:
+            resp = await open_pod_log(self.pod,
+                                      container=self.container or None,
+                                      follow=True,
+                                      timestamps=True,
+                                      tail_lines=settings.LOG_FOLLOW_TAIL_LINES)
+            async for line in iter_pod_log_lines(resp):
+                self.publish(line)
+        except ApiException as e:
+            logging.warning(f"Cannot follow log of {self.pod}: {e.reason}")
+        except CircuitOpenError as e:
+            logging.warning(f"Cannot follow log of {self.pod}: {e}")
+        finally:
+            self.publish(None)
+            self.on_done(self)
+
+
+class LogHub:
+    """
+    Shares one upstream log follow per pod among all subscribers. The
+    upstream is opened by the first subscriber and closed when the last one
+    leaves. Later subscribers start with a replay of the last
+    LOG_FOLLOW_TAIL_LINES lines, the same tail the first one got from the
+    API server.
+    """
+    def __init__(self):
+        self._upstreams: Dict[Tuple[str, str], _Upstream] = {}
+
+    def upstream_count(self) -> int:
+        return len(self._upstreams)
+
+    def _forget(self, upstream: _Upstream) -> None:
+        key = (upstream.pod, upstream.container)
+        if self._upstreams.get(key) is upstream:
+            del self._upstreams[key]
+
+    async def subscribe(self, pod: str, container: str = "") -> AsyncIterator[bytes]:
+        """
+        Yield the timestamped lines of a pod log, starting with the recent
+        ones, as they arrive.
+        """
+        key = (pod, container)
+        upstream = self._upstreams.get(key)
+        if upstream is None:
+            upstream = self._upstreams[key] = _Upstream(pod, container, self._forget)
+            upstream.task = asyncio.ensure_future(upstream.run())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LOG_SUBSCRIBER_QUEUE_SIZE)
+        # Taken together with joining so no line is missed or repeated
+        replay = list(upstream.recent)
+        upstream.subscribers.append(queue)
+        try:
+            for line in replay:
+                yield line
+            while True:
+                line = await queue.get()
+                if line is None:
+                    break
+                yield line
+        finally:
+            if queue in upstream.subscribers:
+                upstream.subscribers.remove(queue)
+            if not upstream.subscribers:
+                self._forget(upstream)
+                upstream.task.cancel()
+
+
+log_hub = LogHub()
+
+
+def follow_job_logs(id: int, pods: List[Tuple[str, int]], container: str = "") -> List[Tuple[bytes, AsyncIterator[bytes]]]:
+    """
+    Follow the logs of several pods through the shared hub.
+    """
+    return [(f"[{role}-{num}] ".encode(), log_hub.subscribe(f"pinta-job-{id}-{role}-{num}", container))
+            for role, num in pods]
@@ -0,0 +1,111 @@
+import asyncio
+import functools
+from typing import Callable, Tuple, TypeVar
+
+import aiohttp
+import urllib3
+from kubernetes.client.rest import ApiException as SyncApiException
+from kubernetes_asyncio.client.rest import ApiException as AsyncApiException
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from pinta.api.core.breaker import CircuitBreaker, CircuitOpenError
+from pinta.api.core.config import settings
+from pinta.api.core.metrics import Counter
+
+F = TypeVar("F", bound=Callable)
+
+API_EXCEPTIONS = (SyncApiException, AsyncApiException)
+# Raised by the clients when the API server does not answer in time or at all
+CONNECTION_ERRORS = (asyncio.TimeoutError, aiohttp.ClientError, urllib3.exceptions.HTTPError, ConnectionError)
+# Besides 429 and 5xx, no answer to expect from the API server for now
+UNAVAILABLE = (CircuitOpenError,) + CONNECTION_ERRORS
+
+# One breaker for the API server, shared by the sync and the asyncio helpers
+api_server_breaker = CircuitBreaker("Kubernetes API server",
+                                    settings.K8S_BREAKER_FAILURES,
+                                    settings.K8S_BREAKER_RESET_SECONDS)
+retries = Counter()
+
+
+def timeout(op: str) -> Tuple[float, float]:
+    """
+    (connect, read) timeout of an operation, as taken by the sync client.
+    """
+    return settings.K8S_TIMEOUTS.get(op, settings.K8S_TIMEOUT)
+
+
+def aio_timeout(op: str) -> aiohttp.ClientTimeout:
+    connect, read = timeout(op)
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+
+
+def is_throttled(e: BaseException) -> bool:
+    return isinstance(e, API_EXCEPTIONS) and e.status == 429
+
+
+def is_transient(e: BaseException) -> bool:
+    """
+    Whether the API server failed to answer, as opposed to rejecting the call.
+    """
+    if isinstance(e, API_EXCEPTIONS):
+        return not e.status or e.status == 429 or e.status >= 500
+    return isinstance(e, CONNECTION_ERRORS)
+
+
+def _record(e: BaseException) -> None:
+    if is_transient(e):
+        api_server_breaker.failure()
+    elif isinstance(e, API_EXCEPTIONS):
+        # A 404 or a 409 is the API server working
+        api_server_breaker.success()
+    else:
+        api_server_breaker.abandon()
+
+
+def kubernetes_call(*, idempotent: bool) -> Callable[[F], F]:
+    """
+    Call policy of the Kubernetes helpers, sync or asyncio. Each attempt goes
+    through the circuit breaker and fails fast with CircuitOpenError while it
+    is open. Idempotent calls are retried on transient errors, the others only
+    when throttled, since a 5xx or a timeout does not say if the write happened.
+
+    The helper passes timeout() or aio_timeout() of its operation to the client.
+    """
+    retrying = retry(stop=stop_after_attempt(settings.K8S_RETRY_ATTEMPTS),
+                     wait=wait_random_exponential(multiplier=0.1, max=settings.K8S_RETRY_MAX_WAIT_SECONDS),
+                     retry=retry_if_exception(is_transient if idempotent else is_throttled),
+                     before_sleep=lambda retry_state: retries.inc(),
+                     reraise=True)
+
+    def decorator(fn: F) -> F:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def attempt(*args, **kwargs):
+                api_server_breaker.before_call()
+                try:
+                    result = await fn(*args, **kwargs)
+                except asyncio.CancelledError:
+                    api_server_breaker.abandon()
+                    raise
+                except Exception as e:
+                    _record(e)
+                    raise
+                api_server_breaker.success()
+                return result
+        else:
+            @functools.wraps(fn)
+            def attempt(*args, **kwargs):
+                api_server_breaker.before_call()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    _record(e)
+                    raise
+                api_server_breaker.success()
+                return result
+        return retrying(attempt)
+    return decorator
+
+
+def stats() -> dict:
+    return dict(breaker=api_server_breaker.snapshot(), retries=retries.value)
@@ -0,0 +1,141 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from pinta.api.core.config import settings
+from pinta.api.core.events import job_event_bus
+from pinta.api.db.session import SessionLocal
+from pinta.api.kubernetes.job import TERMINAL_PHASES, phase_to_status
+from pinta.api.models import Job
+from pinta.api.schemas.job import JobStatus
+
+# Rounds a change is kept for a job that is not in the table yet
+MAX_ATTEMPTS = 10
+
+
+def _parse_time(value: Optional[str]) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+
+class JobStatusReconciler:
+    """
+    Persists the phase of Volcano jobs, as seen by the informer, into the
+    jobs table so that job status can be read, filtered and sorted with
+    plain queries.
+
+    Changes are collapsed per job and written every `interval` seconds in a
+    single batched UPDATE, skipping jobs whose stored phase is already
+    current. Status changes are then published on the job event bus.
+    """
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._pending: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-status-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def on_phase_change(self, id: int, phase: str, obj: dict) -> None:
+        """
+        Informer listener, called from the informer thread.
+        """
+        state = obj.get("status", {}).get("state", {})
+        with self._lock:
+            self._pending[id] = dict(phase=phase,
+                                     reason=state.get("reason"),
+                                     message=state.get("message"),
+                                     changed_at=_parse_time(state.get("lastTransitionTime")))
+
+    def _requeue(self, changes: Dict[int, dict]) -> None:
+        with self._lock:
+            for id, change in changes.items():
+                # Keep a newer change that arrived meanwhile
+                self._pending.setdefault(id, change)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+        self.flush()
+
+    def flush(self) -> int:
+        """
+        Write the pending changes. Returns the number of updated jobs.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        db = SessionLocal()
+        try:
+            mappings = []
+            events = []
+            found = set()
+            rows = db.query(Job.id, Job.owner_id, Job.status, Job.phase, Job.started_at) \
+                .filter(Job.id.in_(list(pending)))
+            for id, owner_id, status, phase, started_at in rows:
+                found.add(id)
+                change = pending[id]
+                if change["phase"] == phase:
+                    continue
+                values = self._values(id, change, started_at)
+                mappings.append(values)
+                if values["status"] != status:
+                    events.append(dict(job_id=id,
+                                       owner_id=owner_id,
+                                       old_status=status.value if status else None,
+                                       new_status=values["status"].value,
+                                       timestamp=values["phase_changed_at"].isoformat() + "Z"))
+            if mappings:
+                db.bulk_update_mappings(Job, mappings)
+                db.commit()
+                job_event_bus.publish_threadsafe(events)
+            # Jobs created in a transaction that has not committed yet
+            self._requeue({id: dict(change, attempts=change.get("attempts", 0) + 1)
+                           for id, change in pending.items()
+                           if id not in found and change.get("attempts", 0) < MAX_ATTEMPTS})
+            return len(mappings)
+        except Exception:
+            logging.exception("Failed to persist job status, retrying")
+            db.rollback()
+            self._requeue(pending)
+            return 0
+        finally:
+            db.close()
+
+    @staticmethod
+    def _values(id: int, change: dict, started_at: Optional[datetime]) -> dict:
+        # Every mapping has the same keys, so they all go in one executemany
+        phase, changed_at = change["phase"], change["changed_at"]
+        status = JobStatus(phase_to_status(phase))
+        failure_reason = None
+        if status == JobStatus.error:
+            failure_reason = ": ".join(part for part in (change["reason"], change["message"]) if part) or None
+        return dict(id=id,
+                    status=status,
+                    phase=phase,
+                    phase_changed_at=changed_at,
+                    started_at=started_at or (changed_at if phase == "Running" else None),
+                    finished_at=changed_at if phase in TERMINAL_PHASES else None,
+                    failure_reason=failure_reason)
+
+
+job_status_reconciler = JobStatusReconciler(interval=settings.K8S_STATUS_RECONCILE_SECONDS)
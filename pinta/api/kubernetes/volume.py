@@ -1,15 +1,13 @@
-from kubernetes import client, config
+from kubernetes import client
 
 from pinta.api.schemas.volume import Volume
 from pinta.api.core.config import settings
+from pinta.api.kubernetes.api_client import core_v1_api
+from pinta.api.kubernetes.policy import kubernetes_call, timeout
 
 
-def create_pvc(volume: Volume):
-    if settings.K8S_DEBUG:
-        config.load_kube_config()
-    else:
-        config.load_incluster_config()
-    pvc = client.V1PersistentVolumeClaim(
+def pvc_body(volume: Volume) -> client.V1PersistentVolumeClaim:
+    return client.V1PersistentVolumeClaim(
         metadata=client.V1ObjectMeta(
             name=f"pinta-volume-{volume.id}"
         ),
@@ -23,16 +21,25 @@ def create_pvc(volume: Volume):
             storage_class_name=settings.STORAGE_CLASS_NAME
         )
     )
-    api = client.CoreV1Api()
-    api_response = api.create_namespaced_persistent_volume_claim(namespace="default", body=pvc)
+
+
+@kubernetes_call(idempotent=False)
+def create_pvc(volume: Volume):
+    api = core_v1_api()
+    api_response = api.create_namespaced_persistent_volume_claim(
+        namespace="default",
+        body=pvc_body(volume),
+        _request_timeout=timeout("create_pvc")
+    )
     return api_response
 
 
+@kubernetes_call(idempotent=False)
 def delete_pvc(volume: Volume):
-    if settings.K8S_DEBUG:
-        config.load_kube_config()
-    else:
-        config.load_incluster_config()
-    api = client.CoreV1Api()
-    api_response = api.delete_namespaced_persistent_volume_claim(name=f"pinta-volume-{volume.id}", namespace="default")
+    api = core_v1_api()
+    api_response = api.delete_namespaced_persistent_volume_claim(
+        name=f"pinta-volume-{volume.id}",
+        namespace="default",
+        _request_timeout=timeout("delete_pvc")
+    )
     return api_response
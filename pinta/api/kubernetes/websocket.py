@@ -1,34 +1,185 @@
 import asyncio
-from typing import List
+from collections import deque
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Collection, Deque, List, Optional, Tuple
 
 import websockets
 from aiohttp import ClientWebSocketResponse, WSMsgType
-from kubernetes_asyncio import client, config
-from kubernetes_asyncio.client.api_client import ApiClient
-from kubernetes_asyncio.stream import WsApiClient
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
 from pinta.api.core.config import settings
+from pinta.api.kubernetes.aio.api_client import ws_core_v1_api
+from pinta.api.kubernetes.logs import log_hub, merge_log_lines, split_timestamp
 
+# channel.k8s.io channels whose frames may be concatenated. Error (3) and
+# resize (4) frames carry one JSON document each and are never merged.
+STDIN_CHANNELS = (0,)
+OUTPUT_CHANNELS = (1, 2)
 
-async def tunnel1(ws: WebSocket, resp: ClientWebSocketResponse):
+# Raised by either end once its peer has gone away
+CLOSED_ERRORS = (WebSocketDisconnect, websockets.exceptions.ConnectionClosed, ConnectionResetError)
+
+
+class FrameBuffer:
+    """
+    Bounded buffer of channel-prefixed frames between one reader and one
+    writer. A frame of a coalescable channel is appended to the last pending
+    frame of the same channel, up to `max_frame_bytes`, so a burst of small
+    upstream frames leaves as a few large ones.
+    """
+    def __init__(self, channels: Collection[int], max_frame_bytes: int, max_bytes: int):
+        self.channels = channels
+        self.max_frame_bytes = max_frame_bytes
+        self.max_bytes = max_bytes
+        self.frames: Deque[bytearray] = deque()
+        self.size = 0
+        self.closed = False
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+
+    def _growable(self, frame: bytearray) -> bool:
+        return frame[0] in self.channels and len(frame) < self.max_frame_bytes
+
+    async def put(self, frame: bytes) -> None:
+        # Blocks while the buffer is full, which stops reading from the sender
+        while self.size >= self.max_bytes:
+            self._writable.clear()
+            await self._writable.wait()
+        if self.frames and self.frames[-1][0] == frame[0] and self._growable(self.frames[-1]):
+            self.frames[-1] += frame[1:]
+            self.size += len(frame) - 1
+        else:
+            self.frames.append(bytearray(frame))
+            self.size += len(frame)
+        self._readable.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._readable.set()
+
+    async def get(self, deadline: float) -> Optional[bytes]:
+        """
+        Take the oldest frame, or None once the buffer is closed and empty. A
+        lone frame that can still grow is held back until `deadline`.
+        """
+        while not self.frames:
+            if self.closed:
+                return None
+            self._readable.clear()
+            await self._readable.wait()
+        loop = asyncio.get_running_loop()
+        while (len(self.frames) == 1 and self._growable(self.frames[0])
+               and self.size < self.max_bytes and not self.closed):
+            delay = deadline - loop.time()
+            if delay <= 0:
+                break
+            self._readable.clear()
+            try:
+                await asyncio.wait_for(self._readable.wait(), delay)
+            except asyncio.TimeoutError:
+                break
+        frame = self.frames.popleft()
+        self.size -= len(frame)
+        self._writable.set()
+        return bytes(frame)
+
+
+async def _pump(frames: AsyncGenerator[bytes, None], buffer: FrameBuffer) -> None:
+    try:
+        async for frame in frames:
+            await buffer.put(frame)
+    finally:
+        buffer.close()
+        await frames.aclose()
+
+
+async def _drain(buffer: FrameBuffer, send: Callable[[bytes], Awaitable[None]], flush_interval: float) -> None:
+    # A frame goes out right away if nothing was sent in the last
+    # flush_interval, otherwise it may wait out the rest of the interval.
+    loop = asyncio.get_running_loop()
+    last_sent = float("-inf")
     while True:
-        data = await ws.receive_bytes()
-        await resp.send_bytes(data)
+        frame = await buffer.get(last_sent + flush_interval)
+        if frame is None:
+            break
+        await send(frame)
+        last_sent = loop.time()
 
 
-async def tunnel2(resp: ClientWebSocketResponse, ws: WebSocket):
+async def forward(
+    frames: AsyncGenerator[bytes, None],
+    send: Callable[[bytes], Awaitable[None]],
+    channels: Collection[int] = ()
+) -> None:
+    """
+    Forward channel-prefixed frames through a bounded buffer, so a slow
+    receiver slows down the sender instead of growing a buffer without
+    bound. Returns when the frames are exhausted or either end is closed.
+    """
+    buffer = FrameBuffer(channels, settings.WS_PROXY_FRAME_BYTES, settings.WS_PROXY_BUFFER_BYTES)
+    pump = asyncio.ensure_future(_pump(frames, buffer))
+    drain = asyncio.ensure_future(_drain(buffer, send, settings.WS_PROXY_FLUSH_INTERVAL))
+    try:
+        await asyncio.wait([pump, drain], return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        pump.cancel()
+        drain.cancel()
+        results = await asyncio.gather(pump, drain, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, CLOSED_ERRORS):
+            raise result
+
+
+async def client_frames(ws: WebSocket) -> AsyncIterator[bytes]:
     while True:
-        data = await resp.receive_bytes()
-        await ws.send_bytes(data)
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            break
+        data = message.get("bytes") or (message.get("text") or "").encode()
+        if data:
+            yield data
+
+
+async def upstream_frames(resp: ClientWebSocketResponse) -> AsyncIterator[bytes]:
+    async for message in resp:
+        if message.type == WSMsgType.BINARY:
+            data = message.data
+        elif message.type == WSMsgType.TEXT:
+            data = message.data.encode()
+        else:
+            break
+        if data:
+            yield data
+
+
+async def _discard(data: bytes) -> None:
+    pass
+
+
+async def proxy(
+    ws: WebSocket,
+    frames: AsyncGenerator[bytes, None],
+    send_upstream: Callable[[bytes], Awaitable[None]] = _discard
+) -> None:
+    """
+    Run both directions between the client websocket and an upstream until
+    either side closes, then stop the other one.
+    """
+    tasks = [
+        asyncio.ensure_future(forward(client_frames(ws), send_upstream, STDIN_CHANNELS)),
+        asyncio.ensure_future(forward(frames, ws.send_bytes, OUTPUT_CHANNELS)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        task.result()
 
 
 async def exec_proxy(ws: WebSocket, pod: str, command: List[str], tty: bool, container: str = ""):
-    if settings.K8S_DEBUG:
-        await config.load_kube_config()
-    else:
-        await config.load_incluster_config()
-    api = client.CoreV1Api(WsApiClient())
+    api = await ws_core_v1_api()
     resp = await api.connect_get_namespaced_pod_exec(pod,
                                                      "default",
                                                      command=command,
@@ -36,35 +187,31 @@ async def exec_proxy(ws: WebSocket, pod: str, command: List[str], tty: bool, con
                                                      stderr=True, stdin=True,
                                                      stdout=True, tty=tty,
                                                      _preload_content=False)
-    t1 = asyncio.create_task(tunnel1(ws, resp))
-    t2 = asyncio.create_task(tunnel2(resp, ws))
     try:
-        await asyncio.gather(t1, t2)
-    except TypeError:
-        pass
-    except WebSocketDisconnect:
-        pass
+        await proxy(ws, upstream_frames(resp), resp.send_bytes)
     finally:
         await resp.close()
 
 
-async def log_proxy(ws: WebSocket, pod: str, container: str = ""):
-    if settings.K8S_DEBUG:
-        await config.load_kube_config()
-    else:
-        await config.load_incluster_config()
-    api = client.CoreV1Api(ApiClient())
-    resp = await api.read_namespaced_pod_log(pod,
-                                             "default",
-                                             container=container,
-                                             tail_lines=100,
-                                             follow=True,
-                                             _preload_content=False)
+async def _log_frames(lines: AsyncGenerator[bytes, None]) -> AsyncIterator[bytes]:
     try:
-        while True:
-            line = await resp.content.readline()
-            if not line:
-                break
-            await ws.send_bytes(bytes([1]) + line)
-    except websockets.exceptions.ConnectionClosedOK:
-        pass
+        async for line in lines:
+            yield bytes([1]) + line
+    finally:
+        await lines.aclose()
+
+
+async def _strip_timestamps(lines: AsyncGenerator[bytes, None]) -> AsyncIterator[bytes]:
+    try:
+        async for line in lines:
+            yield split_timestamp(line)[1]
+    finally:
+        await lines.aclose()
+
+
+async def log_proxy(ws: WebSocket, pod: str, container: str = ""):
+    await proxy(ws, _log_frames(_strip_timestamps(log_hub.subscribe(pod, container))))
+
+
+async def merged_log_proxy(ws: WebSocket, sources: List[Tuple[bytes, AsyncIterator[bytes]]]):
+    await proxy(ws, _log_frames(merge_log_lines(sources, idle_timeout=settings.LOG_MERGE_IDLE_SECONDS)))
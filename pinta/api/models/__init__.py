@@ -1,4 +1,6 @@
 from .user import User
 from .job import Job
+from .job_log import JobLog
 from .volume import Volume
 from .image import Image
+from .refresh_token import RefreshToken
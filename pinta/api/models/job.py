@@ -1,23 +1,30 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Enum, Boolean
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from pinta.api.db.base_class import Base
-from pinta.api.schemas.job import JobType
+from pinta.api.schemas.job import JobStatus, JobType
 
 if TYPE_CHECKING:
     from .user import User  # noqa: F401
+    from .job_log import JobLog  # noqa: F401
 
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Keyset pagination of a user's jobs
+        Index("ix_jobs_owner_id_id", "owner_id", "id"),
+        Index("ix_jobs_owner_id_name", "owner_id", "name"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
-    description = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    description = Column(String)
     type = Column(Enum(JobType))
-    image = Column(String, index=True)
+    image = Column(String)
     volumes = Column(String)
     working_dir = Column(String)
     master_command = Column(String)
@@ -27,5 +34,17 @@ class Job(Base):
     ports = Column(String)
     scheduled = Column(Boolean)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # Set by every INSERT and UPDATE, part of the list ETags. In UTC, and from
+    # the clock rather than now(), which is the start of the transaction
+    updated_at = Column(DateTime, default=func.timezone("UTC", func.clock_timestamp()),
+                        onupdate=func.timezone("UTC", func.clock_timestamp()))
+    # Kept up to date by the status reconciler
+    status = Column(Enum(JobStatus), index=True)
+    phase = Column(String)
+    phase_changed_at = Column(DateTime, index=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    failure_reason = Column(String)
 
     owner = relationship("User", back_populates="jobs")
+    logs = relationship("JobLog", primaryjoin="Job.id == foreign(JobLog.job_id)", viewonly=True)
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+
+from pinta.api.db.base_class import Base
+from pinta.api.schemas.job import JobType
+
+if TYPE_CHECKING:
+    from .job import Job  # noqa: F401
+
+
+class JobLog(Base):
+    """
+    Archived log of one pod of a job. The archive outlives the job row, so
+    job_id is not a foreign key and the owner and type are kept here.
+    """
+    __tablename__ = "job_logs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, index=True, nullable=False)
+    job_type = Column(Enum(JobType))
+    owner_id = Column(Integer, ForeignKey("users.id"))
+    role = Column(String, nullable=False)
+    num = Column(Integer, nullable=False)
+    container = Column(String, nullable=False, default="")
+    path = Column(String, nullable=False)
+    lines = Column(Integer)
+    size = Column(Integer)
+    compressed_size = Column(Integer)
+    segments = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    job = relationship("Job", primaryjoin="foreign(JobLog.job_id) == Job.id", viewonly=True)
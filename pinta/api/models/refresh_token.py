@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+
+from pinta.api.db.base_class import Base
+
+if TYPE_CHECKING:
+    from .user import User  # noqa: F401
+
+
+class RefreshToken(Base):
+    """
+    Refresh token of a user. Only the SHA-256 of the token is stored, the
+    tokens are random enough that a slow hash would add nothing.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String, nullable=False, unique=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)
+
+    user = relationship("User")
@@ -1,7 +1,8 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Boolean, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from pinta.api.db.base_class import Base
 
@@ -11,12 +12,21 @@ if TYPE_CHECKING:
 
 class Volume(Base):
     __tablename__ = "volumes"
+    __table_args__ = (
+        # Keyset pagination of a user's volumes
+        Index("ix_volumes_owner_id_id", "owner_id", "id"),
+        Index("ix_volumes_owner_id_name", "owner_id", "name", unique=True),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
-    description = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    description = Column(String)
     capacity = Column(String)
     is_public = Column(Boolean)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # Set by every INSERT and UPDATE, part of the list ETags. In UTC, and from
+    # the clock rather than now(), which is the start of the transaction
+    updated_at = Column(DateTime, default=func.timezone("UTC", func.clock_timestamp()),
+                        onupdate=func.timezone("UTC", func.clock_timestamp()))
 
     owner = relationship("User", back_populates="volumes")
@@ -4,3 +4,5 @@ from .user import User, UserCreate, UserInDB, UserUpdate
 from .job import *
 from .volume import Volume, VolumeCreate, VolumeInDB, VolumeUpdate
 from .image import Image, ImageCreate, ImageInDB, ImageUpdate
+from .job_log import JobLog, JobLogCreate, JobLogUpdate
+from .refresh_token import RefreshTokenCreate, RefreshTokenUpdate
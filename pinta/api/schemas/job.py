@@ -1,7 +1,12 @@
+import itertools
+import re
+from datetime import datetime
 from enum import Enum
-from typing import Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator
+
+from pinta.api.core.config import settings
 
 
 class JobType(str, Enum):
@@ -245,6 +250,71 @@ class ImageBuilderJob(ImageBuilderJobSpec, BaseSpec):
         return self.schedule
 
 
+BATCH_JOB_TYPES = {
+    JobType.symmetric: SymmetricJob,
+    JobType.ps_worker: PSWorkerJob,
+    JobType.mpi: MPIJob,
+}
+
+PLACEHOLDER = re.compile(r"{{\s*(\w+)\s*}}")
+
+
+def _substitute(value: Any, params: Dict[str, Any]) -> Any:
+    if not isinstance(value, str):
+        return value
+    match = PLACEHOLDER.fullmatch(value)
+    if match:
+        # A lone placeholder keeps the type of the parameter, e.g. for num_replicas
+        return params[match.group(1)]
+    return PLACEHOLDER.sub(lambda m: str(params[m.group(1)]), value)
+
+
+class JobBatchCreate(BaseModel):
+    """
+    A batch of jobs, given either as a list of job specifications, or as a
+    template and a parameter grid. The template is expanded once for every
+    combination of grid values, replacing {{name}} placeholders in its string
+    fields.
+    """
+    jobs: List[Union[SymmetricJob, PSWorkerJob, MPIJob]] = Field([], description="Job specifications.")
+    type: Optional[JobType] = Field(None, description="Type of the jobs created from the template.")
+    template: Optional[Dict[str, Any]] = Field(None, description="Job specification with {{name}} placeholders.")
+    grid: Dict[str, List[Any]] = Field({}, description="Values of every placeholder in the template.")
+    atomic: bool = Field(False, description="If set to true, nothing is created unless every job can be. "
+                                            "If set to false, the jobs that fail are dropped and the rest kept.")
+
+    @root_validator(skip_on_failure=True)
+    def expand_template(cls, values):
+        template, job_type, grid = values.get("template"), values.get("type"), values.get("grid")
+        if template is None:
+            if not values.get("jobs"):
+                raise ValueError("Either jobs or a template is required")
+            if len(values["jobs"]) > settings.JOB_BATCH_MAX_SIZE:
+                raise ValueError(f"More than {settings.JOB_BATCH_MAX_SIZE} jobs")
+            return values
+        if values.get("jobs"):
+            raise ValueError("Jobs and a template cannot be combined")
+        if job_type not in BATCH_JOB_TYPES:
+            raise ValueError(f"Type must be one of {', '.join(BATCH_JOB_TYPES)}")
+        size = 1
+        for choices in grid.values():
+            size *= len(choices)
+        if size > settings.JOB_BATCH_MAX_SIZE:
+            raise ValueError(f"The grid expands to more than {settings.JOB_BATCH_MAX_SIZE} jobs")
+        names = list(grid)
+        missing = {name for value in template.values() if isinstance(value, str)
+                   for name in PLACEHOLDER.findall(value)} - set(names)
+        if missing:
+            raise ValueError(f"No grid values for {', '.join(sorted(missing))}")
+        values["jobs"] = [
+            BATCH_JOB_TYPES[job_type].parse_obj(
+                {key: _substitute(value, dict(zip(names, combination))) for key, value in template.items()}
+            )
+            for combination in itertools.product(*(grid[name] for name in names))
+        ]
+        return values
+
+
 # Properties to receive on item creation
 class JobCreate(BaseSpec):
     type: JobType
@@ -293,6 +363,8 @@ class JobStatus(str, Enum):
     running = "running"
     completed = "completed"
     error = "error"
+    # Not persisted, the Kubernetes API server could not be asked
+    unknown = "unknown"
 
 
 # Additional properties to return to client via API
@@ -302,6 +374,29 @@ class Job(JobInDBBase):
 
 class JobWithStatus(Job):
     status: Optional[JobStatus] = None
+    phase: Optional[str] = Field(None, description="Phase of the Volcano job.")
+    phase_changed_at: Optional[datetime] = Field(None, description="Time of the last phase change.")
+    started_at: Optional[datetime] = Field(None, description="Time the job first started running.")
+    finished_at: Optional[datetime] = Field(None, description="Time the job completed or failed.")
+    failure_reason: Optional[str] = Field(None, description="Reason reported by Volcano when the job failed.")
+
+
+class JobOrder(str, Enum):
+    id = "id"
+    name = "name"
+    status = "status"
+    phase_changed_at = "phase_changed_at"
+    started_at = "started_at"
+    finished_at = "finished_at"
+
+
+class JobBatchResult(BaseModel):
+    """
+    Outcome of one job of a batch, in the order of the request.
+    """
+    index: int
+    job: Optional[Job] = None
+    error: Optional[str] = None
 
 
 # Additional properties stored in DB
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from pinta.api.schemas.job import JobType
+
+
+# Shared properties
+class JobLogBase(BaseModel):
+    job_id: Optional[int] = Field(None, description="Job the log belongs to.")
+    job_type: Optional[JobType] = Field(None, description="Type of the job.")
+    owner_id: Optional[int] = Field(None, description="Owner of the job.")
+    role: Optional[str] = Field(None, description="Role of the pod.")
+    num: Optional[int] = Field(None, description="Index of the pod within its role.")
+    container: str = Field("", description="Container the log was read from, empty for the default one.")
+    path: Optional[str] = Field(None, description="Archive directory, relative to LOG_ARCHIVE_DIR.")
+    lines: Optional[int] = Field(None, description="Number of lines.")
+    size: Optional[int] = Field(None, description="Uncompressed size in bytes, timestamps included.")
+    compressed_size: Optional[int] = Field(None, description="Size on disk in bytes.")
+    segments: Optional[int] = Field(None, description="Number of gzip segments.")
+
+
+# Properties to receive on archive creation
+class JobLogCreate(JobLogBase):
+    job_id: int
+    role: str
+    num: int
+    path: str
+
+
+# Properties to receive on archive update
+class JobLogUpdate(JobLogBase):
+    pass
+
+
+# Properties shared by models stored in DB
+class JobLogInDBBase(JobLogBase):
+    id: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+# Properties to return to client
+class JobLog(JobLogInDBBase):
+    pass
@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Properties to receive on token creation
+class RefreshTokenCreate(BaseModel):
+    user_id: int
+    token_hash: str
+    expires_at: datetime
+
+
+# Properties to receive on token update
+class RefreshTokenUpdate(BaseModel):
+    revoked_at: Optional[datetime] = None
@@ -6,7 +6,9 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    exp: Optional[int] = None
@@ -0,0 +1,49 @@
+from typing import Optional
+
+import pytest
+from fastapi import Request, Response
+
+from pinta.api.api.etag import check_etag, etag_matches, make_etag
+
+
+def make_request(if_none_match: Optional[str] = None, query: str = "") -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": query.encode(),
+                    "headers": headers})
+
+
+def test_make_etag() -> None:
+    etag = make_etag(1, "a")
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert make_etag(1, "a") == etag
+    assert make_etag(2, "a") != etag
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('"other", W/"abc"', True),
+    ('"other"', False),
+    ("*", True),
+])
+def test_etag_matches(header: Optional[str], expected: bool) -> None:
+    assert etag_matches(make_request(header), 'W/"abc"') is expected
+
+
+def test_check_etag() -> None:
+    response = Response()
+    assert check_etag(make_request(), response, 1, "2020-01-01") is None
+    etag = response.headers["etag"]
+    not_modified = check_etag(make_request(etag), Response(), 1, "2020-01-01")
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+
+def test_check_etag_changed() -> None:
+    response = Response()
+    check_etag(make_request(), response, 1, "2020-01-01")
+    etag = response.headers["etag"]
+    assert check_etag(make_request(etag), Response(), 1, "2020-01-02") is None
+    # Another page of the same rows is another representation
+    assert check_etag(make_request(etag, "limit=1"), Response(), 1, "2020-01-01") is None
@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from pinta.api import models
+from pinta.api.api.endpoints import util
+from pinta.api.kubernetes.informer import VCJobInformer
+
+
+def vcjob(id: int, phase: str = None) -> dict:
+    obj = {"metadata": {"name": f"pinta-job-{id}"}}
+    if phase is not None:
+        obj["status"] = {"state": {"phase": phase}}
+    return obj
+
+
+def make_jobs(updated_at: datetime) -> list:
+    return [models.Job(id=id, scheduled=True, updated_at=updated_at) for id in (1, 2, 3)]
+
+
+def statuses(jobs: list) -> list:
+    return [job.status for job in jobs]
+
+
+def synced_informer(listed_at: datetime) -> VCJobInformer:
+    informer = VCJobInformer()
+    informer._phases = {1: "Running", 2: None}
+    informer._synced_at = listed_at
+    informer._synced.set()
+    return informer
+
+
+def test_patch_job_status_with_informer(monkeypatch) -> None:
+    listed_at = datetime.utcnow()
+    monkeypatch.setattr(util, "vcjob_informer", synced_informer(listed_at))
+
+    async def main():
+        old = make_jobs(listed_at - timedelta(minutes=1))
+        await util.patch_jobs_status(old)
+        assert statuses(old) == ["running", "scheduled", "error"]
+
+        # Scheduled after the list, its Volcano job may not be created yet
+        new = make_jobs(listed_at + timedelta(seconds=1))
+        await util.patch_jobs_status(new)
+        assert statuses(new) == ["running", "scheduled", "scheduled"]
+
+    asyncio.run(main())
+
+
+def test_patch_jobs_status_without_informer(monkeypatch) -> None:
+    async def list_vcjobs(_continue=None):
+        return {"items": [vcjob(1, "Running"), vcjob(2)], "metadata": {}}
+
+    monkeypatch.setattr(util, "vcjob_informer", VCJobInformer())
+    monkeypatch.setattr(util, "list_vcjobs", list_vcjobs)
+
+    async def main():
+        jobs = make_jobs(datetime.utcnow() - timedelta(minutes=1))
+        await util.patch_jobs_status(jobs)
+        assert statuses(jobs) == ["running", "scheduled", "error"]
+
+    asyncio.run(main())
+
+
+def test_patch_jobs_status_pages(monkeypatch) -> None:
+    pages = {
+        None: {"items": [vcjob(1, "Running")], "metadata": {"continue": "2"}},
+        "2": {"items": [vcjob(4), vcjob(2, "Completed")], "metadata": {"continue": "3"}},
+        "3": {"items": [vcjob(3, "Failed")], "metadata": {"continue": "4"}},
+    }
+    requested = []
+
+    async def list_vcjobs(_continue=None):
+        requested.append(_continue)
+        return pages[_continue]
+
+    monkeypatch.setattr(util, "vcjob_informer", VCJobInformer())
+    monkeypatch.setattr(util, "list_vcjobs", list_vcjobs)
+
+    async def main():
+        jobs = make_jobs(datetime.utcnow() - timedelta(minutes=1))
+        await util.patch_jobs_status(jobs)
+        assert statuses(jobs) == ["running", "completed", "error"]
+        # No more pages are read once every job is found
+        assert requested == [None, "2", "3"]
+
+        del pages["3"]["metadata"]["continue"]
+        pages["3"]["items"] = []
+        jobs = make_jobs(datetime.utcnow() - timedelta(minutes=1))
+        await util.patch_jobs_status(jobs)
+        assert statuses(jobs) == ["running", "completed", "error"]
+
+    asyncio.run(main())
+
+
+def test_patch_jobs_status_api_server_unavailable(monkeypatch) -> None:
+    async def list_vcjobs(_continue=None):
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(util, "vcjob_informer", VCJobInformer())
+    monkeypatch.setattr(util, "list_vcjobs", list_vcjobs)
+
+    async def main():
+        jobs = make_jobs(datetime.utcnow() - timedelta(minutes=1))
+        await util.patch_jobs_status(jobs)
+        assert statuses(jobs) == ["unknown", "unknown", "unknown"]
+
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import pytest
+from fastapi import HTTPException
+
+from pinta.api.api.endpoints.util import accepts_gzip, parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=90-200", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes= 5-5", (5, 5)),
+])
+def test_parse_range(header: str, expected: tuple) -> None:
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "items=0-9", "bytes=0-9,20-29", "bytes=a-b", "bytes=-", "bytes=9-0"])
+def test_parse_range_ignored(header: str) -> None:
+    assert parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header, size", [("bytes=100-", 100), ("bytes=200-300", 100), ("bytes=-0", 100),
+                                          ("bytes=0-", 0), ("bytes=-10", 0)])
+def test_parse_range_not_satisfiable(header: str, size: int) -> None:
+    with pytest.raises(HTTPException) as e:
+        parse_range(header, size)
+    assert e.value.status_code == 416
+    assert e.value.headers["Content-Range"] == f"bytes */{size}"
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("GZIP", True),
+    ("x-gzip", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.000, deflate", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("deflate, *;q=0.1", True),
+    ("identity", False),
+    ("gzip;q=invalid", False),
+])
+def test_accepts_gzip(header: str, expected: bool) -> None:
+    assert accepts_gzip(header) is expected
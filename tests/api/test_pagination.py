@@ -0,0 +1,97 @@
+import base64
+from typing import Dict
+
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from pinta.api import crud, schemas
+
+from pinta.api.api.pagination import NEXT_CURSOR_HEADER, check_skip, cursor_after_id, decode_cursor, \
+    encode_cursor, set_next_cursor
+from pinta.api.core.config import settings
+from tests.utils.user import create_random_user
+
+
+def test_cursor_round_trip() -> None:
+    cursor = encode_cursor(id=42, order_by="started_at", desc=True, key="2020-01-01T00:00:00")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == dict(id=42, order_by="started_at", desc=True, key="2020-01-01T00:00:00")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    base64.urlsafe_b64encode(b'{"key": 1}').decode(),
+    base64.urlsafe_b64encode(b'{"id": "1"}').decode(),
+])
+def test_decode_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def test_cursor_after_id() -> None:
+    assert cursor_after_id(encode_cursor(id=7), None) == 7
+    assert cursor_after_id(None, 3) == 3
+    assert cursor_after_id(None, None) is None
+
+
+def test_check_skip() -> None:
+    check_skip(10, None, None)
+    check_skip(0, encode_cursor(id=7), None)
+    check_skip(0, None, 3)
+    for cursor, after_id in ((encode_cursor(id=7), None), (None, 3)):
+        with pytest.raises(HTTPException) as e:
+            check_skip(10, cursor, after_id)
+        assert e.value.status_code == 400
+
+
+class Row:
+    def __init__(self, id: int):
+        self.id = id
+
+
+def test_set_next_cursor_on_full_page() -> None:
+    response = Response()
+    set_next_cursor(response, [Row(1), Row(2)], 2, order_by="id")
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == dict(id=2, order_by="id")
+
+
+def test_set_next_cursor_on_last_page() -> None:
+    response = Response()
+    set_next_cursor(response, [Row(1)], 2)
+    set_next_cursor(response, [], 2)
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_read_jobs_invalid_cursor_key(client: TestClient, normal_user_token_headers: Dict[str, str]) -> None:
+    for key in (5, ["2020-01-01T00:00:00"], "not a date"):
+        cursor = encode_cursor(id=1, order_by="started_at", desc=False, key=key)
+        r = client.get(f"{settings.API_STR}/jobs/", params={"cursor": cursor, "order_by": "started_at"},
+                       headers=normal_user_token_headers)
+        assert r.status_code == 400
+
+
+def test_read_jobs_after_other_users_job(client: TestClient, db: Session,
+                                         normal_user_token_headers: Dict[str, str]) -> None:
+    user = create_random_user(db)
+    spec = schemas.SymmetricJob(name="job", description="", image="busybox", volumes="", working_dir="/",
+                                command="true", num_replicas=1, ports="", schedule=False)
+    job = crud.job.create_with_owner(db, obj_in=spec, owner_id=user.id)
+    try:
+        r = client.get(f"{settings.API_STR}/jobs/", params={"after_id": job.id},
+                       headers=normal_user_token_headers)
+        assert r.status_code == 400
+    finally:
+        crud.job.remove(db, id=job.id)
+
+
+def test_read_jobs_limit(client: TestClient, normal_user_token_headers: Dict[str, str]) -> None:
+    r = client.get(f"{settings.API_STR}/jobs/", params={"limit": settings.LIST_MAX_LIMIT},
+                   headers=normal_user_token_headers)
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_STR}/jobs/", params={"limit": settings.LIST_MAX_LIMIT + 1},
+                   headers=normal_user_token_headers)
+    assert r.status_code == 422
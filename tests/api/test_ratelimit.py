@@ -0,0 +1,42 @@
+import pytest
+
+from pinta.api.api import ratelimit
+from pinta.api.api.ratelimit import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list:
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_burst(clock: list) -> None:
+    bucket = TokenBucket(rate=1, burst=3, max_keys=10)
+    assert [bucket.take("a") for _ in range(3)] == [0, 0, 0]
+    assert bucket.take("a") == pytest.approx(1)
+    # Keys have their own buckets
+    assert bucket.take("b") == 0
+
+
+def test_token_bucket_refill(clock: list) -> None:
+    bucket = TokenBucket(rate=2, burst=2, max_keys=10)
+    bucket.take("a")
+    bucket.take("a")
+    assert bucket.take("a") == pytest.approx(0.5)
+    clock[0] += 0.25
+    assert bucket.take("a") == pytest.approx(0.25)
+    clock[0] += 0.25
+    assert bucket.take("a") == 0
+    # Never refills beyond the burst
+    clock[0] += 60
+    assert [bucket.take("a") for _ in range(3)] == [0, 0, pytest.approx(0.5)]
+
+
+def test_token_bucket_rejected_take_costs_nothing(clock: list) -> None:
+    bucket = TokenBucket(rate=1, burst=1, max_keys=10)
+    bucket.take("a")
+    for _ in range(5):
+        bucket.take("a")
+    clock[0] += 1
+    assert bucket.take("a") == 0
@@ -1,4 +1,5 @@
 
+import asyncio
 from typing import Dict, Generator
 
 import pytest
@@ -19,6 +20,9 @@ def db() -> Generator:
 
 @pytest.fixture(scope="module")
 def client() -> Generator:
+    # The TestClient runs on the current event loop, which asyncio.run() in
+    # other tests leaves unset
+    asyncio.set_event_loop(asyncio.new_event_loop())
     with TestClient(app) as c:
         yield c
 
@@ -0,0 +1,79 @@
+import pytest
+
+from pinta.api.core import breaker
+from pinta.api.core.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list:
+    now = [1000.0]
+    monkeypatch.setattr(breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def fail(circuit: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        circuit.before_call()
+        circuit.failure()
+
+
+def test_opens_after_consecutive_failures(clock: list) -> None:
+    circuit = CircuitBreaker("api", failures=3, reset_seconds=10)
+    fail(circuit, 2)
+    assert circuit.state == CLOSED
+    fail(circuit, 1)
+    assert circuit.state == OPEN
+    assert circuit.is_open()
+    clock[0] += 4
+    with pytest.raises(CircuitOpenError) as e:
+        circuit.before_call()
+    assert e.value.retry_after == pytest.approx(6)
+    assert circuit.snapshot() == dict(state=OPEN, consecutive_failures=3, opened=1, rejected=1)
+
+
+def test_success_resets_failures(clock: list) -> None:
+    circuit = CircuitBreaker("api", failures=3, reset_seconds=10)
+    fail(circuit, 2)
+    circuit.before_call()
+    circuit.success()
+    fail(circuit, 2)
+    assert circuit.state == CLOSED
+
+
+def test_half_open_trial_success_closes(clock: list) -> None:
+    circuit = CircuitBreaker("api", failures=1, reset_seconds=10)
+    fail(circuit, 1)
+    clock[0] += 10
+    assert not circuit.is_open()
+    circuit.before_call()
+    assert circuit.state == HALF_OPEN
+    # A single trial call at a time
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+    circuit.success()
+    assert circuit.state == CLOSED
+    circuit.before_call()
+
+
+def test_half_open_trial_failure_reopens(clock: list) -> None:
+    circuit = CircuitBreaker("api", failures=3, reset_seconds=10)
+    fail(circuit, 3)
+    clock[0] += 10
+    # One failure is enough while half open
+    fail(circuit, 1)
+    assert circuit.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+    assert circuit.opened.value == 2
+
+
+def test_abandoned_trial_allows_another(clock: list) -> None:
+    circuit = CircuitBreaker("api", failures=1, reset_seconds=10)
+    fail(circuit, 1)
+    clock[0] += 10
+    circuit.before_call()
+    circuit.abandon()
+    assert circuit.state == HALF_OPEN
+    circuit.before_call()
+    circuit.success()
+    assert circuit.state == CLOSED
@@ -0,0 +1,91 @@
+import time
+from types import SimpleNamespace
+
+from pinta.api.core import cache
+from pinta.api.core.cache import TTLCache, UserCache
+
+
+def make_user(id: int, username: str = "user") -> SimpleNamespace:
+    return SimpleNamespace(id=id, username=username, full_name=None, email=f"{username}@example.com",
+                           is_active=True, is_superuser=False, hashed_password="secret")
+
+
+def test_ttl_cache_expires_entries(monkeypatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    entries = TTLCache(10, 60)
+    entries.set("a", 1)
+    entries.set("b", 2, ttl=5)
+    now[0] += 10
+    assert entries.get("a") == 1
+    assert entries.get("b") is None
+    now[0] += 60
+    assert entries.get("a") is None
+    assert len(entries) == 0
+
+
+def test_ttl_cache_ttl_is_capped() -> None:
+    entries = TTLCache(10, 0.01)
+    entries.set("a", 1, ttl=3600)
+    time.sleep(0.02)
+    assert entries.get("a") is None
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    entries = TTLCache(2, 60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    assert entries.get("a") == 1
+    entries.set("c", 3)
+    assert entries.get("b") is None
+    assert entries.get("a") == 1
+    assert entries.get("c") == 3
+
+
+def test_ttl_cache_disabled() -> None:
+    entries = TTLCache(0, 60)
+    entries.set("a", 1)
+    assert entries.get("a") is None
+
+
+def test_user_cache_snapshot() -> None:
+    users = UserCache(10, 60)
+    users.set("token", make_user(1), expires_at=None, generation=users.generation)
+    snapshot = users.get("token")
+    assert snapshot["id"] == 1
+    assert snapshot["username"] == "user"
+    assert "hashed_password" not in snapshot
+
+
+def test_user_cache_skips_expired_token() -> None:
+    users = UserCache(10, 60)
+    users.set("token", make_user(1), expires_at=time.time() - 1, generation=users.generation)
+    assert users.get("token") is None
+
+
+def test_user_cache_invalidate() -> None:
+    users = UserCache(10, 60)
+    users.set("token", make_user(1), expires_at=None, generation=users.generation)
+    users.invalidate(1)
+    assert users.get("token") is None
+
+
+def test_user_cache_drops_snapshot_read_before_invalidation() -> None:
+    users = UserCache(10, 60)
+    # A request reads the user, then the user is updated before it caches the snapshot
+    generation = users.generation
+    users.invalidate(1)
+    users.set("token", make_user(1), expires_at=None, generation=generation)
+    assert users.get("token") is None
+    users.set("token", make_user(1), expires_at=None, generation=users.generation)
+    assert users.get("token") is not None
+
+
+def test_user_cache_clear() -> None:
+    users = UserCache(10, 60)
+    generation = users.generation
+    users.set("token", make_user(1), expires_at=None, generation=generation)
+    users.clear()
+    assert users.get("token") is None
+    users.set("token", make_user(1), expires_at=None, generation=generation)
+    assert users.get("token") is None
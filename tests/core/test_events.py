@@ -0,0 +1,104 @@
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pinta.api.core.events import RESET, JobEventBus, public_event
+
+
+def event(job_id: int, owner_id: int = 1, status: str = "running") -> dict:
+    return dict(job_id=job_id, owner_id=owner_id, status=status)
+
+
+async def take(events: AsyncIterator, n: int) -> List[Optional[Tuple[int, dict]]]:
+    return [await asyncio.wait_for(events.__anext__(), 1) for _ in range(n)]
+
+
+async def published_ids(bus: JobEventBus, events: List[dict]) -> List[int]:
+    """
+    Publish `events` and return their ids, as seen by a subscriber.
+    """
+    watcher = bus.subscribe()
+    first = asyncio.ensure_future(watcher.__anext__())
+    await asyncio.sleep(0)
+    bus.publish(events)
+    items = [await first] + await take(watcher, len(events) - 1)
+    await watcher.aclose()
+    return [event_id for event_id, _ in items]
+
+
+def test_live_events_by_owner() -> None:
+    async def main() -> None:
+        bus = JobEventBus()
+        mine = bus.subscribe(owner_id=1)
+        everyone = bus.subscribe()
+        next_mine = asyncio.ensure_future(mine.__anext__())
+        next_any = asyncio.ensure_future(everyone.__anext__())
+        await asyncio.sleep(0)
+        bus.publish([event(1, owner_id=2), event(2, owner_id=1)])
+        assert (await next_mine)[1] == event(2, owner_id=1)
+        assert (await next_any)[1] == event(1, owner_id=2)
+        assert (await take(everyone, 1))[0][1] == event(2, owner_id=1)
+
+    asyncio.run(main())
+
+
+def test_resume_after_last_event_id() -> None:
+    async def main() -> None:
+        bus = JobEventBus()
+        ids = await published_ids(bus, [event(1), event(2, owner_id=2), event(3)])
+        assert ids == sorted(ids)
+        resumed = bus.subscribe(owner_id=1, last_event_id=ids[0])
+        assert await take(resumed, 1) == [(ids[2], event(3))]
+        # Then follows the live events
+        bus.publish([event(4)])
+        assert (await take(resumed, 1))[0][1] == event(4)
+        # Nothing to replay after the latest event
+        latest = bus.subscribe(last_event_id=ids[2] + 1)
+        next_item = asyncio.ensure_future(latest.__anext__())
+        await asyncio.sleep(0.01)
+        assert not next_item.done()
+        next_item.cancel()
+
+    asyncio.run(main())
+
+
+def test_reset_when_events_are_gone() -> None:
+    async def main() -> None:
+        bus = JobEventBus(log_size=2)
+        ids = await published_ids(bus, [event(1), event(2), event(3)])
+        # Only the first event was dropped from the log
+        assert await take(bus.subscribe(last_event_id=ids[0]), 2) == [(ids[1], event(2)), (ids[2], event(3))]
+        (reset_id, reset), = await take(bus.subscribe(last_event_id=ids[0] - 1), 1)
+        assert reset is RESET
+        assert reset_id == ids[2]
+        # An id from the future, such as one from before a clock change
+        (_, reset), = await take(bus.subscribe(last_event_id=ids[2] + 100), 1)
+        assert reset is RESET
+
+    asyncio.run(main())
+
+
+def test_heartbeat() -> None:
+    async def main() -> None:
+        bus = JobEventBus()
+        assert await take(bus.subscribe(heartbeat=0.01), 2) == [None, None]
+
+    asyncio.run(main())
+
+
+def test_slow_subscriber_is_cut_off() -> None:
+    async def main() -> None:
+        bus = JobEventBus(queue_size=2)
+        slow = bus.subscribe()
+        first = asyncio.ensure_future(slow.__anext__())
+        await asyncio.sleep(0)
+        bus.publish([event(1)])
+        await first
+        bus.publish([event(2), event(3), event(4)])
+        assert [item async for item in slow] == []
+
+    asyncio.run(main())
+
+
+def test_public_event() -> None:
+    assert public_event(7, event(1)) == dict(id=7, type="status", job_id=1, status="running")
+    assert public_event(8, RESET) == dict(id=8, type="reset")
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from pinta.api.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_result() -> None:
+    async def main() -> None:
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch() -> dict:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return dict(phase="Running")
+
+        results = await asyncio.gather(*[flight.do("job-1", fetch) for _ in range(5)])
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert len(flight) == 0
+        # Nothing is cached once the call is done
+        await flight.do("job-1", fetch)
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+
+def test_keys_are_separate() -> None:
+    async def main() -> None:
+        flight = SingleFlight()
+
+        async def fetch(key: str) -> str:
+            await asyncio.sleep(0.01)
+            return key
+
+        assert await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b"))) == \
+            ["a", "b"]
+
+    asyncio.run(main())
+
+
+def test_concurrent_calls_share_exception() -> None:
+    async def main() -> None:
+        flight = SingleFlight()
+        calls = []
+
+        async def fail() -> None:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(*[flight.do("key", fail) for _ in range(3)], return_exceptions=True)
+        assert len(calls) == 1
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_others() -> None:
+    async def main() -> None:
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch() -> str:
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
+
+
+def test_every_caller_cancelled() -> None:
+    async def main() -> None:
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch() -> str:
+            await release.wait()
+            raise ValueError("nobody is waiting")
+
+        caller = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        # The call still runs to completion and is then forgotten
+        assert len(flight) == 1
+        release.set()
+        await asyncio.sleep(0.01)
+        assert len(flight) == 0
+
+    asyncio.run(main())
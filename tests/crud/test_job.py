@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from typing import Generator, List
+
+import pytest
+from sqlalchemy.orm import Session
+
+from pinta.api import crud, models, schemas
+from pinta.api.schemas.job import JobOrder
+from tests.utils.user import create_random_user
+
+
+@pytest.fixture(scope="module")
+def jobs(db: Session) -> Generator:
+    """
+    Jobs of their own user, with ties and NULLs in every order column.
+    """
+    user = create_random_user(db)
+    spec = schemas.SymmetricJob(name="job", description="", image="busybox", volumes="", working_dir="/",
+                                command="true", num_replicas=1, ports="", schedule=False)
+    jobs = crud.job.create_multi_with_owner(db, objs_in=[spec] * 9, owner_id=user.id)
+    start = datetime(2020, 1, 1)
+    for i, job in enumerate(jobs):
+        job.name = f"job-{i % 3}"
+        job.status = [None, schemas.JobStatus.running, schemas.JobStatus.completed][i % 3]
+        job.started_at = None if i % 4 == 0 else start + timedelta(minutes=i % 2)
+    db.commit()
+    yield jobs
+    crud.job.remove_multi(db, ids=[job.id for job in jobs])
+    db.commit()
+
+
+def pages(db: Session, owner_id: int, order_by: JobOrder, descending: bool, limit: int) -> List[models.Job]:
+    result: List[models.Job] = []
+    after = None
+    while True:
+        page = crud.job.get_multi_filtered(db, owner_id=owner_id, order_by=order_by, descending=descending,
+                                           limit=limit, after=after)
+        result += page
+        if len(page) < limit:
+            return result
+        after = (crud.job.order_key(page[-1], order_by), page[-1].id)
+
+
+@pytest.mark.parametrize("order_by", list(JobOrder))
+@pytest.mark.parametrize("descending", [False, True])
+def test_get_multi_filtered_pages(db: Session, jobs: List[models.Job], order_by: JobOrder,
+                                  descending: bool) -> None:
+    owner_id = jobs[0].owner_id
+    everything = crud.job.get_multi_filtered(db, owner_id=owner_id, order_by=order_by, descending=descending)
+    assert sorted(job.id for job in everything) == sorted(job.id for job in jobs)
+    for limit in (1, 2, 4):
+        assert [job.id for job in pages(db, owner_id, order_by, descending, limit)] == \
+            [job.id for job in everything]
+
+
+def test_get_multi_filtered_order(db: Session, jobs: List[models.Job]) -> None:
+    owner_id = jobs[0].owner_id
+    nulls = [job.id for job in jobs if job.started_at is None]
+    keys = sorted((job.started_at, job.id) for job in jobs if job.started_at is not None)
+    # Keys ascending with ties by id, then NULLs
+    ordered = crud.job.get_multi_filtered(db, owner_id=owner_id, order_by=JobOrder.started_at)
+    assert [job.id for job in ordered] == [id for _, id in keys] + sorted(nulls)
+    # NULLs first, then keys descending with ties by id
+    ordered = crud.job.get_multi_filtered(db, owner_id=owner_id, order_by=JobOrder.started_at, descending=True)
+    assert [job.id for job in ordered] == sorted(nulls, reverse=True) + [id for _, id in reversed(keys)]
+
+
+def test_updated_at_within_transaction(db: Session, jobs: List[models.Job]) -> None:
+    job = jobs[0]
+    before = datetime.utcnow()
+    job.description = "first"
+    db.flush()
+    db.refresh(job)
+    first = job.updated_at
+    job.description = "second"
+    db.flush()
+    db.refresh(job)
+    # Both in the same transaction, each update still moves the version
+    assert before - timedelta(minutes=1) < first < job.updated_at
+    db.commit()
+    assert crud.job.get_version(db, owner_id=job.owner_id)[2] == job.updated_at
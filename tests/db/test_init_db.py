@@ -0,0 +1,70 @@
+from typing import Generator
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+
+from pinta.api import crud
+from pinta.api.core.config import settings
+from pinta.api.db import init_db as init_db_module
+from pinta.api.db.init_db import MIGRATIONS_DIR, init_db, run_migrations
+from tests.utils.utils import random_lower_string
+
+
+@pytest.fixture()
+def scratch_engine() -> Generator:
+    url = make_url(settings.SQLALCHEMY_DATABASE_URI)
+    name = "pinta_test_" + random_lower_string()[:8]
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f"CREATE DATABASE {name}"))
+    engine = create_engine(url.set(database=name))
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.connect() as connection:
+            connection.execute(text(f"DROP DATABASE {name}"))
+        admin.dispose()
+
+
+def revision(engine: Engine) -> str:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def job_statuses(engine: Engine) -> list:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT unnest(enum_range(NULL::jobstatus))")).scalars().all()
+
+
+def test_init_db_migrates_empty_database(scratch_engine: Engine, monkeypatch) -> None:
+    monkeypatch.setattr(init_db_module, "engine", scratch_engine)
+    db = Session(bind=scratch_engine)
+    try:
+        init_db(db)
+        assert crud.user.get_by_username(db, username=settings.FIRST_SUPERUSER)
+    finally:
+        db.close()
+    assert revision(scratch_engine) == "0006"
+    assert "unknown" in job_statuses(scratch_engine)
+
+
+def test_run_migrations_upgrades_existing_schema(scratch_engine: Engine) -> None:
+    with scratch_engine.connect() as connection:
+        run_migrations(connection)
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    with scratch_engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.downgrade(config, "0005")
+    assert revision(scratch_engine) == "0005"
+
+    # 0006 adds the enum value outside of the migration transaction
+    with scratch_engine.connect() as connection:
+        run_migrations(connection)
+    assert revision(scratch_engine) == "0006"
+    assert "unknown" in job_statuses(scratch_engine)
@@ -0,0 +1,201 @@
+import asyncio
+from typing import AsyncIterator, List
+
+from pinta.api.kubernetes import logs
+from pinta.api.kubernetes.logs import LogHub, merge_log_lines, split_timestamp
+
+
+async def lines(*items: bytes) -> AsyncIterator[bytes]:
+    for item in items:
+        yield item
+
+
+async def collect(iterator: AsyncIterator[bytes]) -> List[bytes]:
+    return [item async for item in iterator]
+
+
+def test_split_timestamp_pads_fraction() -> None:
+    assert split_timestamp(b"2020-01-01T00:00:01.5Z hello\n") == (b"2020-01-01T00:00:01.500000000", b"hello\n")
+    assert split_timestamp(b"2020-01-01T00:00:01Z hello\n") == (b"2020-01-01T00:00:01.000000000", b"hello\n")
+    assert split_timestamp(b"no-timestamp") == (b"", b"no-timestamp")
+
+
+def test_merge_log_lines_orders_by_timestamp() -> None:
+    sources = [
+        (b"[master-0] ", lines(b"2020-01-01T00:00:01.5Z a\n", b"2020-01-01T00:00:03Z c\n")),
+        (b"[worker-0] ", lines(b"2020-01-01T00:00:01.49Z b\n", b"2020-01-01T00:00:02.1Z d\n")),
+        (b"[worker-1] ", lines()),
+    ]
+    assert asyncio.run(collect(merge_log_lines(sources))) == [
+        b"[worker-0] b\n",
+        b"[master-0] a\n",
+        b"[worker-0] d\n",
+        b"[master-0] c\n",
+    ]
+
+
+def test_merge_log_lines_keeps_timestamps() -> None:
+    sources = [
+        (b"[worker-0] ", lines(b"2020-01-01T00:00:02Z b\n")),
+        (b"[worker-1] ", lines(b"2020-01-01T00:00:01Z a\n")),
+    ]
+    assert asyncio.run(collect(merge_log_lines(sources, timestamps=True))) == [
+        b"[worker-1] 2020-01-01T00:00:01Z a\n",
+        b"[worker-0] 2020-01-01T00:00:02Z b\n",
+    ]
+
+
+def test_merge_log_lines_same_timestamp_keeps_source_order() -> None:
+    sources = [
+        (b"[worker-0] ", lines(b"2020-01-01T00:00:01Z a\n", b"2020-01-01T00:00:01Z b\n")),
+        (b"[worker-1] ", lines(b"2020-01-01T00:00:01Z c\n")),
+    ]
+    assert asyncio.run(collect(merge_log_lines(sources))) == [
+        b"[worker-0] a\n",
+        b"[worker-0] b\n",
+        b"[worker-1] c\n",
+    ]
+
+
+def test_merge_log_lines_waits_for_every_first_line() -> None:
+    async def slow() -> AsyncIterator[bytes]:
+        await asyncio.sleep(0.02)
+        yield b"2020-01-01T00:00:01Z a\n"
+
+    sources = [
+        (b"[worker-0] ", lines(b"2020-01-01T00:00:02Z b\n")),
+        (b"[worker-1] ", slow()),
+    ]
+    assert asyncio.run(collect(merge_log_lines(sources, idle_timeout=1))) == [
+        b"[worker-1] a\n",
+        b"[worker-0] b\n",
+    ]
+
+
+def test_merge_log_lines_flushes_past_idle_source() -> None:
+    async def main() -> None:
+        resume = asyncio.Event()
+
+        async def quiet() -> AsyncIterator[bytes]:
+            await resume.wait()
+            yield b"2020-01-01T00:00:03Z late\n"
+
+        merged = merge_log_lines([
+            (b"[worker-0] ", lines(b"2020-01-01T00:00:01Z a\n", b"2020-01-01T00:00:02Z b\n")),
+            (b"[worker-1] ", quiet()),
+        ], idle_timeout=0.01)
+        # Held back until worker-1 has been quiet for idle_timeout
+        assert await asyncio.wait_for(merged.__anext__(), 1) == b"[worker-0] a\n"
+        assert await asyncio.wait_for(merged.__anext__(), 1) == b"[worker-0] b\n"
+        resume.set()
+        assert await asyncio.wait_for(collect(merged), 1) == [b"[worker-1] late\n"]
+
+    asyncio.run(main())
+
+
+def test_merge_log_lines_waits_without_idle_timeout() -> None:
+    async def main() -> None:
+        async def quiet() -> AsyncIterator[bytes]:
+            await asyncio.sleep(3600)
+            yield b"2020-01-01T00:00:00Z never\n"
+
+        merged = merge_log_lines([
+            (b"[worker-0] ", lines(b"2020-01-01T00:00:01Z a\n")),
+            (b"[worker-1] ", quiet()),
+        ])
+        next_line = asyncio.ensure_future(merged.__anext__())
+        await asyncio.sleep(0.05)
+        assert not next_line.done()
+        next_line.cancel()
+        await asyncio.gather(next_line, return_exceptions=True)
+        await merged.aclose()
+
+    asyncio.run(main())
+
+
+class FakeLog:
+    """
+    Followed pod log whose lines are pushed by the test.
+    """
+    def __init__(self):
+        self.opened = 0
+        self.lines: asyncio.Queue = asyncio.Queue()
+
+    async def open_pod_log(self, pod: str, **params) -> "FakeLog":
+        self.opened += 1
+        return self
+
+    async def iter_lines(self, resp: "FakeLog") -> AsyncIterator[bytes]:
+        while True:
+            line = await self.lines.get()
+            if line is None:
+                return
+            yield line
+
+
+def test_log_hub_shares_upstream_and_replays(monkeypatch) -> None:
+    monkeypatch.setattr(logs.settings, "LOG_FOLLOW_TAIL_LINES", 2)
+
+    async def main() -> None:
+        log = FakeLog()
+        monkeypatch.setattr(logs, "open_pod_log", log.open_pod_log)
+        monkeypatch.setattr(logs, "iter_pod_log_lines", log.iter_lines)
+        hub = LogHub()
+        first = hub.subscribe("pod")
+        for line in (b"a\n", b"b\n", b"c\n"):
+            log.lines.put_nowait(line)
+        assert [await first.__anext__() for _ in range(3)] == [b"a\n", b"b\n", b"c\n"]
+        # Joins with the last LOG_FOLLOW_TAIL_LINES lines, then follows
+        second = hub.subscribe("pod")
+        assert [await second.__anext__() for _ in range(2)] == [b"b\n", b"c\n"]
+        log.lines.put_nowait(b"d\n")
+        assert await first.__anext__() == b"d\n"
+        assert await second.__anext__() == b"d\n"
+        assert log.opened == 1
+        assert hub.upstream_count() == 1
+        log.lines.put_nowait(None)
+        assert await collect(first) == []
+        assert await collect(second) == []
+        assert hub.upstream_count() == 0
+
+    asyncio.run(main())
+
+
+def test_log_hub_closes_upstream_after_last_subscriber(monkeypatch) -> None:
+    async def main() -> None:
+        log = FakeLog()
+        monkeypatch.setattr(logs, "open_pod_log", log.open_pod_log)
+        monkeypatch.setattr(logs, "iter_pod_log_lines", log.iter_lines)
+        hub = LogHub()
+        subscriber = hub.subscribe("pod")
+        log.lines.put_nowait(b"a\n")
+        assert await subscriber.__anext__() == b"a\n"
+        await subscriber.aclose()
+        assert hub.upstream_count() == 0
+        # A new subscriber opens a new upstream
+        subscriber = hub.subscribe("pod")
+        log.lines.put_nowait(b"b\n")
+        assert await subscriber.__anext__() == b"b\n"
+        assert log.opened == 2
+        await subscriber.aclose()
+
+    asyncio.run(main())
+
+
+def test_log_hub_cuts_off_slow_subscriber(monkeypatch) -> None:
+    monkeypatch.setattr(logs.settings, "LOG_SUBSCRIBER_QUEUE_SIZE", 2)
+
+    async def main() -> None:
+        log = FakeLog()
+        monkeypatch.setattr(logs, "open_pod_log", log.open_pod_log)
+        monkeypatch.setattr(logs, "iter_pod_log_lines", log.iter_lines)
+        hub = LogHub()
+        slow = hub.subscribe("pod")
+        log.lines.put_nowait(b"a\n")
+        assert await slow.__anext__() == b"a\n"
+        for line in (b"b\n", b"c\n", b"d\n"):
+            log.lines.put_nowait(line)
+        await asyncio.sleep(0.01)
+        assert await collect(slow) == []
+
+    asyncio.run(main())
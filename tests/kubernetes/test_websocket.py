@@ -0,0 +1,106 @@
+import asyncio
+from typing import AsyncGenerator, List
+
+from pinta.api.kubernetes import websocket
+from pinta.api.kubernetes.websocket import OUTPUT_CHANNELS, FrameBuffer, forward
+
+
+def test_frame_buffer_coalesces_same_channel() -> None:
+    async def main() -> List[bytes]:
+        buffer = FrameBuffer(OUTPUT_CHANNELS, 1024, 4096)
+        for frame in (b"\x01ab", b"\x01cd", b"\x02ef", b"\x01gh"):
+            await buffer.put(frame)
+        buffer.close()
+        return [frame async for frame in _drain(buffer)]
+
+    assert asyncio.run(main()) == [b"\x01abcd", b"\x02ef", b"\x01gh"]
+
+
+def test_frame_buffer_keeps_other_channels_apart() -> None:
+    async def main() -> List[bytes]:
+        buffer = FrameBuffer(OUTPUT_CHANNELS, 1024, 4096)
+        for frame in (b'\x03{"a":1}', b'\x03{"b":2}'):
+            await buffer.put(frame)
+        buffer.close()
+        return [frame async for frame in _drain(buffer)]
+
+    assert asyncio.run(main()) == [b'\x03{"a":1}', b'\x03{"b":2}']
+
+
+def test_frame_buffer_max_frame_bytes() -> None:
+    async def main() -> List[bytes]:
+        buffer = FrameBuffer(OUTPUT_CHANNELS, 4, 4096)
+        for frame in (b"\x01ab", b"\x01cd", b"\x01ef"):
+            await buffer.put(frame)
+        buffer.close()
+        return [frame async for frame in _drain(buffer)]
+
+    assert asyncio.run(main()) == [b"\x01abcd", b"\x01ef"]
+
+
+def test_frame_buffer_holds_lone_frame_until_deadline() -> None:
+    async def main() -> bytes:
+        loop = asyncio.get_running_loop()
+        buffer = FrameBuffer(OUTPUT_CHANNELS, 1024, 4096)
+        await buffer.put(b"\x01ab")
+        loop.call_later(0.01, lambda: asyncio.ensure_future(buffer.put(b"\x01cd")))
+        return await buffer.get(loop.time() + 1)
+
+    assert asyncio.run(main()) == b"\x01abcd"
+
+
+def test_frame_buffer_backpressure() -> None:
+    async def main() -> None:
+        buffer = FrameBuffer(OUTPUT_CHANNELS, 1024, 4)
+        await buffer.put(b"\x01abcd")
+        blocked = asyncio.ensure_future(buffer.put(b"\x02ef"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert await buffer.get(0) == b"\x01abcd"
+        await asyncio.wait_for(blocked, 1)
+        assert buffer.size == 3
+
+    asyncio.run(main())
+
+
+def test_frame_buffer_get_after_close() -> None:
+    async def main() -> None:
+        buffer = FrameBuffer(OUTPUT_CHANNELS, 1024, 4096)
+        waiting = asyncio.ensure_future(buffer.get(0))
+        await asyncio.sleep(0)
+        buffer.close()
+        assert await asyncio.wait_for(waiting, 1) is None
+
+    asyncio.run(main())
+
+
+def test_forward_slow_receiver(monkeypatch) -> None:
+    monkeypatch.setattr(websocket.settings, "WS_PROXY_FRAME_BYTES", 1024)
+    monkeypatch.setattr(websocket.settings, "WS_PROXY_BUFFER_BYTES", 8)
+    monkeypatch.setattr(websocket.settings, "WS_PROXY_FLUSH_INTERVAL", 0.001)
+    produced = []
+    sent = []
+
+    async def frames() -> AsyncGenerator[bytes, None]:
+        for i in range(100):
+            produced.append(i)
+            yield b"\x01" + b"%02d" % i
+
+    async def send(frame: bytes) -> None:
+        sent.append(frame)
+        # The sender is never more than the buffer, one frame over it and the
+        # frame waiting to be put ahead of what was sent
+        assert len(produced) * 2 - sum(len(frame) - 1 for frame in sent) <= 8 + 2 + 2
+        await asyncio.sleep(0.001)
+
+    asyncio.run(forward(frames(), send, OUTPUT_CHANNELS))
+    assert b"".join(frame[1:] for frame in sent) == b"".join(b"%02d" % i for i in range(100))
+    assert len(sent) < 100
+
+
+async def _drain(buffer: FrameBuffer) -> AsyncGenerator[bytes, None]:
+    while True:
+        frame = await buffer.get(0)
+        if frame is None:
+            return
+        yield frame
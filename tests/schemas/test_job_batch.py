@@ -0,0 +1,59 @@
+import pytest
+from pydantic import ValidationError
+
+from pinta.api.schemas import job as job_schemas
+from pinta.api.schemas.job import JobBatchCreate, JobType, SymmetricJob
+
+TEMPLATE = dict(name="lr-{{lr}}-{{n}}", description="lr {{ lr }}", image="busybox", volumes="",
+                working_dir="/", command="train --lr {{lr}}", num_replicas="{{n}}", ports="", schedule=False)
+
+
+def spec(name: str) -> dict:
+    return dict(TEMPLATE, name=name, description="", command="true", num_replicas=1, type="symmetric")
+
+
+def test_grid_expansion() -> None:
+    batch = JobBatchCreate(type=JobType.symmetric, template=TEMPLATE, grid=dict(lr=[0.1, 0.01], n=[1, 2, 4]))
+    assert len(batch.jobs) == 6
+    assert all(isinstance(job, SymmetricJob) for job in batch.jobs)
+    assert [job.name for job in batch.jobs] == ["lr-0.1-1", "lr-0.1-2", "lr-0.1-4",
+                                                "lr-0.01-1", "lr-0.01-2", "lr-0.01-4"]
+    first = batch.jobs[0]
+    assert first.description == "lr 0.1"
+    assert first.command == "train --lr 0.1"
+    # A lone placeholder keeps the type of its value
+    assert [job.num_replicas for job in batch.jobs[:3]] == [1, 2, 4]
+
+
+def test_grid_without_placeholder_values() -> None:
+    with pytest.raises(ValidationError, match="No grid values for n"):
+        JobBatchCreate(type=JobType.symmetric, template=TEMPLATE, grid=dict(lr=[0.1]))
+
+
+def test_grid_size_limit(monkeypatch) -> None:
+    monkeypatch.setattr(job_schemas.settings, "JOB_BATCH_MAX_SIZE", 6)
+    JobBatchCreate(type=JobType.symmetric, template=TEMPLATE, grid=dict(lr=[0.1, 0.01], n=[1, 2, 4]))
+    with pytest.raises(ValidationError, match="more than 6 jobs"):
+        JobBatchCreate(type=JobType.symmetric, template=TEMPLATE, grid=dict(lr=[0.1, 0.01], n=[1, 2, 4, 8]))
+
+
+def test_job_list() -> None:
+    batch = JobBatchCreate(jobs=[spec("a"), spec("b")])
+    assert [job.name for job in batch.jobs] == ["a", "b"]
+
+
+def test_job_list_size_limit(monkeypatch) -> None:
+    monkeypatch.setattr(job_schemas.settings, "JOB_BATCH_MAX_SIZE", 2)
+    with pytest.raises(ValidationError, match="More than 2 jobs"):
+        JobBatchCreate(jobs=[spec("a"), spec("b"), spec("c")])
+
+
+@pytest.mark.parametrize("body", [
+    dict(),
+    dict(jobs=[spec("a")], type=JobType.symmetric, template=TEMPLATE, grid=dict(lr=[0.1], n=[1])),
+    dict(type=JobType.image_builder, template=TEMPLATE, grid=dict(lr=[0.1], n=[1])),
+    dict(template=TEMPLATE, grid=dict(lr=[0.1], n=[1])),
+])
+def test_invalid_batch(body: dict) -> None:
+    with pytest.raises(ValidationError):
+        JobBatchCreate(**body)